@@ -0,0 +1,824 @@
+#!/usr/bin/env python3
+"""
+Replay Backends
+===============
+
+Offline stand-ins for Azure OpenAI, Document Intelligence, Blob Storage and
+AI Search, used by run_benchmarks.py to exercise the real extraction,
+indexing and search code without network access.
+
+Responses come from recorded fixtures when present (see FixtureStore and
+`run_benchmarks.py --record`) and are otherwise synthesized deterministically,
+so a bare checkout can run the suite. Every call is counted per backend and
+delayed by an injected latency, so throughput and percentiles reflect the
+pipeline's concurrency rather than an idealized zero-latency backend.
+
+- Chat completions: fixture keyed by (model, messages, response_format);
+  fallback is a schema-shaped JSON object (or "[]" for free-form prompts)
+- Embeddings: deterministic unit vectors derived from the text hash
+- Document Intelligence: fixture keyed by file SHA-256 (analysis_to_dict
+  payload); fallback is an analysis without tables
+- Blob Storage: in-memory containers, seeded from fixtures/blob/<container>/
+  and filled by the extraction uploads, with ETags and conditional reads
+- AI Search: fixture keyed by (method, path, body); fallback is an in-memory
+  index fed by the populators. Ranking is a keyword overlap score: the
+  simulator is for timing, not relevance.
+
+Fixture layout (default scripts/benchmarks/fixtures):
+  openai/<key>.json   {"content", "model", "usage"}
+  docint/<sha>.json   analysis_to_dict payload
+  search/<key>.json   {"status", "headers", "body"}
+  blob/<container>/<name>
+
+Configuration (optional env vars):
+- BENCHMARK_FIXTURES_DIR: fixture root (default scripts/benchmarks/fixtures)
+- BENCHMARK_EMBEDDING_DIM: synthetic embedding size (default 3072)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+import types
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote
+
+import httpx
+
+DEFAULT_FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Mean injected latency per backend, in milliseconds
+DEFAULT_LATENCY_MS = {
+    "openai": 1200.0,
+    "embeddings": 150.0,
+    "docint": 2500.0,
+    "blob": 25.0,
+    "search": 60.0,
+}
+
+
+def request_key(*parts: Any) -> str:
+    """Stable fixture key for a request"""
+    material = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LatencyModel:
+    """Injected latency: mean per backend, uniformly jittered, scaled globally"""
+
+    def __init__(self, means_ms: Optional[Dict[str, float]] = None, jitter: float = 0.3,
+                 scale: float = 1.0, seed: int = 0):
+        self.means_ms = dict(DEFAULT_LATENCY_MS)
+        self.means_ms.update(means_ms or {})
+        self.jitter = jitter
+        self.scale = scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse(spec: str) -> Dict[str, float]:
+        """'openai=800,docint=2000' -> {"openai": 800.0, "docint": 2000.0}"""
+        means = {}
+        for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+            name, _, value = item.partition("=")
+            if name.strip() not in DEFAULT_LATENCY_MS:
+                raise ValueError(f"Unknown backend in latency spec: {name}")
+            means[name.strip()] = float(value.strip().rstrip("ms") or 0)
+        return means
+
+    def seconds(self, backend: str) -> float:
+        mean = self.means_ms.get(backend, 0.0) * self.scale / 1000.0
+        if mean <= 0:
+            return 0.0
+        with self._lock:
+            return max(0.0, mean * self._random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    async def wait(self, backend: str) -> None:
+        delay = self.seconds(backend)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def wait_sync(self, backend: str) -> None:
+        delay = self.seconds(backend)
+        if delay:
+            time.sleep(delay)
+
+
+class CallCounter:
+    """Calls per backend operation, plus fixture hits/misses"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.fixture_hits = 0
+        self.synthesized = 0
+
+    def count(self, operation: str, from_fixture: Optional[bool] = None) -> None:
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            if from_fixture is True:
+                self.fixture_hits += 1
+            elif from_fixture is False:
+                self.synthesized += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(sorted(self.calls.items()))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = {}
+            self.fixture_hits = 0
+            self.synthesized = 0
+
+
+class FixtureStore:
+    """Recorded responses on disk, one JSON file per request key"""
+
+    def __init__(self, root: Optional[Path] = None, strict: bool = False):
+        self.root = Path(root or os.getenv("BENCHMARK_FIXTURES_DIR") or DEFAULT_FIXTURES_DIR)
+        self.strict = strict
+
+    def path(self, namespace: str, key: str) -> Path:
+        return self.root / namespace / f"{key}.json"
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        try:
+            return json.loads(self.path(namespace, key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            if self.strict:
+                raise LookupError(f"No {namespace} fixture for {key} (run with --record, or drop --strict)")
+            return None
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        path = self.path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(value, ensure_ascii=False, default=str), encoding="utf-8")
+
+    def blob_seeds(self) -> Iterable[Tuple[str, str, bytes]]:
+        """(container, blob name, content) for files under blob/"""
+        root = self.root / "blob"
+        if not root.exists():
+            return []
+        return [(path.parent.name, path.name, path.read_bytes()) for path in sorted(root.glob("*/*")) if path.is_file()]
+
+
+def synthetic_embedding(text: str, dim: Optional[int] = None) -> List[float]:
+    """Deterministic unit vector for a text"""
+    dim = dim or int(os.getenv("BENCHMARK_EMBEDDING_DIM", "3072"))
+    rng = random.Random(hashlib.sha256((text or "").encode("utf-8")).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+# --- Azure OpenAI chat completions -----------------------------------------------------------
+
+def _schema_default(schema: Dict[str, Any]) -> Any:
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {name: _schema_default(sub) for name, sub in (schema.get("properties") or {}).items()}
+    if kind == "array":
+        # One item, so downstream stages see non-empty lists (e.g. texts the populators embed)
+        items = schema.get("items")
+        return [_schema_default(items)] if isinstance(items, dict) else []
+    if kind in ("number", "integer"):
+        return 0
+    if kind == "boolean":
+        return False
+    if kind == "string":
+        return "benchmark"
+    return None
+
+
+def _usage(prompt_chars: int, completion_chars: int) -> Dict[str, int]:
+    prompt, completion = max(1, prompt_chars // 4), max(1, completion_chars // 4)
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def _chat_response(record: Dict[str, Any]) -> Any:
+    """Object shaped like openai's ChatCompletion for the fields the service reads"""
+    usage = record.get("usage") or {}
+    return types.SimpleNamespace(
+        model=record.get("model"),
+        choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=record.get("content", "")))],
+        usage=types.SimpleNamespace(
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            total_tokens=usage.get("total_tokens", 0),
+        ),
+    )
+
+
+def chat_request_key(request: Dict[str, Any]) -> str:
+    return request_key(request.get("model"), request.get("messages"), request.get("response_format"))
+
+
+class _ReplayCompletions:
+    def __init__(self, backends: "ReplayBackends"):
+        self._backends = backends
+
+    async def create(self, **request) -> Any:
+        backends = self._backends
+        await backends.latency.wait("openai")
+        record = backends.fixtures.get("openai", chat_request_key(request))
+        backends.counter.count("openai.chat", from_fixture=record is not None)
+        if record is None:
+            schema = (((request.get("response_format") or {}).get("json_schema") or {}).get("schema"))
+            content = json.dumps(_schema_default(schema)) if schema else "[]"
+            prompt_chars = sum(len(str(m.get("content", ""))) for m in request.get("messages", []))
+            record = {"content": content, "model": request.get("model"), "usage": _usage(prompt_chars, len(content))}
+        return _chat_response(record)
+
+
+class ReplayOpenAI:
+    """Drop-in for AsyncOpenAI's `chat.completions.create`"""
+
+    def __init__(self, backends: "ReplayBackends"):
+        self.chat = types.SimpleNamespace(completions=_ReplayCompletions(backends))
+
+
+class RecordingOpenAI:
+    """Wraps a real AsyncOpenAI client and stores each chat completion as a fixture"""
+
+    def __init__(self, client: Any, fixtures: FixtureStore):
+        self._client = client
+        self._fixtures = fixtures
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    async def _create(self, **request) -> Any:
+        response = await self._client.chat.completions.create(**request)
+        usage = getattr(response, "usage", None)
+        self._fixtures.put("openai", chat_request_key(request), {
+            "content": response.choices[0].message.content,
+            "model": getattr(response, "model", None),
+            "usage": {
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+                "completion_tokens": getattr(usage, "completion_tokens", 0),
+                "total_tokens": getattr(usage, "total_tokens", 0),
+            } if usage is not None else {},
+        })
+        return response
+
+
+# --- Document Intelligence --------------------------------------------------------------------
+
+def _file_sha256(file_path: Path) -> str:
+    return hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
+
+
+class ReplayDocumentIntelligence:
+    """Drop-in for AzureDocumentIntelligenceService.analyze_layout_async"""
+
+    def __init__(self, backends: "ReplayBackends", api_version: str = "2023-07-31"):
+        self._backends = backends
+        self.api_version = api_version
+
+    async def analyze_layout_async(self, file_path: Path, pages: Optional[str] = None) -> Dict[str, Any]:
+        from document_intelligence_service import analysis_from_dict  # type: ignore
+
+        backends = self._backends
+        await backends.latency.wait("docint")
+        payload = backends.fixtures.get("docint", await asyncio.to_thread(_file_sha256, file_path))
+        backends.counter.count("docint.analyze", from_fixture=payload is not None)
+        if payload is None:
+            payload = {"file": str(file_path), "text": "", "pages": 1, "tables": []}
+        return analysis_from_dict(payload)
+
+    def analyze_layout(self, file_path: Path, pages: Optional[str] = None) -> Dict[str, Any]:
+        return asyncio.run(self.analyze_layout_async(file_path, pages))
+
+    async def aclose(self) -> None:
+        return None
+
+
+class RecordingDocumentIntelligence:
+    """Wraps a real AzureDocumentIntelligenceService and stores each analysis as a fixture"""
+
+    def __init__(self, service: Any, fixtures: FixtureStore):
+        self._service = service
+        self._fixtures = fixtures
+        self.api_version = service.api_version
+
+    async def analyze_layout_async(self, file_path: Path, pages: Optional[str] = None) -> Dict[str, Any]:
+        from document_intelligence_service import analysis_to_dict  # type: ignore
+
+        analysis = await self._service.analyze_layout_async(file_path, pages)
+        payload = analysis_to_dict(analysis)
+        payload.pop("timings", None)
+        self._fixtures.put("docint", await asyncio.to_thread(_file_sha256, file_path), payload)
+        return analysis
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._service, name)
+
+
+# --- Blob Storage -------------------------------------------------------------------------------
+
+@dataclass
+class _StoredBlob:
+    name: str
+    content: bytes
+    etag: str
+    last_modified: datetime
+    content_type: Optional[str] = None
+
+
+class InMemoryBlobStore:
+    """Containers of blobs shared by the async (extraction, populators) and sync (parsed cache) facades"""
+
+    def __init__(self, backends: "ReplayBackends"):
+        self._backends = backends
+        self._containers: Dict[str, Dict[str, _StoredBlob]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, container: str, name: str, content: bytes, content_type: Optional[str] = None) -> _StoredBlob:
+        blob = _StoredBlob(name, bytes(content), f'"0x{hashlib.sha1(content).hexdigest()[:16].upper()}"',
+                           datetime.now(timezone.utc), content_type)
+        with self._lock:
+            self._containers.setdefault(container, {})[name] = blob
+        return blob
+
+    def get(self, container: str, name: str) -> Optional[_StoredBlob]:
+        with self._lock:
+            return self._containers.get(container, {}).get(name)
+
+    def list(self, container: str) -> List[_StoredBlob]:
+        with self._lock:
+            return sorted(self._containers.get(container, {}).values(), key=lambda b: b.name)
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(blobs) for blobs in self._containers.values())
+
+
+def _not_found(container: str, name: str) -> Exception:
+    from azure.core.exceptions import ResourceNotFoundError
+    return ResourceNotFoundError(f"Blob not found: {container}/{name}")
+
+
+class _AsyncDownloader:
+    def __init__(self, blob: _StoredBlob):
+        self._blob = blob
+        self.properties = types.SimpleNamespace(etag=blob.etag, last_modified=blob.last_modified)
+
+    async def readall(self) -> bytes:
+        return self._blob.content
+
+
+class _AsyncBlobClient:
+    def __init__(self, store: InMemoryBlobStore, container: str, name: str):
+        self._store, self.container_name, self.blob_name = store, container, name
+
+    async def upload_blob(self, data: Any, overwrite: bool = False, content_type: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        backends = self._store._backends
+        await backends.latency.wait("blob")
+        backends.counter.count("blob.upload")
+        content = data if isinstance(data, (bytes, bytearray)) else str(data).encode("utf-8")
+        blob = self._store.put(self.container_name, self.blob_name, content, content_type)
+        return {"etag": blob.etag}
+
+    async def download_blob(self, **kwargs) -> _AsyncDownloader:
+        backends = self._store._backends
+        await backends.latency.wait("blob")
+        backends.counter.count("blob.download")
+        blob = self._store.get(self.container_name, self.blob_name)
+        if blob is None:
+            raise _not_found(self.container_name, self.blob_name)
+        return _AsyncDownloader(blob)
+
+
+class _AsyncContainerClient:
+    def __init__(self, store: InMemoryBlobStore, container: str):
+        self._store, self.container_name = store, container
+
+    async def list_blobs(self, **kwargs):
+        backends = self._store._backends
+        await backends.latency.wait("blob")
+        backends.counter.count("blob.list")
+        for blob in self._store.list(self.container_name):
+            yield types.SimpleNamespace(name=blob.name, etag=blob.etag, last_modified=blob.last_modified,
+                                        size=len(blob.content))
+
+
+class AsyncBlobServiceClient:
+    """The parts of azure.storage.blob.aio.BlobServiceClient the pipeline uses"""
+
+    def __init__(self, store: InMemoryBlobStore):
+        self._store = store
+
+    def get_blob_client(self, container: str, blob: str) -> _AsyncBlobClient:
+        return _AsyncBlobClient(self._store, container, blob)
+
+    def get_container_client(self, container: str) -> _AsyncContainerClient:
+        return _AsyncContainerClient(self._store, container)
+
+    async def close(self) -> None:
+        return None
+
+
+class _SyncBlobClient:
+    def __init__(self, store: InMemoryBlobStore, container: str, name: str):
+        self._store, self.container_name, self.blob_name = store, container, name
+
+    def download_blob(self, etag: Optional[str] = None, match_condition: Any = None, **kwargs) -> Any:
+        from azure.core import MatchConditions
+        from azure.core.exceptions import ResourceNotModifiedError
+
+        backends = self._store._backends
+        backends.latency.wait_sync("blob")
+        blob = self._store.get(self.container_name, self.blob_name)
+        if blob is None:
+            backends.counter.count("blob.download")
+            raise _not_found(self.container_name, self.blob_name)
+        if etag is not None and match_condition == MatchConditions.IfModified and etag == blob.etag:
+            backends.counter.count("blob.not_modified")
+            raise ResourceNotModifiedError("Not modified")
+        backends.counter.count("blob.download")
+        return types.SimpleNamespace(readall=lambda: blob.content,
+                                     properties=types.SimpleNamespace(etag=blob.etag))
+
+
+class SyncBlobServiceClient:
+    """The parts of azure.storage.blob.BlobServiceClient ParsedBlobCache uses"""
+
+    def __init__(self, store: InMemoryBlobStore):
+        self._store = store
+
+    def get_blob_client(self, container: str, blob: str) -> _SyncBlobClient:
+        return _SyncBlobClient(self._store, container, blob)
+
+
+# --- AI Search and embeddings over HTTP ---------------------------------------------------------
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _query_string(request: httpx.Request) -> str:
+    query = request.url.query
+    return query.decode("utf-8") if isinstance(query, bytes) else str(query)
+
+
+class SearchSimulator:
+    """In-memory stand-in for the Azure AI Search REST API (index, search, $count, lookup)"""
+
+    def __init__(self):
+        self._indexes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def documents(self, index: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._indexes.get(index, {}))
+
+    def index_actions(self, index: str, actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        results = []
+        with self._lock:
+            docs = self._indexes.setdefault(index, {})
+            for action in actions:
+                kind = action.get("@search.action", "upload")
+                fields = {k: v for k, v in action.items() if k != "@search.action"}
+                key = str(fields.get("id", ""))
+                if kind == "delete":
+                    docs.pop(key, None)
+                elif kind in ("merge", "mergeOrUpload") and key in docs:
+                    docs[key].update(fields)
+                else:
+                    docs[key] = fields
+                results.append({"key": key, "status": True, "statusCode": 200})
+        return {"value": results}
+
+    @staticmethod
+    def _text(doc: Dict[str, Any]) -> str:
+        parts = []
+        for name, value in doc.items():
+            if name.endswith("_vector"):
+                continue
+            if isinstance(value, str):
+                parts.append(value)
+            elif isinstance(value, list):
+                parts.extend(str(v) for v in value if isinstance(v, str))
+        return " ".join(parts).lower()
+
+    def search(self, index: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        docs = list(self.documents(index).values())
+        query = str(payload.get("search") or "*")
+        terms = set(_WORD.findall(query.lower())) if query.strip() not in ("", "*") else set()
+        scored = []
+        for doc in docs:
+            if terms:
+                words = _WORD.findall(self._text(doc))
+                score = sum(1 for word in words if word in terms) / (1 + len(words) ** 0.5)
+            else:
+                score = 1.0
+            if score > 0 or payload.get("vectorQueries"):
+                scored.append((score, doc))
+        scored.sort(key=lambda item: (-item[0], str(item[1].get("id", ""))))
+        orderby = payload.get("orderby") or payload.get("orderBy")
+        if orderby:
+            field, _, direction = str(orderby).split(",")[0].strip().partition(" ")
+            scored.sort(key=lambda item: str(item[1].get(field) or ""), reverse=direction.strip().lower() == "desc")
+        result: Dict[str, Any] = {}
+        if payload.get("count"):
+            result["@odata.count"] = len(scored)
+        facets = payload.get("facets") or []
+        if facets:
+            result["@search.facets"] = {}
+            for facet in facets:
+                field = str(facet).split(",")[0]
+                counts: Dict[str, int] = {}
+                for _, doc in scored:
+                    value = doc.get(field)
+                    if value is not None:
+                        counts[str(value)] = counts.get(str(value), 0) + 1
+                result["@search.facets"][field] = [{"value": v, "count": c} for v, c in sorted(counts.items())]
+        skip, top = int(payload.get("skip") or 0), int(payload.get("top", 50) if payload.get("top") is not None else 50)
+        select = [f.strip() for f in str(payload.get("select") or "*").split(",") if f.strip()]
+        page = []
+        for score, doc in scored[skip:skip + top]:
+            fields = {k: v for k, v in doc.items() if not k.endswith("_vector")} if select == ["*"] \
+                else {k: doc[k] for k in select if k in doc}
+            fields["@search.score"] = score
+            page.append(fields)
+        result["value"] = page
+        return result
+
+    def lookup(self, index: str, key: str, select: Optional[str]) -> Optional[Dict[str, Any]]:
+        doc = self.documents(index).get(key)
+        if doc is None:
+            return None
+        if select:
+            return {k: doc[k] for k in select.split(",") if k in doc}
+        return {k: v for k, v in doc.items() if not k.endswith("_vector")}
+
+
+class SearchHTTPRouter:
+    """httpx handler replaying Search and embedding HTTP calls (fixtures first, then the simulator)"""
+
+    def __init__(self, backends: "ReplayBackends"):
+        self._backends = backends
+        self.simulator = SearchSimulator()
+
+    @staticmethod
+    def _body(request: httpx.Request) -> bytes:
+        body = request.content or b""
+        if request.headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    @staticmethod
+    def fixture_key(request: httpx.Request) -> str:
+        """Key ignoring api-version and query vectors (replayed embeddings are synthetic)"""
+        query = sorted((k, v) for k, v in parse_qsl(_query_string(request)) if k != "api-version")
+        body = SearchHTTPRouter._body(request)
+        try:
+            payload: Any = json.loads(body) if body else None
+        except ValueError:
+            payload = body.decode("utf-8", "replace")
+        if isinstance(payload, dict) and isinstance(payload.get("vectorQueries"), list):
+            payload = dict(payload, vectorQueries=[{k: v for k, v in q.items() if k != "vector"}
+                                                   for q in payload["vectorQueries"] if isinstance(q, dict)])
+        return request_key(request.method, unquote(request.url.path), query, payload)
+
+    def _json_body(self, request: httpx.Request) -> Any:
+        return json.loads(self._body(request) or b"{}")
+
+    def _respond(self, request: httpx.Request) -> Tuple[str, httpx.Response]:
+        path = unquote(request.url.path)
+        if "/embeddings" in path:
+            payload = self._json_body(request)
+            inputs = payload.get("input")
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            data = [{"index": i, "embedding": synthetic_embedding(str(text))} for i, text in enumerate(inputs)]
+            return "embeddings", httpx.Response(200, json={"data": data, "model": "replay-embedding"})
+
+        record = self._backends.fixtures.get("search", self.fixture_key(request))
+        match = re.search(r"/indexes/([^/]+)/docs(.*)$", path)
+        operation = "search.request"
+        if match:
+            index, rest = match.group(1), match.group(2)
+            operation = {"/search": "search.query", "/index": "search.index", "/$count": "search.count"}.get(
+                rest, "search.lookup")
+        if record is not None:
+            self._backends.counter.count(operation, from_fixture=True)
+            return "search", httpx.Response(record.get("status", 200), headers=record.get("headers") or {},
+                                            content=json.dumps(record.get("body")).encode("utf-8")
+                                            if not isinstance(record.get("body"), str) else record["body"].encode("utf-8"))
+        self._backends.counter.count(operation, from_fixture=False)
+        if not match:
+            return "search", httpx.Response(404, json={"error": {"message": f"Not simulated: {path}"}})
+        if rest == "/search":
+            return "search", httpx.Response(200, json=self.simulator.search(index, self._json_body(request)))
+        if rest == "/index":
+            return "search", httpx.Response(200, json=self.simulator.index_actions(index, self._json_body(request).get("value", [])))
+        if rest == "/$count":
+            return "search", httpx.Response(200, text=str(len(self.simulator.documents(index))))
+        key = rest.lstrip("/")
+        key = key[len("('"):-len("')")] if key.startswith("('") else key
+        select = dict(parse_qsl(_query_string(request))).get("$select")
+        doc = self.simulator.lookup(index, key, select)
+        if doc is None:
+            return "search", httpx.Response(404, json={"error": {"message": "Document not found"}})
+        return "search", httpx.Response(200, json=doc)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        backend, response = self._respond(request)
+        if backend == "embeddings":
+            self._backends.counter.count("openai.embeddings")
+        self._backends.latency.wait_sync(backend)
+        return response
+
+    async def handle_async(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        backend, response = self._respond(request)
+        if backend == "embeddings":
+            self._backends.counter.count("openai.embeddings")
+        await self._backends.latency.wait(backend)
+        return response
+
+
+class _AsyncRouterTransport(httpx.AsyncBaseTransport):
+    def __init__(self, router: SearchHTTPRouter):
+        self._router = router
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._router.handle_async(request)
+
+
+class RecordingHTTPTransport(httpx.BaseTransport):
+    """Forwards to the network and stores AI Search responses as fixtures"""
+
+    def __init__(self, fixtures: FixtureStore):
+        self._fixtures = fixtures
+        self._inner = httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        response = self._inner.handle_request(request)
+        response.read()
+        if "/indexes/" in request.url.path and request.method in ("GET", "POST"):
+            try:
+                body: Any = response.json()
+            except ValueError:
+                body = response.text
+            self._fixtures.put("search", SearchHTTPRouter.fixture_key(request), {
+                "status": response.status_code,
+                "headers": {"content-type": response.headers.get("content-type", "application/json")},
+                "body": body,
+            })
+        # Content is already decoded: drop the encoding headers that described the wire format
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in ("content-encoding", "content-length")]
+        return httpx.Response(response.status_code, headers=headers, content=response.content)
+
+
+class _ReplayRequests:
+    """`requests`-compatible get/post (for scripts/indexing/index_sync.py) routed to the simulator"""
+
+    def __init__(self, router: SearchHTTPRouter):
+        self._client = httpx.Client(transport=httpx.MockTransport(router.handle))
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        return self._client.get(url, headers=headers, params=kwargs.get("params"))
+
+    def post(self, url: str, headers: Optional[Dict[str, str]] = None, json: Any = None,
+             timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        return self._client.post(url, headers=headers, json=json)
+
+
+class _ReplayAiohttpResponse:
+    def __init__(self, response: httpx.Response):
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+
+    async def json(self) -> Any:
+        return self._response.json()
+
+    async def text(self) -> str:
+        return self._response.text
+
+    async def __aenter__(self) -> "_ReplayAiohttpResponse":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+class _ReplayAiohttpSession:
+    """aiohttp.ClientSession stand-in (for scripts/indexing/batch_embedder.py)"""
+
+    def __init__(self, router: SearchHTTPRouter):
+        self._router = router
+
+    def post(self, url: str, headers: Optional[Dict[str, str]] = None, json: Any = None, **kwargs):
+        router = self._router
+
+        class _Call:
+            async def __aenter__(self_inner):
+                request = httpx.Request("POST", url, headers=headers, json=json)
+                return _ReplayAiohttpResponse(await router.handle_async(request))
+
+            async def __aexit__(self_inner, *exc):
+                return None
+
+        return _Call()
+
+    async def close(self) -> None:
+        return None
+
+    async def __aenter__(self) -> "_ReplayAiohttpSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+# --- Wiring -------------------------------------------------------------------------------------
+
+class ReplayBackends:
+    """All replay backends for one benchmark run, sharing latency, counters and fixtures"""
+
+    def __init__(self, fixtures: Optional[FixtureStore] = None, latency: Optional[LatencyModel] = None):
+        self.fixtures = fixtures or FixtureStore()
+        self.latency = latency or LatencyModel()
+        self.counter = CallCounter()
+        self.blobs = InMemoryBlobStore(self)
+        self.router = SearchHTTPRouter(self)
+        for container, name, content in self.fixtures.blob_seeds():
+            self.blobs.put(container, name, content)
+
+    def openai_client(self) -> ReplayOpenAI:
+        return ReplayOpenAI(self)
+
+    def document_intelligence(self) -> ReplayDocumentIntelligence:
+        return ReplayDocumentIntelligence(self)
+
+    def async_blob_service(self) -> AsyncBlobServiceClient:
+        return AsyncBlobServiceClient(self.blobs)
+
+    def sync_blob_service(self) -> SyncBlobServiceClient:
+        return SyncBlobServiceClient(self.blobs)
+
+    def requests_module(self) -> _ReplayRequests:
+        return _ReplayRequests(self.router)
+
+    def aiohttp_module(self) -> Any:
+        import aiohttp
+        router = self.router
+        return types.SimpleNamespace(ClientSession=lambda *a, **k: _ReplayAiohttpSession(router),
+                                     ClientError=aiohttp.ClientError)
+
+    async def embed(self, text: str) -> List[float]:
+        """Single embedding (for populators calling their own get_embedding)"""
+        await self.latency.wait("embeddings")
+        self.counter.count("openai.embeddings")
+        return synthetic_embedding(text)
+
+    def install_http_transports(self) -> None:
+        """Point the services' shared HTTP transports at the replay router"""
+        import http_transport  # type: ignore
+
+        sync_transport = http_transport.HTTPTransport()
+        sync_transport._client.close()
+        sync_transport._client = httpx.Client(transport=httpx.MockTransport(self.router.handle))
+        async_transport = http_transport.AsyncHTTPTransport()
+        router = self.router
+        async_transport._build_client = lambda: httpx.AsyncClient(transport=_AsyncRouterTransport(router))
+        http_transport._http_transport = sync_transport
+        http_transport._async_http_transport = async_transport
+
+    def install_recording_transport(self) -> None:
+        """Record mode: real network, AI Search responses saved as fixtures"""
+        import http_transport  # type: ignore
+
+        transport = http_transport.HTTPTransport()
+        transport._client.close()
+        transport._client = httpx.Client(transport=RecordingHTTPTransport(self.fixtures),
+                                         timeout=transport.policy.timeout)
+        http_transport._http_transport = transport
+
+
+def services_path() -> Path:
+    return Path(__file__).parents[2] / "streamlit_app" / "services"
+
+
+def indexing_path() -> Path:
+    return Path(__file__).parents[1] / "indexing"
+
+
+def ensure_import_paths() -> None:
+    for path in (services_path(), indexing_path()):
+        if str(path) not in sys.path:
+            sys.path.append(str(path))
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmarks
+==================
+
+Runs the SOW pipeline end-to-end against replayed backends (see
+replay_backends.py): extraction of every document in the corpus, one at a
+time and as a concurrent batch, both index populators over the extraction
+output, and the hybrid / vector / keyword search services over a query set.
+
+Each scenario reports wall time, throughput, p50/p95/p99 latency, peak RSS
+and calls per backend. Injected latency keeps concurrency visible: a change
+that serializes backend calls shows up even though nothing leaves the
+machine. Peak RSS is the process high-water mark, so it only grows from one
+scenario to the next.
+
+Usage:
+  python scripts/benchmarks/run_benchmarks.py
+  python scripts/benchmarks/run_benchmarks.py --scenarios extract_batch,search --concurrency 8
+  python scripts/benchmarks/run_benchmarks.py --latency openai=800,docint=2000 --latency-scale 0.1
+  python scripts/benchmarks/run_benchmarks.py --json results.json
+  python scripts/benchmarks/run_benchmarks.py --baseline results.json --max-regression 0.15
+  python scripts/benchmarks/run_benchmarks.py --record --scenarios extract_single,search   (real Azure, read-only)
+
+Configuration (optional env vars):
+- BENCHMARK_FIXTURES_DIR: fixture root (default scripts/benchmarks/fixtures)
+- BENCHMARK_QUERIES: queries for the search scenario, separated by "|"
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import contextlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parents[2] / "streamlit_app" / "services"))
+sys.path.append(str(Path(__file__).parents[1] / "indexing"))
+sys.path.append(str(Path(__file__).parent))
+
+from replay_backends import (  # type: ignore
+    FixtureStore, LatencyModel, ReplayBackends, RecordingDocumentIntelligence, RecordingOpenAI,
+)
+
+SCENARIOS = ["extract_single", "extract_batch", "populate_hybrid", "populate_vector", "search"]
+RECORD_SCENARIOS = ["extract_single", "search"]
+
+DEFAULT_QUERIES = [
+    "brand activation staffing plan",
+    "sponsorship hospitality program management",
+    "account director hours",
+    "event production deliverables",
+    "social media content creation",
+    "Olympics partnership activation",
+    "media measurement and reporting",
+    "experiential marketing campaign",
+]
+
+# Placeholders so services configure themselves; every request they make is replayed
+REPLAY_ENVIRONMENT = {
+    "SEARCH_ENDPOINT": "https://replay.search.windows.net",
+    "SEARCH_KEY": "replay",
+    "AZURE_OPENAI_API_KEY": "replay",
+    "AZURE_OPENAI_ENDPOINT": "https://replay.openai.azure.com/",
+    "AZURE_OPENAI_DEPLOYMENT": "replay",
+    "AOAI_DEPLOYMENT": "replay-embedding",
+    "AZURE_STORAGE_ACCOUNT_URL": "https://replay.blob.core.windows.net",
+    "AZURE_DOCINT_ENDPOINT": "https://replay.cognitiveservices.azure.com/",
+    "AZURE_DOCINT_API_KEY": "replay",
+}
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def isolate_state(scratch: Path, record: bool) -> None:
+    """Keep caches, manifests and memos of the run out of the project tree"""
+    os.environ["SOW_EXTRACTION_CACHE"] = "0"
+    os.environ["EMBEDDING_STORE"] = "0"
+    os.environ["INDEX_MANIFEST_DIR"] = str(scratch / "index_manifests")
+    os.environ["PARSED_BLOB_CACHE_DIR"] = str(scratch / "parsed_blobs")
+    os.environ["SOW_NORMALIZATION_MEMO_PATH"] = str(scratch / "normalization_memo.json")
+    os.environ.pop("EXTRACTION_TRACE_JSONL", None)
+    os.environ.pop("EXTRACTION_TRACE_OTLP", None)
+    os.environ.pop("EXTRACTION_EVENT_LOG", None)
+    if not record:
+        os.environ.update(REPLAY_ENVIRONMENT)
+        os.environ["SEARCH_BACKEND"] = "azure"
+
+
+class Benchmark:
+    """Runs scenarios against one set of backends and collects their results"""
+
+    def __init__(self, backends: ReplayBackends, corpus: Path, concurrency: int, queries: List[str],
+                 rounds: int, record: bool, verbose: bool):
+        self.backends = backends
+        self.corpus = corpus
+        self.concurrency = concurrency
+        self.queries = queries
+        self.rounds = rounds
+        self.record = record
+        self.verbose = verbose
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    @contextlib.contextmanager
+    def _quiet(self):
+        if self.verbose:
+            yield
+            return
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+
+    def _extraction_service(self):
+        from sow_extraction_service import SOWExtractionService  # type: ignore
+
+        if self.record:
+            from openai import AsyncOpenAI
+            from document_intelligence_service import AzureDocumentIntelligenceService  # type: ignore
+
+            openai_client = RecordingOpenAI(AsyncOpenAI(
+                api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                base_url=f"{os.getenv('AZURE_OPENAI_ENDPOINT')}/openai/deployments/{os.getenv('AZURE_OPENAI_DEPLOYMENT')}",
+                default_query={"api-version": os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview")}
+            ), self.backends.fixtures)
+            docint = RecordingDocumentIntelligence(AzureDocumentIntelligenceService(), self.backends.fixtures)
+            return SOWExtractionService(sows_directory=str(self.corpus), openai_client=openai_client, docint=docint)
+        return SOWExtractionService(
+            sows_directory=str(self.corpus),
+            openai_client=self.backends.openai_client(),
+            blob_service_client=self.backends.async_blob_service(),
+            docint=self.backends.document_intelligence(),
+        )
+
+    def _finish(self, name: str, wall: float, latencies: List[float], operations: int,
+                errors: int = 0, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        from extraction_tracing import percentile  # type: ignore
+
+        result = {
+            "operations": operations,
+            "errors": errors,
+            "wall_seconds": round(wall, 4),
+            "throughput_per_second": round(operations / wall, 4) if wall > 0 else 0.0,
+            "p50_seconds": round(percentile(latencies, 50), 4),
+            "p95_seconds": round(percentile(latencies, 95), 4),
+            "p99_seconds": round(percentile(latencies, 99), 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "calls": self.backends.counter.snapshot(),
+            "fixture_hits": self.backends.counter.fixture_hits,
+            "synthesized": self.backends.counter.synthesized,
+        }
+        if extra:
+            result.update(extra)
+        self.results[name] = result
+        return result
+
+    async def extract_single(self) -> Dict[str, Any]:
+        service = self._extraction_service()
+        files = service.get_sow_files()
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        with self._quiet():
+            for file_path in files:
+                began = time.perf_counter()
+                result = await service.process_single_sow(file_path, skip_uploads=self.record, use_cache=False)
+                latencies.append(time.perf_counter() - began)
+                errors += 0 if result.success else 1
+        return self._finish("extract_single", time.perf_counter() - started, latencies, len(files), errors,
+                            {"staffing_paths": service.get_staffing_path_stats()})
+
+    async def extract_batch(self) -> Dict[str, Any]:
+        service = self._extraction_service()
+        started = time.perf_counter()
+        with self._quiet():
+            results = await service.process_all_sows(max_concurrency=self.concurrency, use_cache=False)
+        wall = time.perf_counter() - started
+        latencies = [r.processing_time or 0.0 for r in results]
+        return self._finish("extract_batch", wall, latencies, len(results), sum(1 for r in results if not r.success),
+                            {"concurrency": self.concurrency, "staffing_paths": service.get_staffing_path_stats()})
+
+    async def _populate(self, name: str, populator: Any) -> Dict[str, Any]:
+        async def replay_clients():
+            populator.blob_service_client = self.backends.async_blob_service()
+
+        populator.initialize_clients = replay_clients
+        started = time.perf_counter()
+        with self._quiet():
+            ok = await populator.populate_index(full=True)
+        wall = time.perf_counter() - started
+        documents = len(self.backends.router.simulator.documents(populator.index_name))
+        return self._finish(name, wall, [wall], documents, 0 if ok is not False else 1,
+                            {"index": populator.index_name})
+
+    async def populate_hybrid(self) -> Dict[str, Any]:
+        import batch_embedder  # type: ignore
+        from populate_hybrid_index import HybridIndexPopulator  # type: ignore
+
+        batch_embedder.aiohttp = self.backends.aiohttp_module()
+        return await self._populate("populate_hybrid", HybridIndexPopulator())
+
+    async def populate_vector(self) -> Dict[str, Any]:
+        from populate_vector_index import VectorIndexPopulator  # type: ignore
+
+        populator = VectorIndexPopulator()
+        populator.get_embedding = self.backends.embed
+        return await self._populate("populate_vector", populator)
+
+    def search(self) -> Dict[str, Any]:
+        import parsed_blob_cache  # type: ignore
+        from hybrid_search_service import HybridSearchService  # type: ignore
+        from vector_search_service import VectorSearchService  # type: ignore
+        from azure_search_service import AzureSearchService  # type: ignore
+
+        if not self.record:
+            cache = parsed_blob_cache.ParsedBlobCache(os.environ["AZURE_STORAGE_ACCOUNT_URL"])
+            cache._service_client = self.backends.sync_blob_service()
+            parsed_blob_cache._parsed_blob_cache = cache
+        hybrid, vector, keyword = HybridSearchService(), VectorSearchService(), AzureSearchService()
+        calls: List[Callable[[str], Any]] = [
+            lambda q: hybrid.search(q, search_type="hybrid", top=10),
+            lambda q: vector.search(q, search_type="hybrid", top=10),
+            lambda q: keyword.search(q, top=20),
+        ]
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        with self._quiet():
+            for _ in range(self.rounds):
+                for query in self.queries:
+                    for call in calls:
+                        began = time.perf_counter()
+                        try:
+                            result = call(query)
+                            errors += 0 if result else 1
+                        except Exception:
+                            errors += 1
+                        latencies.append(time.perf_counter() - began)
+        return self._finish("search", time.perf_counter() - started, latencies, len(latencies), errors,
+                            {"queries": len(self.queries), "rounds": self.rounds})
+
+    async def run(self, scenarios: List[str]) -> Dict[str, Dict[str, Any]]:
+        for name in scenarios:
+            self.backends.counter.reset()
+            print(f"▶ {name}...")
+            if name == "search":
+                result = await asyncio.to_thread(self.search)
+            else:
+                result = await getattr(self, name)()
+            print(f"  {result['operations']} ops in {result['wall_seconds']:.2f}s, "
+                  f"p95 {result['p95_seconds']:.3f}s, {result['errors']} errors")
+        return self.results
+
+
+def format_results(results: Dict[str, Dict[str, Any]]) -> str:
+    header = f"{'scenario':<16} {'ops':>5} {'err':>4} {'wall s':>8} {'ops/s':>8} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'rss MB':>8}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<16} {r['operations']:>5} {r['errors']:>4} {r['wall_seconds']:>8.2f} {r['throughput_per_second']:>8.2f} "
+            f"{r['p50_seconds']:>8.3f} {r['p95_seconds']:>8.3f} {r['p99_seconds']:>8.3f} {r['peak_rss_mb']:>8.1f}"
+        )
+    lines.append("")
+    lines.append("Calls per backend:")
+    for name, r in results.items():
+        calls = ", ".join(f"{op}={n}" for op, n in r["calls"].items()) or "-"
+        lines.append(f"  {name:<16} {calls}  (fixtures {r['fixture_hits']}, synthesized {r['synthesized']})")
+    return "\n".join(lines)
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+                        max_regression: float) -> List[str]:
+    """Scenarios whose p95 or throughput regressed more than max_regression (a fraction)"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous.get("p95_seconds") and current["p95_seconds"] > previous["p95_seconds"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_seconds']:.3f}s -> {current['p95_seconds']:.3f}s")
+        if previous.get("throughput_per_second") and \
+                current["throughput_per_second"] < previous["throughput_per_second"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {previous['throughput_per_second']:.2f}/s -> "
+                               f"{current['throughput_per_second']:.2f}/s")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks against replayed backends")
+    parser.add_argument("--corpus", type=str, default=str(Path(__file__).parents[2] / "sows"), help="SOW directory")
+    parser.add_argument("--scenarios", type=str, default=",".join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--concurrency", type=int, default=None, help="Documents in flight for extract_batch (default SOW_MAX_CONCURRENCY)")
+    parser.add_argument("--latency", type=str, default="", help="Mean latency per backend in ms, e.g. openai=800,docint=2000")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply every injected latency (0 disables)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Uniform latency jitter as a fraction of the mean")
+    parser.add_argument("--seed", type=int, default=0, help="Latency jitter seed")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over the query set in the search scenario")
+    parser.add_argument("--fixtures", type=str, default="", help="Fixture root (default BENCHMARK_FIXTURES_DIR or scripts/benchmarks/fixtures)")
+    parser.add_argument("--strict", action="store_true", help="Fail on requests without a recorded fixture")
+    parser.add_argument("--record", action="store_true", help="Call the real services and save their responses as fixtures (no uploads or index writes)")
+    parser.add_argument("--json", dest="json_path", type=str, default="", help="Write results as JSON")
+    parser.add_argument("--baseline", type=str, default="", help="Results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95/throughput regression vs the baseline (fraction)")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        print(f"❌ Unknown scenarios: {', '.join(unknown)}")
+        return 2
+    if args.record:
+        skipped = [s for s in scenarios if s not in RECORD_SCENARIOS]
+        if skipped:
+            print(f"⚠️ Not recorded (they write to Azure): {', '.join(skipped)}")
+        scenarios = [s for s in scenarios if s in RECORD_SCENARIOS]
+    corpus = Path(args.corpus)
+    if not corpus.exists():
+        print(f"❌ Corpus not found: {corpus}")
+        return 1
+
+    try:
+        latency = LatencyModel(LatencyModel.parse(args.latency), jitter=args.jitter,
+                               scale=0.0 if args.record else args.latency_scale, seed=args.seed)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    fixtures = FixtureStore(Path(args.fixtures) if args.fixtures else None, strict=args.strict)
+
+    with tempfile.TemporaryDirectory(prefix="sow-bench-") as scratch:
+        if args.record:
+            from dotenv import load_dotenv
+            load_dotenv(Path(__file__).parents[2] / ".env")
+        isolate_state(Path(scratch), args.record)
+
+        backends = ReplayBackends(fixtures, latency)
+        if args.record:
+            backends.install_recording_transport()
+        else:
+            backends.install_http_transports()
+            import index_sync  # type: ignore
+            index_sync.requests = backends.requests_module()
+
+        queries = [q for q in os.getenv("BENCHMARK_QUERIES", "").split("|") if q.strip()] or DEFAULT_QUERIES
+        concurrency = args.concurrency or int(os.getenv("SOW_MAX_CONCURRENCY", "4"))
+        benchmark = Benchmark(backends, corpus, concurrency, queries, args.rounds, args.record, args.verbose)
+        try:
+            results = asyncio.run(benchmark.run(scenarios))
+        except LookupError as e:
+            print(f"❌ {e}")
+            return 1
+
+    print()
+    print(format_results(results))
+    if args.record:
+        print(f"\n💾 Fixtures written to {fixtures.root}")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.json_path}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\n❌ Regressions beyond {args.max_regression:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n✅ Within {args.max_regression:.0%} of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
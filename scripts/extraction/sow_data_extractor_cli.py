@@ -18,11 +18,13 @@ import argparse
 sys.path.append(str(Path(__file__).parent / "services"))
 
 from sow_extraction_service import SOWExtractionService, ExtractionProgress
+from extraction_tracing import TraceRecorder, summarize, format_summary, write_otlp
 
 
 def progress_callback(progress: ExtractionProgress):
     """Progress callback for CLI output"""
-    print(f"  {progress.stage}: {progress.message} ({progress.percentage}%)")
+    prefix = f"[{progress.file_name}] " if progress.file_name else ""
+    print(f"  {prefix}{progress.stage}: {progress.message} ({progress.percentage}%)")
 
 
 async def main():
@@ -45,11 +47,23 @@ async def main():
     parser = argparse.ArgumentParser(description="SOW Data Extractor")
     parser.add_argument('--file', dest='single_file', type=str, default='', help='Process only this file path')
     parser.add_argument('--skip-uploads', dest='skip_uploads', action='store_true', help='Skip Azure Storage uploads')
+    parser.add_argument('--concurrency', dest='concurrency', type=int, default=None,
+                        help='Documents processed concurrently in batch mode (default: SOW_MAX_CONCURRENCY or 4)')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Ignore cached extraction results and re-run every stage')
+    parser.add_argument('--trace', dest='trace', type=str, default='',
+                        help='Write stage spans to this JSONL file and print a per-stage p50/p95 summary')
+    parser.add_argument('--otlp', dest='otlp', type=str, default='',
+                        help='Write stage spans as an OpenTelemetry OTLP/JSON trace file')
     args = parser.parse_args()
 
     # Initialize extractor service
     extractor = SOWExtractionService()
     extractor.set_progress_callback(progress_callback)
+    recorder = None
+    if args.trace or args.otlp:
+        recorder = TraceRecorder(args.trace or None)
+        extractor.events.subscribe(recorder, name="cli_trace")
     await extractor.initialize()
     
     # Process single file or all
@@ -62,10 +76,10 @@ async def main():
         if not target.exists():
             print(f"❌ Target file not found: {target}")
             return
-        res = await extractor.process_single_sow(target, skip_uploads=args.skip_uploads)
+        res = await extractor.process_single_sow(target, skip_uploads=args.skip_uploads, use_cache=args.use_cache)
         results = [res]
     else:
-        results = await extractor.process_all_sows()
+        results = await extractor.process_all_sows(max_concurrency=args.concurrency, skip_uploads=args.skip_uploads, use_cache=args.use_cache)
     
     if results:
         # Save to spreadsheet
@@ -111,6 +125,17 @@ async def main():
     else:
         print("❌ No results to save")
 
+    if recorder is not None and recorder.spans:
+        print("\n" + "=" * 50)
+        print("⏱️ STAGE TIMINGS")
+        print("=" * 50)
+        print(format_summary(summarize(recorder.spans)))
+        if args.trace:
+            print(f"\nSpans written to: {args.trace}")
+        if args.otlp:
+            print(f"OTLP trace written to: {write_otlp(recorder.spans, args.otlp)}")
+        recorder.close()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
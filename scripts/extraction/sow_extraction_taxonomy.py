@@ -5,10 +5,17 @@ SOW Extraction Taxonomy
 
 Comprehensive keyword dictionaries and patterns for extracting structured data
 from SOW documents. This serves as a fallback and validation layer for LLM extraction.
+
+TAXONOMY_MATCHER (built once at import) scans a document in one pass: every
+keyword of every field goes into a single Aho-Corasick automaton, and each
+field's regexes are joined into one alternation. scan() returns the hits for
+all fields with their offsets.
 """
 
 import re
-from typing import Dict, List, Pattern
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
 
 class SOWExtractionTaxonomy:
     """Comprehensive taxonomy for SOW data extraction"""
@@ -369,7 +376,14 @@ class SOWExtractionTaxonomy:
     
     @classmethod
     def get_compiled_patterns(cls) -> Dict[str, List[Pattern]]:
-        """Get compiled regex patterns for efficient matching"""
+        """Get compiled regex patterns for efficient matching (compiled once, then reused)"""
+        global _COMPILED_PATTERNS
+        if _COMPILED_PATTERNS is None:
+            _COMPILED_PATTERNS = cls._compile_patterns()
+        return {name: list(patterns) for name, patterns in _COMPILED_PATTERNS.items()}
+    
+    @classmethod
+    def _compile_patterns(cls) -> Dict[str, List[Pattern]]:
         return {
             "start_date_formats": [re.compile(pattern, re.IGNORECASE) for pattern in cls.START_DATE_KEYWORDS["date_formats"]],
             "end_date_formats": [re.compile(pattern, re.IGNORECASE) for pattern in cls.END_DATE_KEYWORDS["date_formats"]],
@@ -422,6 +436,134 @@ class SOWExtractionTaxonomy:
         }
     }
 
+_COMPILED_PATTERNS: Optional[Dict[str, List[Pattern]]] = None
+
+# ============================================================================
+# SINGLE-PASS MATCHER
+# ============================================================================
+
+# Keyword categories holding regexes rather than literal keywords
+REGEX_CATEGORIES = {"date_formats", "duration_patterns", "role_patterns", "allocation_patterns", "location_indicators"}
+
+@dataclass(frozen=True)
+class TaxonomyHit:
+    """One keyword or pattern match: [start, end) offsets into the scanned text"""
+    field: str
+    category: str
+    term: str
+    start: int
+    end: int
+    text: str
+
+def _fold_case(text: str) -> str:
+    """Lowercase without changing length, so offsets stay valid in the original text.
+
+    A character whose lowercase form is longer ("İ" -> "i̇") is kept as is.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(low if len(low) == 1 else ch for ch, low in ((ch, ch.lower()) for ch in text))
+
+
+class AhoCorasick:
+    """Case-insensitive multi-keyword automaton; finds every keyword occurrence in one pass"""
+    
+    def __init__(self, keywords: Iterable[Tuple[str, object]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, object]]] = [[]]
+        for keyword, payload in keywords:
+            keyword = _fold_case(keyword)
+            if not keyword:
+                continue
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((len(keyword), payload))
+        
+        # Breadth-first failure links; each state also reports its fail chain's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+    
+    def iter(self, text: str):
+        """Yield (start, end, payload) for every keyword occurrence (overlaps included)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(_fold_case(text)):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in out[state]:
+                yield i + 1 - length, i + 1, payload
+
+class TaxonomyMatcher:
+    """Precompiled taxonomy: one keyword automaton plus one combined regex per field"""
+    
+    def __init__(self, field_keywords: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        field_keywords = field_keywords or {field: get_field_keywords(field) for field in SOWExtractionTaxonomy.FIELD_PRIORITIES}
+        keywords = []
+        self._field_regexes: Dict[str, Tuple[Pattern, List[Tuple[str, str]]]] = {}
+        for field, categories in field_keywords.items():
+            regex_parts: List[str] = []
+            groups: List[Tuple[str, str]] = []
+            for category, terms in categories.items():
+                if category in REGEX_CATEGORIES:
+                    for pattern in terms:
+                        regex_parts.append(f"(?P<p{len(groups)}>{pattern})")
+                        groups.append((category, pattern))
+                else:
+                    keywords.extend((term, (field, category, term)) for term in terms)
+            if regex_parts:
+                self._field_regexes[field] = (re.compile("|".join(regex_parts), re.IGNORECASE), groups)
+        self._automaton = AhoCorasick(keywords)
+    
+    @staticmethod
+    def _bounded(text: str, start: int, end: int) -> bool:
+        """Keywords match whole words only ("term" must not hit "determine")"""
+        if text[start].isalnum() and start > 0 and text[start - 1].isalnum():
+            return False
+        if text[end - 1].isalnum() and end < len(text) and text[end].isalnum():
+            return False
+        return True
+    
+    def scan(self, text: str, fields: Optional[Iterable[str]] = None) -> Dict[str, List[TaxonomyHit]]:
+        """All keyword and pattern hits per field, in document order"""
+        wanted = set(fields) if fields is not None else None
+        hits: Dict[str, List[TaxonomyHit]] = {}
+        text = text or ""
+        
+        for start, end, (field, category, term) in self._automaton.iter(text):
+            if (wanted is None or field in wanted) and self._bounded(text, start, end):
+                hits.setdefault(field, []).append(TaxonomyHit(field, category, term, start, end, text[start:end]))
+        
+        for field, (regex, groups) in self._field_regexes.items():
+            if wanted is not None and field not in wanted:
+                continue
+            for match in regex.finditer(text):
+                category, pattern = groups[int(match.lastgroup[1:])]
+                hits.setdefault(field, []).append(
+                    TaxonomyHit(field, category, pattern, match.start(), match.end(), match.group()))
+        
+        for field_hits in hits.values():
+            field_hits.sort(key=lambda hit: (hit.start, -hit.end))
+        return hits
+
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
@@ -454,6 +596,8 @@ def get_compiled_patterns_for_field(field_name: str) -> List[Pattern]:
     
     return pattern_mapping.get(field_name, [])
 
+TAXONOMY_MATCHER = TaxonomyMatcher()
+
 if __name__ == "__main__":
     # Test the taxonomy
     print("🔍 SOW Extraction Taxonomy")
@@ -474,4 +618,9 @@ if __name__ == "__main__":
     for category, keywords in client_keywords.items():
         print(f"   {category}: {len(keywords)} keywords")
     
+    sample = "Client: Acme Corp. Start date: January 5, 2025. Duration 6 months. Account Director 25% (120 hrs)"
+    print("\n🔎 Sample scan:")
+    for field, field_hits in TAXONOMY_MATCHER.scan(sample).items():
+        print(f"   {field}: {[(h.category, h.text, h.start) for h in field_hits]}")
+    
     print(f"\n✅ Taxonomy loaded successfully!")
@@ -19,6 +19,8 @@ import asyncio
 import re
 import jsonschema
 import io
+import statistics
+import concurrent.futures
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
@@ -104,12 +106,148 @@ class StaffingPlanResult:
     error: Optional[str] = None
 
 
+# OCR tuning (optional env vars):
+# - OCR_WORKERS: OCR worker processes (default: CPU count)
+# - OCR_BASE_DPI: first render resolution (default 300)
+# - OCR_MAX_DPI: upper bound when re-rendering small text (default 600)
+# - OCR_TARGET_TEXT_PX: desired median word height in pixels (default 30)
+OCR_TESSERACT_CONFIG = '--psm 6 -l eng'
+OCR_ANCHOR_REGEX = r"insert\s+screen\s+shot|resource\s+table|staff\s*plan"
+
+
+def _preprocess_for_ocr(img):
+    """Grayscale, autocontrast and light sharpen for OCR clarity"""
+    try:
+        from PIL import ImageOps, ImageFilter
+        g = img.convert('L')
+        g = ImageOps.autocontrast(g)
+        return g.filter(ImageFilter.SHARPEN)
+    except Exception:
+        return img
+
+
+def _median_word_height(data: Dict[str, List[Any]]) -> Optional[float]:
+    """Median height of confidently recognized words in an image_to_data result"""
+    n = len(data.get('text', []))
+    heights = []
+    for i in range(n):
+        if not (data['text'][i] or '').strip():
+            continue
+        try:
+            if float(data['conf'][i]) < 50:
+                continue
+        except Exception:
+            continue
+        heights.append(data['height'][i])
+    return statistics.median(heights) if len(heights) >= 5 else None
+
+
+def _anchor_top(data: Dict[str, List[Any]], image_height: int, anchor_regex: str = OCR_ANCHOR_REGEX) -> int:
+    """Top of the region below an anchor line (e.g. "Insert screen shot"), or the lower 60% if none"""
+    n = len(data.get('text', []))
+    min_top = None
+    for i in range(n):
+        txt = (data['text'][i] or '').strip()
+        if not txt:
+            continue
+        if re.search(anchor_regex, txt, re.I):
+            top = data.get('top', [0]*n)[i]
+            if min_top is None or top < min_top:
+                min_top = top
+    if min_top is None:
+        # Heuristic: crop lower 60%
+        return int(image_height * 0.4)
+    return int(min_top + image_height * 0.05)
+
+
+def _ocr_data_to_lines(data: Dict[str, List[Any]]) -> List[str]:
+    """Reconstruct table-like lines from an image_to_data result by inserting column separators based on gaps."""
+    n = len(data.get('text', []))
+    lines: Dict[Tuple[int,int], List[Dict[str, Any]]] = {}
+    for i in range(n):
+        txt = (data['text'][i] or '').strip()
+        if not txt:
+            continue
+        conf = float(data.get('conf', [0]*n)[i]) if data.get('conf') else 0.0
+        if conf < 20:  # more permissive filter
+            continue
+        key = (data.get('block_num', [0]*n)[i], data.get('line_num', [0]*n)[i])
+        item = {
+            'left': data.get('left', [0]*n)[i],
+            'top': data.get('top', [0]*n)[i],
+            'width': data.get('width', [0]*n)[i],
+            'text': txt
+        }
+        lines.setdefault(key, []).append(item)
+    # Reconstruct per line with gap-based separators
+    out_lines: List[str] = []
+    for key, words in sorted(lines.items(), key=lambda kv: (kv[0][0], min(w['top'] for w in kv[1]))):
+        words_sorted = sorted(words, key=lambda w: w['left'])
+        if not words_sorted:
+            continue
+        # Compute median character width to set a dynamic gap threshold
+        widths = [w['width'] for w in words_sorted if w['width']]
+        avg_char = (sum(widths)/len(widths))/max(len(" ".join(w['text'] for w in words_sorted)), 1)
+        gap_threshold = max(18, avg_char * 16)  # tuned heuristic
+        current_left = words_sorted[0]['left'] + words_sorted[0]['width']
+        parts = [words_sorted[0]['text']]
+        for w in words_sorted[1:]:
+            gap = w['left'] - current_left
+            if gap > gap_threshold:
+                parts.append('|')
+            else:
+                parts.append(' ')
+            parts.append(w['text'])
+            current_left = w['left'] + w['width']
+        line_text = "".join(parts)
+        # Keep only lines likely to be table-like or staffing-related
+        if re.search(r"(name|title|role|level|hours|%|fte|allocation|rate|salary|location|billable|per\s*annum)", line_text, re.I) or re.search(r"\b\d{1,4}\b", line_text):
+            out_lines.append(line_text)
+    return out_lines
+
+
+def _ocr_pdf_page(file_path: str, page_index: int, base_dpi: int, max_dpi: int, target_text_px: float) -> List[str]:
+    """OCR one PDF page (runs in a worker process).
+
+    Renders at `base_dpi`; while the detected text is smaller than the
+    target size, re-renders at a proportionally higher DPI, up to `max_dpi`.
+    If the full page yields no table-like lines, the region below the anchor
+    line is cropped and OCR'd again, since Tesseract segments an embedded
+    table better on its own.
+    """
+    doc = pdfium.PdfDocument(file_path)
+    try:
+        page = doc[page_index]
+        dpi = base_dpi
+        while True:
+            img = _preprocess_for_ocr(page.render(scale=dpi / 72).to_pil())
+            data = pytesseract.image_to_data(img, output_type=TesseractOutput.DICT, config=OCR_TESSERACT_CONFIG)
+            median_height = _median_word_height(data)
+            if median_height is None or median_height >= target_text_px * 0.75 or dpi >= max_dpi:
+                break
+            dpi = min(max_dpi, int(dpi * target_text_px / median_height))
+        lines = _ocr_data_to_lines(data)
+        if not lines:
+            top = _anchor_top(data, img.height)
+            cropped = img.crop((0, max(0, top), img.width, img.height))
+            crop_data = pytesseract.image_to_data(cropped, output_type=TesseractOutput.DICT, config=OCR_TESSERACT_CONFIG)
+            lines = _ocr_data_to_lines(crop_data)
+        return lines
+    finally:
+        doc.close()
+
+
 class StandaloneStaffingExtractor:
     """Standalone extractor focused specifically on staffing plans"""
     
     def __init__(self):
         self.openai_client = None
         self.fte_yearly_hours_basis = 1800  # Standard FTE hours per year
+        self.ocr_workers = int(os.getenv("OCR_WORKERS", "0")) or (os.cpu_count() or 1)
+        self.ocr_base_dpi = int(os.getenv("OCR_BASE_DPI", "300"))
+        self.ocr_max_dpi = int(os.getenv("OCR_MAX_DPI", "600"))
+        self.ocr_target_text_px = float(os.getenv("OCR_TARGET_TEXT_PX", "30"))
+        self._ocr_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
         
         # JSON schema for staffing plan validation
         self.staffing_schema = {
@@ -235,60 +373,17 @@ class StandaloneStaffingExtractor:
         except Exception as e:
             raise Exception(f"Error extracting from PDF {file_path}: {e}")
 
-    def _render_pdf_pages_to_images(self, file_path: Path, max_pages: int = 10):
-        """Render PDF pages to PIL images using pypdfium2 if available"""
-        if not PDFIUM_AVAILABLE:
-            return []
-        try:
-            images = []
-            doc = pdfium.PdfDocument(str(file_path))
-            page_count = min(len(doc), max_pages)
-            for i in range(page_count):
-                page = doc[i]
-                # Render at higher DPI (approx 400)
-                bmp = page.render(scale=600/72)
-                img = bmp.to_pil()
-                # Preprocess: convert to grayscale and enhance contrast
-                try:
-                    from PIL import ImageOps, ImageFilter
-                    g = img.convert('L')
-                    g = ImageOps.autocontrast(g)
-                    # Light sharpen and slight upsample for OCR clarity
-                    g = g.filter(ImageFilter.SHARPEN)
-                    g = g.resize((int(g.width*1.3), int(g.height*1.3)))
-                    images.append(g)
-                except Exception:
-                    images.append(img)
-            return images
-        except Exception:
-            return []
+    def _get_ocr_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Process pool for page OCR (created on first use, reused across files)"""
+        if self._ocr_pool is None:
+            self._ocr_pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.ocr_workers)
+        return self._ocr_pool
 
-    def _crop_below_anchor(self, image, anchor_regex: str = r"insert\s+screen\s+shot|resource\s+table|staff\s*plan"):
-        """Crop region below an anchor text to focus on embedded tables after the prompt line."""
-        if not PYTESSERACT_AVAILABLE:
-            return None
-        try:
-            data = pytesseract.image_to_data(image, output_type=TesseractOutput.DICT, config='--psm 6 -l eng')
-        except Exception:
-            return None
-        n = len(data.get('text', []))
-        min_top = None
-        import re as _re
-        for i in range(n):
-            txt = (data['text'][i] or '').strip()
-            if not txt:
-                continue
-            if _re.search(anchor_regex, txt, _re.I):
-                top = data.get('top', [0]*n)[i]
-                if min_top is None or top < min_top:
-                    min_top = top
-        if min_top is None:
-            # Heuristic: crop lower 60%
-            top = int(image.height * 0.4)
-        else:
-            top = int(min_top + image.height * 0.05)
-        box = (0, max(0, top), image.width, image.height)
-        return image.crop(box)
+    def close(self):
+        """Shut down the OCR worker processes"""
+        if self._ocr_pool is not None:
+            self._ocr_pool.shutdown(wait=True)
+            self._ocr_pool = None
 
     def _ocr_lines_with_gaps(self, image) -> List[str]:
         """Run OCR on an image and reconstruct table-like lines by inserting column separators based on gaps."""
@@ -298,71 +393,43 @@ class StandaloneStaffingExtractor:
             # Use tesseract with table-friendly configs
             data = pytesseract.image_to_data(
                 image,
-                config='--psm 6 -l eng',
+                config=OCR_TESSERACT_CONFIG,
                 output_type=TesseractOutput.DICT
             )
         except Exception:
             return []
-        n = len(data.get('text', []))
-        lines: Dict[Tuple[int,int], List[Dict[str, Any]]] = {}
-        for i in range(n):
-            txt = (data['text'][i] or '').strip()
-            if not txt:
-                continue
-            conf = float(data.get('conf', [0]*n)[i]) if data.get('conf') else 0.0
-            if conf < 20:  # more permissive filter
-                continue
-            key = (data.get('block_num', [0]*n)[i], data.get('line_num', [0]*n)[i])
-            item = {
-                'left': data.get('left', [0]*n)[i],
-                'top': data.get('top', [0]*n)[i],
-                'width': data.get('width', [0]*n)[i],
-                'text': txt
-            }
-            lines.setdefault(key, []).append(item)
-        # Reconstruct per line with gap-based separators
-        out_lines: List[str] = []
-        for key, words in sorted(lines.items(), key=lambda kv: (kv[0][0], min(w['top'] for w in kv[1]))):
-            words_sorted = sorted(words, key=lambda w: w['left'])
-            if not words_sorted:
-                continue
-            # Compute median character width to set a dynamic gap threshold
-            widths = [w['width'] for w in words_sorted if w['width']]
-            avg_char = (sum(widths)/len(widths))/max(len(" ".join(w['text'] for w in words_sorted)), 1)
-            gap_threshold = max(18, avg_char * 16)  # tuned heuristic
-            current_left = words_sorted[0]['left'] + words_sorted[0]['width']
-            parts = [words_sorted[0]['text']]
-            for w in words_sorted[1:]:
-                gap = w['left'] - current_left
-                if gap > gap_threshold:
-                    parts.append('|')
-                else:
-                    parts.append(' ')
-                parts.append(w['text'])
-                current_left = w['left'] + w['width']
-            line_text = "".join(parts)
-            # Keep only lines likely to be table-like or staffing-related
-            if re.search(r"(name|title|role|level|hours|%|fte|allocation|rate|salary|location|billable|per\s*annum)", line_text, re.I) or re.search(r"\b\d{1,4}\b", line_text):
-                out_lines.append(line_text)
-        return out_lines
+        return _ocr_data_to_lines(data)
+
+    def _ocr_pdf_pages(self, file_path: Path, max_pages: int = 10) -> List[List[str]]:
+        """OCR pages in parallel (one task per page); returns lines per page in page order"""
+        if not PDFIUM_AVAILABLE or not PYTESSERACT_AVAILABLE:
+            return []
+        try:
+            doc = pdfium.PdfDocument(str(file_path))
+            page_count = min(len(doc), max_pages)
+            doc.close()
+        except Exception:
+            return []
+        args = [(str(file_path), i, self.ocr_base_dpi, self.ocr_max_dpi, self.ocr_target_text_px) for i in range(page_count)]
+        try:
+            pool = self._get_ocr_pool()
+            futures = [pool.submit(_ocr_pdf_page, *a) for a in args]
+        except Exception as e:
+            print(f"OCR process pool unavailable ({e}); running OCR in-process")
+            futures = None
+        pages: List[List[str]] = []
+        for i, a in enumerate(args):
+            try:
+                pages.append(futures[i].result() if futures is not None else _ocr_pdf_page(*a))
+            except Exception as e:
+                print(f"OCR failed on page {i + 1}: {e}")
+                pages.append([])
+        return pages
 
     def extract_tables_from_pdf_images(self, file_path: Path) -> List[str]:
         """Extract table-like markdown lines from PDF images using OCR; returns list of markdown tables as strings."""
-        images = self._render_pdf_pages_to_images(file_path)
-        if not images:
-            return []
         markdowns: List[str] = []
-        for img in images:
-            # Try full page and cropped-below-anchor variants
-            variants = [img]
-            cropped = self._crop_below_anchor(img)
-            if cropped is not None:
-                variants.append(cropped)
-            lines: List[str] = []
-            for v in variants:
-                lines = self._ocr_lines_with_gaps(v)
-                if lines:
-                    break
+        for lines in self._ocr_pdf_pages(file_path):
             if not lines:
                 continue
             # Try to detect header line and assemble a simple markdown table
@@ -980,6 +1047,8 @@ async def main():
             if result.error:
                 print(f"    Error: {result.error}")
     
+    extractor.close()
+
     # Save results
     excel_file = extractor.save_results_to_excel(results)
     print(f"\nResults saved to: {excel_file}")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Summarize extraction traces: count, p50, p95 and max seconds, errors and LLM
+tokens per pipeline stage across a batch.
+
+Input (any of):
+- a span JSONL file (EXTRACTION_TRACE_JSONL, or sow_data_extractor_cli.py --trace)
+- an event log (EXTRACTION_EVENT_LOG)
+- an OTLP/JSON trace (EXTRACTION_TRACE_OTLP)
+
+Usage:
+  python scripts/extraction/trace_summary.py outputs/traces/extraction.jsonl
+  python scripts/extraction/trace_summary.py trace.jsonl --otlp trace.otlp.json
+  python scripts/extraction/trace_summary.py trace.jsonl --json
+"""
+
+from __future__ import annotations
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parents[2] / "streamlit_app" / "services"))
+
+from extraction_tracing import load_spans, summarize, format_summary, write_otlp  # type: ignore
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-stage latency summary of extraction traces")
+    parser.add_argument("paths", nargs="+", help="Span JSONL, event log or OTLP/JSON files")
+    parser.add_argument("--json", dest="as_json", action="store_true", help="Print the summary as JSON")
+    parser.add_argument("--otlp", type=str, default="", help="Also convert the spans to an OTLP/JSON trace file")
+    args = parser.parse_args()
+
+    spans = []
+    for path in args.paths:
+        if not Path(path).exists():
+            print(f"❌ Trace file not found: {path}")
+            return 1
+        spans.extend(load_spans(path))
+    if not spans:
+        print("No spans found")
+        return 1
+
+    summary = summarize(spans)
+    if args.as_json:
+        print(json.dumps(summary, indent=2))
+    else:
+        documents = summary.get("document", {}).get("count", 0)
+        print(f"{len(spans)} spans across {documents} documents\n")
+        print(format_summary(summary))
+    if args.otlp:
+        print(f"\nOTLP trace written to {write_otlp(spans, args.otlp)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
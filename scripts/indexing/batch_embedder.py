@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Batch Embedder
+==============
+
+Packs many texts (across documents) into multi-input Azure OpenAI embedding
+requests, up to the deployment's per-request input and token limits, and
+runs a bounded number of requests concurrently over one HTTP session.
+
+Used by the index population scripts instead of one request per text.
+Texts already in the shared embedding store (streamlit_app/services/
+embedding_store.py) are served from it, and new vectors are added to it, so
+re-indexing never pays for the same embedding twice.
+
+Configuration (optional env vars):
+- EMBED_BATCH_MAX_INPUTS: texts per request (default 64)
+- EMBED_BATCH_MAX_TOKENS: estimated tokens per request (default 100000)
+- EMBED_MAX_INPUT_TOKENS: per-text limit; longer texts are truncated (default 8191)
+- EMBED_MAX_CONCURRENCY: requests in flight (default 4)
+"""
+
+import os
+import sys
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+# The embedding store lives with the app services
+sys.path.append(str(Path(__file__).parents[2] / "streamlit_app" / "services"))
+try:
+    from embedding_store import get_embedding_store  # type: ignore
+except Exception:
+    get_embedding_store = None
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count (exact with tiktoken, otherwise a conservative ~3 chars/token estimate)"""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 3 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if _ENCODING is not None:
+        return _ENCODING.decode(_ENCODING.encode(text, disallowed_special=())[:max_tokens])
+    return text[:max_tokens * 3]
+
+
+class BatchEmbedder:
+    """Multi-input embedding client; use as `async with BatchEmbedder(...) as embedder:`"""
+
+    def __init__(
+        self,
+        endpoint: str,
+        api_key: str,
+        deployment: str,
+        api_version: str = "2024-08-01-preview",
+        max_inputs: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        max_input_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: int = 5,
+        store=None,
+    ):
+        self.url = f"{endpoint.rstrip('/')}/openai/deployments/{deployment}/embeddings?api-version={api_version}"
+        self.headers = {'api-key': api_key, 'Content-Type': 'application/json'}
+        self.max_inputs = max_inputs or int(os.getenv("EMBED_BATCH_MAX_INPUTS", "64"))
+        self.max_tokens = max_tokens or int(os.getenv("EMBED_BATCH_MAX_TOKENS", "100000"))
+        self.max_input_tokens = max_input_tokens or int(os.getenv("EMBED_MAX_INPUT_TOKENS", "8191"))
+        self.max_concurrency = max_concurrency or int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+        self.max_retries = max_retries
+        self.deployment = deployment
+        self.store = store if store is not None else (get_embedding_store() if get_embedding_store else None)
+        self.requests_made = 0
+        self.store_hits = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "BatchEmbedder":
+        self._session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _pack(self, texts: List[str]) -> List[List[int]]:
+        """Group text indexes into batches within the input-count and token budgets"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (len(current) >= self.max_inputs or current_tokens + tokens > self.max_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed texts; returns one vector per input (None for empty or failed texts)"""
+        if self._session is None:
+            raise RuntimeError("BatchEmbedder must be used as an async context manager")
+
+        # Identical texts are embedded once
+        unique: Dict[str, int] = {}
+        for text in texts:
+            if text and text.strip() and text not in unique:
+                unique[text] = len(unique)
+        unique_texts = [truncate_to_tokens(t, self.max_input_tokens) for t in unique]
+        vectors: List[Optional[List[float]]] = [None] * len(unique_texts)
+        if self.store is not None and unique_texts:
+            vectors = self.store.get_many(self.deployment, unique_texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.store_hits += len(unique_texts) - len(missing)
+
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def run_batch(indexes: List[int]) -> None:
+            async with semaphore:
+                result, rejected = await self._request([unique_texts[i] for i in indexes])
+            if result is None and rejected and len(indexes) > 1:
+                # The service rejected the request: isolate the bad input by splitting the batch
+                mid = len(indexes) // 2
+                await asyncio.gather(run_batch(indexes[:mid]), run_batch(indexes[mid:]))
+                return
+            for i, vector in zip(indexes, result or [None] * len(indexes)):
+                vectors[i] = vector
+
+        batches = [[missing[i] for i in batch] for batch in self._pack([unique_texts[i] for i in missing])]
+        await asyncio.gather(*(run_batch(b) for b in batches))
+        if self.store is not None and missing:
+            self.store.put_many(self.deployment, [unique_texts[i] for i in missing], [vectors[i] for i in missing])
+        return [vectors[unique[t]] if t in unique else None for t in texts]
+
+    async def _request(self, inputs: List[str]) -> Tuple[Optional[List[List[float]]], bool]:
+        """One embeddings request with retry on throttling/transient errors.
+
+        Returns (vectors or None, rejected) where `rejected` marks a non-retryable
+        4xx response (e.g. one invalid input) as opposed to exhausted retries.
+        """
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.requests_made += 1
+                async with self._session.post(self.url, headers=self.headers, json={'input': inputs}) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        data = sorted(result['data'], key=lambda d: d['index'])
+                        return [d['embedding'] for d in data], False
+                    error_text = await response.text()
+                    if response.status in (429, 500, 502, 503, 504) and attempt < self.max_retries:
+                        try:
+                            wait = float(response.headers.get('retry-after') or delay)
+                        except ValueError:
+                            wait = delay
+                        await asyncio.sleep(wait)
+                        delay = min(delay * 2, 30.0)
+                        continue
+                    print(f"❌ Error getting embeddings ({len(inputs)} inputs): {response.status} - {error_text[:300]}")
+                    return None, 400 <= response.status < 500 and response.status != 429
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < self.max_retries:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+                    continue
+                print(f"❌ Error getting embeddings: {e}")
+                return None, False
+        return None, False
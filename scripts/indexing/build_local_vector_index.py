@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Build Local Vector Index
+========================
+
+Builds the snapshot served by LocalVectorSearchService (SEARCH_BACKEND=local):
+the same documents and four vector fields as octagon-sows-hybrid, built from
+the 'parsed' and 'extracted' containers.
+
+Embeddings come from the shared embedding store, so after a hybrid index
+population this costs no embedding calls; only texts never embedded before
+are sent to Azure OpenAI.
+
+Usage:
+    python build_local_vector_index.py [--output DIR]
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from batch_embedder import BatchEmbedder
+from populate_hybrid_index import EMBEDDING_FIELDS, HybridIndexPopulator
+
+# The local search engine lives with the app services
+sys.path.append(str(Path(__file__).parents[2] / "streamlit_app" / "services"))
+from local_vector_search_service import LocalVectorIndex  # type: ignore
+
+
+async def build_snapshot(output_dir: Path) -> bool:
+    populator = HybridIndexPopulator()
+    await populator.initialize_clients()
+
+    file_pairs = await populator.get_file_pairs()
+    if not file_pairs:
+        print("❌ No matching file pairs found to process")
+        return False
+
+    download_slots = asyncio.Semaphore(int(os.getenv("INDEX_DOWNLOAD_CONCURRENCY", "8")))
+    downloaded = await asyncio.gather(*(populator.download_pair(pair, download_slots) for pair in file_pairs))
+    pending = []
+    for pair, json_data, raw_content in downloaded:
+        if not json_data or not raw_content:
+            print(f"    ❌ Failed to download files for {pair['base_name']}")
+            continue
+        pending.append((json_data, raw_content, populator.build_embedding_texts(json_data, raw_content)))
+
+    all_texts = [texts[field] for _, _, texts in pending for field in EMBEDDING_FIELDS]
+    async with BatchEmbedder(populator.openai_endpoint, populator.openai_api_key, populator.openai_deployment) as embedder:
+        vectors = await embedder.embed_many(all_texts)
+        print(f"🔄 {len(all_texts)} embeddings: {embedder.store_hits} from the embedding store, "
+              f"{embedder.requests_made} requests")
+
+    documents = []
+    field_vectors = {field: [] for field in EMBEDDING_FIELDS}
+    for i, (json_data, raw_content, _) in enumerate(pending):
+        offset = i * len(EMBEDDING_FIELDS)
+        embeddings = dict(zip(EMBEDDING_FIELDS, vectors[offset:offset + len(EMBEDDING_FIELDS)]))
+        if not all(embeddings.values()):
+            print(f"    ❌ Failed to generate embeddings for {json_data.get('file_name', 'Unknown')}")
+            continue
+        document = populator.prepare_document_for_hybrid_index(json_data, raw_content, embeddings)
+        for field in EMBEDDING_FIELDS:
+            field_vectors[field].append(document.pop(f"{field}_vector"))
+        # Structured staffing ships with the snapshot, so results need no blob hydration
+        if isinstance(json_data.get('staffing_plan'), list):
+            document['staffing_plan_structured'] = json_data['staffing_plan']
+        documents.append(document)
+
+    if not documents:
+        print("❌ No documents to write")
+        return False
+
+    index = LocalVectorIndex(
+        documents,
+        {field: np.asarray(rows, dtype=np.float32) for field, rows in field_vectors.items()},
+        ann_min_docs=len(documents) + 1,  # the ANN index is built at load time, not stored
+    )
+    target = output_dir / populator.index_name
+    index.save(target)
+    print(f"✅ Wrote {len(documents)} documents to {target}")
+    return True
+
+
+async def main():
+    """Main function"""
+    default_dir = Path(os.getenv("LOCAL_VECTOR_INDEX_DIR") or Path(__file__).parents[2] / ".cache" / "local_index")
+    parser = argparse.ArgumentParser(description="Build the local vector search snapshot")
+    parser.add_argument("--output", type=Path, default=default_dir, help=f"Snapshot directory (default {default_dir})")
+    args = parser.parse_args()
+
+    print("🚀 Local Vector Index Build")
+    print("=" * 50)
+    try:
+        if not await build_snapshot(args.output):
+            print("\n❌ Local vector index build failed")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
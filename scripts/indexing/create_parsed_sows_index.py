@@ -3,18 +3,30 @@
 Script to create and populate a new Azure Search index for parsed SOW JSON data.
 This script reads parsed JSON files from the Azure Storage 'parsed' container
 and creates a searchable index with structured SOW data.
+
+Population is incremental: only parsed files that changed since the last
+successful run are downloaded and uploaded, and documents whose parsed files
+were removed are deleted from the index (see index_sync.py). Recreating the
+index re-populates everything.
+
+Document ids derive from the parsed blob name. A run without a sync manifest
+(the first one, or after the manifest was deleted) also deletes documents
+whose ids match no parsed blob, such as copies uploaded under older ids.
 """
 
 import os
 import json
 import asyncio
-import uuid
 from pathlib import Path
 from dotenv import load_dotenv
 import requests
 from azure.storage.blob.aio import BlobServiceClient
 from azure.identity.aio import DefaultAzureCredential
 
+from index_sync import (
+    IndexSyncManifest, PendingDocument, find_untracked_documents, index_document_id, post_index_actions, prepare_full_sync,
+)
+
 class ParsedSOWsIndexManager:
     """Manages the creation and population of Azure Search index for parsed SOW data"""
     
@@ -23,6 +35,8 @@ class ParsedSOWsIndexManager:
         self.search_key = None
         self.storage_account_url = None
         self.index_name = "octagon-sows-parsed"
+        self.blob_service_client = None
+        self.manifest = IndexSyncManifest(self.index_name)
         
     def load_environment(self):
         """Load environment variables from .env file"""
@@ -222,37 +236,39 @@ class ParsedSOWsIndexManager:
             print(f"❌ Error deleting index: {e}")
             return False
     
+    def _get_blob_service_client(self):
+        """One credential and storage client for the whole run"""
+        if self.blob_service_client is None:
+            credential = DefaultAzureCredential()
+            self.blob_service_client = BlobServiceClient(account_url=self.storage_account_url, credential=credential)
+        return self.blob_service_client
+    
     async def get_parsed_json_files(self):
-        """Get all parsed JSON files from Azure Storage"""
+        """Get all parsed JSON files from Azure Storage, as {blob name: ETag/last-modified} (None if the listing failed)"""
         if not self.storage_account_url:
             print("❌ AZURE_STORAGE_ACCOUNT_URL not found - cannot access parsed files")
-            return []
+            return None
         
         try:
-            credential = DefaultAzureCredential()
-            blob_service_client = BlobServiceClient(account_url=self.storage_account_url, credential=credential)
+            container_client = self._get_blob_service_client().get_container_client("parsed")
             
-            container_client = blob_service_client.get_container_client("parsed")
-            
-            json_files = []
+            json_files = {}
             async for blob in container_client.list_blobs():
                 if blob.name.endswith('.json'):
-                    json_files.append(blob.name)
+                    json_files[blob.name] = IndexSyncManifest.blob_version(blob)
             
             print(f"📄 Found {len(json_files)} JSON files in parsed container")
             return json_files
             
         except Exception as e:
+            # Never read a failed listing as an empty container: the sync would delete every document
             print(f"❌ Error accessing Azure Storage: {e}")
-            return []
+            return None
     
     async def download_json_file(self, blob_name):
         """Download and parse a JSON file from Azure Storage"""
         try:
-            credential = DefaultAzureCredential()
-            blob_service_client = BlobServiceClient(account_url=self.storage_account_url, credential=credential)
-            
-            blob_client = blob_service_client.get_blob_client(
+            blob_client = self._get_blob_service_client().get_blob_client(
                 container="parsed",
                 blob=blob_name
             )
@@ -267,14 +283,12 @@ class ParsedSOWsIndexManager:
             print(f"❌ Error downloading {blob_name}: {e}")
             return None
     
-    def prepare_document_for_index(self, json_data):
+    def prepare_document_for_index(self, json_data, blob_name):
         """Prepare a JSON document for indexing in Azure Search"""
-        # Create a unique ID
-        doc_id = str(uuid.uuid4())
-        
-        # Prepare the document
+        # Id from the source blob name (unique in the container), so re-populations
+        # overwrite and deletes can target the same document
         document = {
-            "id": doc_id,
+            "id": index_document_id(blob_name),
             "client_name": json_data.get("client_name") or "",
             "project_title": json_data.get("project_title", ""),
             "start_date": json_data.get("start_date") or "",
@@ -307,72 +321,66 @@ class ParsedSOWsIndexManager:
         """Upload documents to Azure Search index"""
         print(f"📤 Uploading {len(documents)} documents to index...")
         
-        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/index?api-version=2023-11-01"
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'api-key': self.search_key
-        }
-        
-        # Azure Search accepts up to 1000 documents per batch
-        batch_size = 1000
-        uploaded_count = 0
-        
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            
-            payload = {
-                "value": batch
-            }
-            
-            try:
-                response = requests.post(url, headers=headers, json=payload)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    batch_uploaded = len([d for d in result.get('value', []) if d.get('status')])
-                    uploaded_count += batch_uploaded
-                    print(f"  ✅ Uploaded batch {i//batch_size + 1}: {batch_uploaded}/{len(batch)} documents")
-                else:
-                    print(f"  ❌ Error uploading batch {i//batch_size + 1}: {response.status_code} - {response.text}")
-                    
-            except Exception as e:
-                print(f"  ❌ Error uploading batch {i//batch_size + 1}: {e}")
+        actions = [{"@search.action": "upload", **doc} for doc in documents]
+        uploaded_count = len(post_index_actions(self.search_endpoint, self.search_key, self.index_name, actions))
         
         print(f"📊 Total documents uploaded: {uploaded_count}/{len(documents)}")
         return uploaded_count
     
-    async def populate_index(self):
-        """Populate the index with data from parsed JSON files"""
+    async def populate_index(self, full=None):
+        """Populate the index with data from parsed JSON files (incrementally unless full)"""
         print("📥 Populating index with parsed JSON data...")
+        full = prepare_full_sync(self.manifest, self.search_endpoint, self.search_key, full)
         
         # Get list of JSON files
         json_files = await self.get_parsed_json_files()
-        if not json_files:
+        if json_files is None:
+            return False
+        if not json_files and not self.manifest.entries:
             print("❌ No JSON files found to process")
             return False
         
-        # Download and process each file
+        plan = self.manifest.plan({name: {name: version} for name, version in json_files.items()}, full=full)
+        if not self.manifest.entries:
+            # Nothing tracked yet: documents indexed under other ids would stay next to the new uploads
+            orphaned = find_untracked_documents(self.manifest, self.search_endpoint, self.search_key,
+                                                {index_document_id(name) for name in json_files})
+            if orphaned is None:
+                return False
+            plan.orphaned = orphaned
+        print(f"🧮 Sync plan: {plan.summary()}")
+        if not self.manifest.deletes_allowed(plan, full):
+            return False
+        
+        # Download and process each new or changed file
         documents = []
-        for i, blob_name in enumerate(json_files, 1):
-            print(f"  📄 Processing {i}/{len(json_files)}: {blob_name}")
+        for i, blob_name in enumerate(plan.changed, 1):
+            print(f"  📄 Processing {i}/{len(plan.changed)}: {blob_name}")
             
             json_data = await self.download_json_file(blob_name)
             if json_data:
-                document = self.prepare_document_for_index(json_data)
-                documents.append(document)
+                blobs = {blob_name: json_files[blob_name]}
+                content_sha256 = IndexSyncManifest.content_hash(json_data)
+                if not full and self.manifest.content_unchanged(blob_name, content_sha256):
+                    self.manifest.touch(blob_name, blobs)
+                    continue
+                document = self.prepare_document_for_index(json_data, blob_name)
+                documents.append(PendingDocument(blob_name, blobs, content_sha256, document))
                 print(f"    ✅ Processed: {json_data.get('client_name', 'Unknown')} - {json_data.get('project_title', 'Unknown')}")
             else:
                 print(f"    ❌ Failed to process {blob_name}")
         
-        if documents:
-            # Upload documents to index
-            uploaded_count = self.upload_documents(documents)
-            print(f"✅ Successfully populated index with {uploaded_count} documents")
+        # Upload changed documents and delete removed ones in the same batches
+        actions = self.manifest.build_actions(plan, documents, upload_action="upload")
+        if not actions:
+            self.manifest.save()
+            print("✅ Index is up to date")
             return True
-        else:
-            print("❌ No documents to upload")
-            return False
+        print(f"📤 Sending {len(actions)} index actions ({len(documents)} uploads, {len(actions) - len(documents)} deletes)...")
+        acknowledged = post_index_actions(self.search_endpoint, self.search_key, self.index_name, actions)
+        failed = self.manifest.apply_results(plan, documents, acknowledged)
+        print(f"✅ Synced index: {len(acknowledged)}/{len(actions)} actions applied")
+        return failed == 0
     
     async def run(self, recreate_index=False):
         """Main execution method"""
@@ -382,9 +390,10 @@ class ParsedSOWsIndexManager:
         # Load environment
         self.load_environment()
         
-        # Delete existing index if requested
+        # Delete existing index if requested (its documents, and so the sync manifest, are gone)
         if recreate_index:
             self.delete_index()
+            self.manifest.entries.clear()
         
         # Create index
         if not self.create_index():
@@ -392,7 +401,7 @@ class ParsedSOWsIndexManager:
             return False
         
         # Populate index
-        if not await self.populate_index():
+        if not await self.populate_index(full=True if recreate_index else None):
             print("❌ Failed to populate index")
             return False
         
@@ -405,7 +414,7 @@ async def main():
     
     # Ask user if they want to recreate the index
     print("Options:")
-    print("1. Create new index (will fail if index already exists)")
+    print("1. Create index if missing and sync changed documents")
     print("2. Recreate index (delete existing and create new)")
     
     choice = input("Enter your choice (1 or 2): ").strip()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Index Sync
+==========
+
+Incremental sync support for the index population scripts.
+
+A local manifest per index records, for each source document, the ETag and
+last-modified time of the blobs it was built from, a hash of its content and
+the search document id it was uploaded as. On the next run:
+- documents whose blobs are unchanged are skipped without downloading
+- documents whose blobs changed are downloaded; if the content hash still
+  matches they are not re-embedded or re-uploaded
+- documents whose blobs disappeared are removed with `delete` actions
+
+A failed storage listing aborts the run instead of reading as an empty
+container, and an incremental run refuses to delete more than a share of
+the manifest at once (a full run is not limited).
+
+Manifest entries are only written for actions the search service
+acknowledged, so a failed upload is retried on the next run. If the index is
+empty (e.g. it was just recreated) everything is re-populated. A script that
+derives document ids from source keys (`index_document_id`) can also clean
+up documents no manifest entry accounts for, e.g. ones indexed before the
+manifest existed (`find_untracked_documents`).
+
+Configuration (optional env vars):
+- INDEX_MANIFEST_DIR: manifest location (default <project root>/.cache/index_manifests)
+- INDEX_SYNC_MODE: "incremental" (default) or "full"
+- INDEX_SYNC_MAX_DELETE_FRACTION: largest share of the manifest an incremental run may delete (default 0.5)
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import requests
+
+SEARCH_API_VERSION = "2023-11-01"
+
+
+@dataclass
+class SyncPlan:
+    """What to do with each source document on this run"""
+    changed: List[str] = field(default_factory=list)  # new or modified source keys
+    unchanged: List[str] = field(default_factory=list)
+    deleted: Dict[str, str] = field(default_factory=dict)  # source key -> search document id
+    orphaned: List[str] = field(default_factory=list)  # index ids no source or manifest entry accounts for
+
+    def summary(self) -> str:
+        summary = f"{len(self.changed)} new/changed, {len(self.unchanged)} unchanged, {len(self.deleted)} removed"
+        if self.orphaned:
+            summary += f", {len(self.orphaned)} untracked in index"
+        return summary
+
+
+@dataclass
+class PendingDocument:
+    """A search document about to be uploaded, with the source state it was built from"""
+    key: str
+    blobs: Dict[str, Dict[str, str]]
+    content_sha256: str
+    document: Dict[str, Any]
+
+
+class IndexSyncManifest:
+    """Per-index record of which blob versions each search document was built from"""
+
+    def __init__(self, index_name: str, path: Optional[Path] = None):
+        self.index_name = index_name
+        default_dir = Path(os.getenv("INDEX_MANIFEST_DIR") or Path(__file__).parents[2] / ".cache" / "index_manifests")
+        self.path = Path(path or default_dir / f"{index_name}.json")
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            self.entries = payload.get("documents", {}) if payload.get("index") == self.index_name else {}
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self) -> None:
+        """Write the manifest atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"index": self.index_name, "updated_at": time.time(), "documents": self.entries}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def blob_version(blob) -> Dict[str, str]:
+        """Version info for a listed blob (BlobProperties)"""
+        last_modified = getattr(blob, "last_modified", None)
+        return {
+            "etag": str(getattr(blob, "etag", "") or ""),
+            "last_modified": last_modified.isoformat() if last_modified else "",
+        }
+
+    @staticmethod
+    def content_hash(*parts: Any) -> str:
+        """Stable SHA-256 over JSON-serializable content"""
+        material = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def plan(self, current: Dict[str, Dict[str, Dict[str, str]]], full: bool = False) -> SyncPlan:
+        """Compare the current listing ({source key: {blob name: version}}) with the manifest"""
+        plan = SyncPlan()
+        for key, blobs in current.items():
+            entry = self.entries.get(key)
+            if not full and entry is not None and entry.get("blobs") == blobs:
+                plan.unchanged.append(key)
+            else:
+                plan.changed.append(key)
+        for key, entry in self.entries.items():
+            if key not in current and entry.get("doc_id"):
+                plan.deleted[key] = entry["doc_id"]
+        return plan
+
+    def deletes_allowed(self, plan: SyncPlan, full: bool = False) -> bool:
+        """Whether the plan's deletes are plausible (a full run may delete anything)"""
+        if full or not plan.deleted:
+            return True
+        max_fraction = float(os.getenv("INDEX_SYNC_MAX_DELETE_FRACTION", "0.5"))
+        if len(plan.deleted) <= max_fraction * len(self.entries):
+            return True
+        print(f"❌ Refusing to delete {len(plan.deleted)} of {len(self.entries)} documents from {self.index_name} "
+              f"(more than {max_fraction:.0%}); re-run with --full if the sources were really removed")
+        return False
+
+    def content_unchanged(self, key: str, content_hash: str) -> bool:
+        entry = self.entries.get(key)
+        return entry is not None and entry.get("content_sha256") == content_hash
+
+    def doc_id(self, key: str) -> Optional[str]:
+        return (self.entries.get(key) or {}).get("doc_id")
+
+    def record(self, key: str, blobs: Dict[str, Dict[str, str]], content_hash: str, doc_id: str) -> None:
+        self.entries[key] = {"blobs": blobs, "content_sha256": content_hash, "doc_id": doc_id, "synced_at": time.time()}
+
+    def touch(self, key: str, blobs: Dict[str, Dict[str, str]]) -> None:
+        """Blobs were re-written with the same content: remember the new versions only"""
+        if key in self.entries:
+            self.entries[key]["blobs"] = blobs
+
+    def forget(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def build_actions(self, plan: SyncPlan, pending: List[PendingDocument], upload_action: str = "mergeOrUpload") -> List[Dict[str, Any]]:
+        """Upload actions for pending documents plus deletes for removed sources and renamed ids"""
+        upload_ids = {p.document["id"] for p in pending}
+        stale_ids = set(plan.deleted.values()) | set(plan.orphaned)
+        for p in pending:
+            previous_id = self.doc_id(p.key)
+            if previous_id and previous_id != p.document["id"]:
+                stale_ids.add(previous_id)
+        # Never delete an id that this run (re-)uploads
+        stale_ids -= upload_ids
+        actions = [{"@search.action": upload_action, **p.document} for p in pending]
+        actions.extend({"@search.action": "delete", "id": doc_id} for doc_id in sorted(stale_ids))
+        return actions
+
+    def apply_results(self, plan: SyncPlan, pending: List[PendingDocument], acknowledged: Set[str]) -> int:
+        """Record acknowledged actions and save; returns the number of actions that failed"""
+        failed = 0
+        upload_ids = {p.document["id"] for p in pending}
+        for p in pending:
+            if p.document["id"] in acknowledged:
+                self.record(p.key, p.blobs, p.content_sha256, p.document["id"])
+            else:
+                failed += 1
+        for key, doc_id in plan.deleted.items():
+            if doc_id in acknowledged or doc_id in upload_ids:
+                self.forget(key)
+            else:
+                failed += 1
+        failed += sum(1 for doc_id in plan.orphaned if doc_id not in acknowledged and doc_id not in upload_ids)
+        self.save()
+        return failed
+
+
+def index_document_id(source_key: str) -> str:
+    """Search document id for a source blob: its name without extension, restricted to key-safe characters.
+
+    Names that needed characters replaced get a short hash of the original
+    name appended, so two blobs never map to the same id.
+    """
+    stem = re.sub(r"\.[A-Za-z0-9]+$", "", source_key)
+    doc_id = re.sub(r"[^A-Za-z0-9_\-=]", "_", stem)
+    if doc_id != stem:
+        doc_id += "-" + hashlib.sha256(source_key.encode("utf-8")).hexdigest()[:12]
+    return doc_id
+
+
+def resolve_full_sync(full: Optional[bool] = None) -> bool:
+    """Explicit flag wins; otherwise INDEX_SYNC_MODE decides"""
+    if full is not None:
+        return full
+    return os.getenv("INDEX_SYNC_MODE", "incremental").strip().lower() == "full"
+
+
+def prepare_full_sync(manifest: IndexSyncManifest, search_endpoint: str, search_key: str,
+                      full: Optional[bool] = None) -> bool:
+    """Decide whether this run re-processes everything (requested, or the index was emptied)"""
+    if resolve_full_sync(full):
+        print("🔁 Full sync requested: re-processing every document")
+        return True
+    if manifest.entries and index_document_count(search_endpoint, search_key, manifest.index_name) == 0:
+        print(f"🔁 {manifest.index_name} is empty but the sync manifest is not: re-processing every document")
+        return True
+    return False
+
+
+def index_document_count(search_endpoint: str, search_key: str, index_name: str) -> Optional[int]:
+    """Number of documents in the index, or None if it cannot be determined"""
+    url = f"{search_endpoint}/indexes/{index_name}/docs/$count?api-version={SEARCH_API_VERSION}"
+    try:
+        response = requests.get(url, headers={'api-key': search_key}, timeout=30)
+        if response.status_code == 200:
+            return int(response.text.strip().lstrip('\ufeff'))
+        print(f"⚠️ Could not count documents in {index_name}: {response.status_code}")
+    except Exception as e:
+        print(f"⚠️ Could not count documents in {index_name}: {e}")
+    return None
+
+
+def list_index_ids(search_endpoint: str, search_key: str, index_name: str, page_size: int = 1000) -> Optional[Set[str]]:
+    """Ids of every document in the index, or None if the listing failed"""
+    url = f"{search_endpoint}/indexes/{index_name}/docs/search?api-version={SEARCH_API_VERSION}"
+    headers = {
+        'Content-Type': 'application/json',
+        'api-key': search_key
+    }
+    ids: Set[str] = set()
+    skip = 0
+    while True:
+        payload = {"search": "*", "select": "id", "orderby": "id asc", "top": page_size, "skip": skip}
+        try:
+            response = requests.post(url, headers=headers, json=payload, timeout=60)
+        except Exception as e:
+            print(f"❌ Could not list documents in {index_name}: {e}")
+            return None
+        if response.status_code != 200:
+            print(f"❌ Could not list documents in {index_name}: {response.status_code} - {response.text}")
+            return None
+        page = response.json().get("value", [])
+        ids.update(doc["id"] for doc in page if doc.get("id"))
+        if len(page) < page_size:
+            return ids
+        skip += page_size
+
+
+def find_untracked_documents(manifest: IndexSyncManifest, search_endpoint: str, search_key: str,
+                             expected_ids: Set[str]) -> Optional[List[str]]:
+    """Index ids that neither the manifest nor this run's sources (`expected_ids`) account for.
+
+    Returns None if the index cannot be listed, so callers abort rather than
+    upload next to documents they cannot see.
+    """
+    index_ids = list_index_ids(search_endpoint, search_key, manifest.index_name)
+    if index_ids is None:
+        return None
+    tracked = {entry.get("doc_id") for entry in manifest.entries.values()} | set(expected_ids)
+    return sorted(index_ids - tracked)
+
+
+def post_index_actions(search_endpoint: str, search_key: str, index_name: str,
+                       actions: Iterable[Dict[str, Any]], batch_size: int = 1000) -> Set[str]:
+    """Send index actions (upload/mergeOrUpload/delete) in batches; returns the acknowledged document ids"""
+    url = f"{search_endpoint}/indexes/{index_name}/docs/index?api-version={SEARCH_API_VERSION}"
+    headers = {
+        'Content-Type': 'application/json',
+        'api-key': search_key
+    }
+    actions = list(actions)
+    succeeded: Set[str] = set()
+
+    # Azure Search accepts up to 1000 documents per batch
+    for i in range(0, len(actions), batch_size):
+        batch = actions[i:i + batch_size]
+        try:
+            response = requests.post(url, headers=headers, json={"value": batch})
+            # 207: some actions in the batch failed; the per-document status says which
+            if response.status_code in (200, 207):
+                batch_ok = {d.get('key') for d in response.json().get('value', []) if d.get('status')}
+                succeeded |= batch_ok
+                print(f"  ✅ Indexed batch {i//batch_size + 1}: {len(batch_ok)}/{len(batch)} actions")
+            else:
+                print(f"  ❌ Error indexing batch {i//batch_size + 1}: {response.status_code} - {response.text}")
+        except Exception as e:
+            print(f"  ❌ Error indexing batch {i//batch_size + 1}: {e}")
+    return succeeded
@@ -7,17 +7,28 @@ This script populates the hybrid index with both:
 - Full text extractions from the 'extracted' container
 - Parsed JSON data from the 'parsed' container
 - Multiple vector embeddings for comprehensive search
+
+Runs are incremental by default: only documents whose blobs changed since the
+last successful run are downloaded, embedded and uploaded, and documents whose
+blobs were removed are deleted from the index (see index_sync.py). Pass --full
+(or set INDEX_SYNC_MODE=full) to re-process everything.
 """
 
 import os
 import json
 import asyncio
-import requests
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 from azure.storage.blob.aio import BlobServiceClient
 from azure.identity.aio import DefaultAzureCredential
 
+from batch_embedder import BatchEmbedder
+from index_sync import IndexSyncManifest, PendingDocument, post_index_actions, prepare_full_sync
+
+# Embedding fields per document, in the order their texts are built
+EMBEDDING_FIELDS = ['full_text', 'parsed_content', 'scope', 'deliverables']
+
 
 class HybridIndexPopulator:
     """Populates the hybrid vector index with both full text and parsed data"""
@@ -32,6 +43,7 @@ class HybridIndexPopulator:
         self.blob_service_client = None
         self.index_name = "octagon-sows-hybrid"
         self._load_environment()
+        self.manifest = IndexSyncManifest(self.index_name)
     
     def _load_environment(self):
         """Load environment variables"""
@@ -92,22 +104,22 @@ class HybridIndexPopulator:
             return None
     
     async def get_file_pairs(self):
-        """Get matching pairs of parsed JSON and extracted text files"""
+        """Get matching pairs of parsed JSON and extracted text files (None if the listing failed)"""
         try:
             parsed_container = self.blob_service_client.get_container_client("parsed")
             extracted_container = self.blob_service_client.get_container_client("extracted")
             
-            # Get all parsed JSON files
-            parsed_files = []
+            # Get all parsed JSON files (with ETag/last-modified for incremental sync)
+            parsed_files = {}
             async for blob in parsed_container.list_blobs():
                 if blob.name.endswith('.json'):
-                    parsed_files.append(blob.name)
+                    parsed_files[blob.name] = IndexSyncManifest.blob_version(blob)
             
             # Get all extracted text files
-            extracted_files = []
+            extracted_files = {}
             async for blob in extracted_container.list_blobs():
                 if blob.name.endswith('.txt'):
-                    extracted_files.append(blob.name)
+                    extracted_files[blob.name] = IndexSyncManifest.blob_version(blob)
             
             # Match files by base name
             file_pairs = []
@@ -119,7 +131,11 @@ class HybridIndexPopulator:
                     file_pairs.append({
                         'parsed_file': parsed_file,
                         'extracted_file': matching_txt,
-                        'base_name': base_name
+                        'base_name': base_name,
+                        'blobs': {
+                            parsed_file: parsed_files[parsed_file],
+                            matching_txt: extracted_files[matching_txt],
+                        }
                     })
                 else:
                     print(f"⚠️  No matching text file for {parsed_file}")
@@ -128,8 +144,9 @@ class HybridIndexPopulator:
             return file_pairs
             
         except Exception as e:
+            # Never read a failed listing as an empty container: the sync would delete every document
             print(f"❌ Error accessing Azure Storage: {e}")
-            return []
+            return None
     
     async def download_file(self, container_name, blob_name):
         """Download a file from Azure Storage"""
@@ -185,9 +202,15 @@ class HybridIndexPopulator:
         }
         
         # Handle staffing_plan - convert objects (minimal schema) to strings suitable for indexing
-        staffing_plan = json_data.get("staffing_plan", [])
+        document["staffing_plan"] = self._flatten_staffing_plan(json_data.get("staffing_plan", []))
+        
+        return document
+
+    @staticmethod
+    def _flatten_staffing_plan(staffing_plan):
+        """Staffing plan entries (minimal or legacy schema) as 'name — title — allocation' strings"""
         staffing_plan_strings = []
-        for person in staffing_plan:
+        for person in staffing_plan or []:
             if isinstance(person, dict):
                 # Support both old and new schemas
                 name = person.get("name") or "N/A"
@@ -195,7 +218,6 @@ class HybridIndexPopulator:
                 hrs_pct = person.get("hours_pct")
                 hrs = person.get("hours")
                 # Fallback to legacy 'allocation'
-                allocation = None
                 if hrs_pct is not None:
                     allocation = f"{hrs_pct:.1f}%"
                 elif hrs is not None:
@@ -207,140 +229,120 @@ class HybridIndexPopulator:
                 )
             else:
                 staffing_plan_strings.append(str(person))
+        return staffing_plan_strings
 
-        document["staffing_plan"] = staffing_plan_strings
-        
-        return document
+    def build_embedding_texts(self, json_data, raw_content):
+        """Texts to embed for one document, keyed by EMBEDDING_FIELDS"""
+        parsed_content_parts = [
+            json_data.get("client_name", ""),
+            json_data.get("project_title", ""),
+            json_data.get("scope_summary", ""),
+            " ".join(json_data.get("deliverables", [])),
+            # Use flattened staffing strings for better embedding
+            " ".join(self._flatten_staffing_plan(json_data.get("staffing_plan", []))),
+            " ".join(json_data.get("exclusions", []))
+        ]
+        return {
+            'full_text': raw_content,
+            'parsed_content': " ".join([part for part in parsed_content_parts if part]),
+            'scope': json_data.get("scope_summary", ""),
+            'deliverables': " ".join(json_data.get("deliverables", [])),
+        }
+
+    async def download_pair(self, pair, semaphore):
+        """Download the parsed JSON and extracted text for one file pair"""
+        async with semaphore:
+            json_data, raw_content = await asyncio.gather(
+                self.download_file("parsed", pair['parsed_file']),
+                self.download_file("extracted", pair['extracted_file']),
+            )
+        return pair, json_data, raw_content
     
     def upload_documents_to_index(self, documents):
         """Upload documents to the hybrid index"""
         print(f"📤 Uploading {len(documents)} documents to hybrid index...")
         
-        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/index?api-version=2023-11-01"
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'api-key': self.search_key
-        }
-        
-        # Azure Search accepts up to 1000 documents per batch
-        batch_size = 1000
-        uploaded_count = 0
-        
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            
-            # Use mergeOrUpload to upsert and avoid duplicates
-            payload = {"value": [{"@search.action": "mergeOrUpload", **doc} for doc in batch]}
-            
-            try:
-                response = requests.post(url, headers=headers, json=payload)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    batch_uploaded = len([d for d in result.get('value', []) if d.get('status')])
-                    uploaded_count += batch_uploaded
-                    print(f"  ✅ Uploaded batch {i//batch_size + 1}: {batch_uploaded}/{len(batch)} documents")
-                else:
-                    print(f"  ❌ Error uploading batch {i//batch_size + 1}: {response.status_code} - {response.text}")
-                    
-            except Exception as e:
-                print(f"  ❌ Error uploading batch {i//batch_size + 1}: {e}")
+        # Use mergeOrUpload to upsert and avoid duplicates
+        actions = [{"@search.action": "mergeOrUpload", **doc} for doc in documents]
+        uploaded_count = len(post_index_actions(self.search_endpoint, self.search_key, self.index_name, actions))
         
         print(f"📊 Total documents uploaded: {uploaded_count}/{len(documents)}")
         return uploaded_count
     
-    async def populate_index(self):
-        """Populate the hybrid index with both full text and parsed data"""
+    async def populate_index(self, full=None):
+        """Populate the hybrid index with both full text and parsed data (incrementally unless full)"""
         print("🚀 Starting hybrid index population...")
         
         # Initialize clients
         await self.initialize_clients()
+        full = prepare_full_sync(self.manifest, self.search_endpoint, self.search_key, full)
         
         # Get matching file pairs
         file_pairs = await self.get_file_pairs()
-        if not file_pairs:
+        if file_pairs is None:
+            return False
+        if not file_pairs and not self.manifest.entries:
             print("❌ No matching file pairs found to process")
             return False
         
-        # Process each file pair
-        documents = []
-        for i, pair in enumerate(file_pairs, 1):
-            print(f"  📄 Processing {i}/{len(file_pairs)}: {pair['base_name']}")
-            
-            # Download both files
-            json_data = await self.download_file("parsed", pair['parsed_file'])
-            raw_content = await self.download_file("extracted", pair['extracted_file'])
-            
+        plan = self.manifest.plan({pair['base_name']: pair['blobs'] for pair in file_pairs}, full=full)
+        print(f"🧮 Sync plan: {plan.summary()}")
+        if not self.manifest.deletes_allowed(plan, full):
+            return False
+        changed = set(plan.changed)
+        
+        # Download changed pairs concurrently
+        download_slots = asyncio.Semaphore(int(os.getenv("INDEX_DOWNLOAD_CONCURRENCY", "8")))
+        downloaded = await asyncio.gather(*(
+            self.download_pair(pair, download_slots) for pair in file_pairs if pair['base_name'] in changed
+        ))
+
+        pending = []
+        for pair, json_data, raw_content in downloaded:
             if not json_data or not raw_content:
                 print(f"    ❌ Failed to download files for {pair['base_name']}")
                 continue
-            
-            # Create content for different embeddings
-            # Flatten staffing strings here (mirror logic from prepare_document_for_hybrid_index)
-            staffing_plan = json_data.get("staffing_plan", [])
-            staffing_plan_strings = []
-            for person in staffing_plan:
-                if isinstance(person, dict):
-                    name = person.get("name") or "N/A"
-                    title = person.get("title") or person.get("role") or ""
-                    hrs_pct = person.get("hours_pct")
-                    hrs = person.get("hours")
-                    if hrs_pct is not None:
-                        allocation = f"{hrs_pct:.1f}%"
-                    elif hrs is not None:
-                        allocation = f"{hrs:.1f} hours"
-                    else:
-                        allocation = person.get("allocation") or ""
-                    staffing_plan_strings.append(" — ".join([p for p in [str(name), str(title), allocation] if p]))
-                else:
-                    staffing_plan_strings.append(str(person))
+            content_sha256 = IndexSyncManifest.content_hash(json_data, raw_content)
+            if not full and self.manifest.content_unchanged(pair['base_name'], content_sha256):
+                # Blobs were re-written with identical content: nothing to re-embed
+                self.manifest.touch(pair['base_name'], pair['blobs'])
+                continue
+            pending.append((pair, json_data, raw_content, self.build_embedding_texts(json_data, raw_content), content_sha256))
 
-            parsed_content_parts = [
-                json_data.get("client_name", ""),
-                json_data.get("project_title", ""),
-                json_data.get("scope_summary", ""),
-                " ".join(json_data.get("deliverables", [])),
-                # Use flattened staffing strings for better embedding
-                " ".join(staffing_plan_strings),
-                " ".join(json_data.get("exclusions", []))
-            ]
-            parsed_content_text = " ".join([part for part in parsed_content_parts if part])
-            
-            # Generate embeddings
-            print(f"    🔄 Generating embeddings...")
-            embeddings = {}
-            
-            # Full text embedding
-            embeddings['full_text'] = await self.get_embedding(raw_content)
-            
-            # Parsed content embedding
-            embeddings['parsed_content'] = await self.get_embedding(parsed_content_text)
-            
-            # Scope embedding
-            embeddings['scope'] = await self.get_embedding(json_data.get("scope_summary", ""))
-            
-            # Deliverables embedding
-            embeddings['deliverables'] = await self.get_embedding(" ".join(json_data.get("deliverables", [])))
-            
+        # Generate every embedding for every document in packed multi-input requests
+        all_texts = [texts[field] for _, _, _, texts, _ in pending for field in EMBEDDING_FIELDS]
+        vectors = []
+        if all_texts:
+            print(f"🔄 Generating {len(all_texts)} embeddings for {len(pending)} documents...")
+            async with BatchEmbedder(self.openai_endpoint, self.openai_api_key, self.openai_deployment) as embedder:
+                vectors = await embedder.embed_many(all_texts)
+                print(f"    ✅ Embeddings done in {embedder.requests_made} requests ({embedder.store_hits} texts from the embedding store)")
+
+        documents = []
+        for i, (pair, json_data, raw_content, _, content_sha256) in enumerate(pending):
+            offset = i * len(EMBEDDING_FIELDS)
+            embeddings = dict(zip(EMBEDDING_FIELDS, vectors[offset:offset + len(EMBEDDING_FIELDS)]))
             if not all(embeddings.values()):
                 print(f"    ❌ Failed to generate embeddings for {pair['base_name']}")
                 continue
             
             # Prepare document for index
             document = self.prepare_document_for_hybrid_index(json_data, raw_content, embeddings)
-            documents.append(document)
+            documents.append(PendingDocument(pair['base_name'], pair['blobs'], content_sha256, document))
             
             print(f"    ✅ Processed: {json_data.get('client_name', 'Unknown')} - {json_data.get('project_title', 'Unknown')}")
         
-        if documents:
-            # Upload documents to index
-            uploaded_count = self.upload_documents_to_index(documents)
-            print(f"✅ Successfully populated hybrid index with {uploaded_count} documents")
+        # Upsert changed documents and delete removed ones in the same batches
+        actions = self.manifest.build_actions(plan, documents)
+        if not actions:
+            self.manifest.save()
+            print("✅ Hybrid index is up to date")
             return True
-        else:
-            print("❌ No documents to upload")
-            return False
+        print(f"📤 Sending {len(actions)} index actions ({len(documents)} upserts, {len(actions) - len(documents)} deletes)...")
+        acknowledged = post_index_actions(self.search_endpoint, self.search_key, self.index_name, actions)
+        failed = self.manifest.apply_results(plan, documents, acknowledged)
+        print(f"✅ Synced hybrid index: {len(acknowledged)}/{len(actions)} actions applied")
+        return failed == 0
 
 
 async def main():
@@ -348,9 +350,14 @@ async def main():
     print("🚀 Hybrid Index Population")
     print("=" * 50)
     
+    parser = argparse.ArgumentParser(description="Populate the hybrid vector index")
+    parser.add_argument("--full", action="store_true", default=None,
+                        help="Re-process every document instead of only those that changed")
+    args = parser.parse_args()
+    
     try:
         populator = HybridIndexPopulator()
-        success = await populator.populate_index()
+        success = await populator.populate_index(full=args.full)
         
         if success:
             print("\n🎉 Hybrid index population completed successfully!")
@@ -7,18 +7,33 @@ This script:
 1. Downloads parsed SOW data from Azure Storage
 2. Generates vector embeddings using OpenAI
 3. Populates the vector-enabled search index
+
+Runs are incremental by default: only parsed files that changed since the last
+successful run are downloaded, embedded and uploaded, and documents whose
+parsed files were removed are deleted from the index (see index_sync.py).
+Pass --full (or set INDEX_SYNC_MODE=full) to re-process everything.
 """
 
 import os
+import sys
 import json
 import asyncio
-import requests
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 from azure.storage.blob.aio import BlobServiceClient
 from azure.identity.aio import DefaultAzureCredential
 # Using direct REST API instead of OpenAI client
 
+from index_sync import IndexSyncManifest, PendingDocument, post_index_actions, prepare_full_sync
+
+# The embedding store lives with the app services
+sys.path.append(str(Path(__file__).parents[2] / "streamlit_app" / "services"))
+try:
+    from embedding_store import get_embedding_store  # type: ignore
+except Exception:
+    get_embedding_store = None
+
 
 class VectorIndexPopulator:
     """Populates the vector index with embeddings"""
@@ -31,6 +46,8 @@ class VectorIndexPopulator:
         self.blob_service_client = None
         self.index_name = "octagon-sows-vector"
         self._load_environment()
+        self.manifest = IndexSyncManifest(self.index_name)
+        self.embedding_store = get_embedding_store() if get_embedding_store else None
     
     def _load_environment(self):
         """Load environment variables"""
@@ -64,7 +81,11 @@ class VectorIndexPopulator:
         print("✅ Initialized Azure Storage client")
     
     async def get_embedding(self, text: str) -> list:
-        """Get vector embedding for text using OpenAI REST API"""
+        """Get vector embedding for text (shared embedding store first, then OpenAI REST API)"""
+        if self.embedding_store is not None:
+            cached = self.embedding_store.get(self.openai_deployment, text)
+            if cached is not None:
+                return cached
         try:
             import aiohttp
             
@@ -81,7 +102,10 @@ class VectorIndexPopulator:
                 async with session.post(url, headers=headers, json=data) as response:
                     if response.status == 200:
                         result = await response.json()
-                        return result['data'][0]['embedding']
+                        embedding = result['data'][0]['embedding']
+                        if self.embedding_store is not None:
+                            self.embedding_store.put(self.openai_deployment, text, embedding)
+                        return embedding
                     else:
                         error_text = await response.text()
                         print(f"❌ Error getting embedding: {response.status} - {error_text}")
@@ -91,21 +115,22 @@ class VectorIndexPopulator:
             return None
     
     async def get_parsed_json_files(self):
-        """Get all parsed JSON files from Azure Storage"""
+        """Get all parsed JSON files from Azure Storage, as {blob name: ETag/last-modified} (None if the listing failed)"""
         try:
             container_client = self.blob_service_client.get_container_client("parsed")
             
-            json_files = []
+            json_files = {}
             async for blob in container_client.list_blobs():
                 if blob.name.endswith('.json'):
-                    json_files.append(blob.name)
+                    json_files[blob.name] = IndexSyncManifest.blob_version(blob)
             
             print(f"📄 Found {len(json_files)} JSON files in parsed container")
             return json_files
             
         except Exception as e:
+            # Never read a failed listing as an empty container: the sync would delete every document
             print(f"❌ Error accessing Azure Storage: {e}")
-            return []
+            return None
     
     async def download_json_file(self, blob_name):
         """Download and parse a JSON file from Azure Storage"""
@@ -185,62 +210,50 @@ class VectorIndexPopulator:
         """Upload documents to the vector index"""
         print(f"📤 Uploading {len(documents)} documents to vector index...")
         
-        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/index?api-version=2023-11-01"
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'api-key': self.search_key
-        }
-        
-        # Azure Search accepts up to 1000 documents per batch
-        batch_size = 1000
-        uploaded_count = 0
-        
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            
-            payload = {"value": [{"@search.action": "mergeOrUpload", **doc} for doc in batch]}
-            
-            try:
-                response = requests.post(url, headers=headers, json=payload)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    batch_uploaded = len([d for d in result.get('value', []) if d.get('status')])
-                    uploaded_count += batch_uploaded
-                    print(f"  ✅ Uploaded batch {i//batch_size + 1}: {batch_uploaded}/{len(batch)} documents")
-                else:
-                    print(f"  ❌ Error uploading batch {i//batch_size + 1}: {response.status_code} - {response.text}")
-                    
-            except Exception as e:
-                print(f"  ❌ Error uploading batch {i//batch_size + 1}: {e}")
+        actions = [{"@search.action": "mergeOrUpload", **doc} for doc in documents]
+        uploaded_count = len(post_index_actions(self.search_endpoint, self.search_key, self.index_name, actions))
         
         print(f"📊 Total documents uploaded: {uploaded_count}/{len(documents)}")
         return uploaded_count
     
-    async def populate_index(self):
-        """Populate the vector index with embeddings"""
+    async def populate_index(self, full=None):
+        """Populate the vector index with embeddings (incrementally unless full)"""
         print("🚀 Starting vector index population...")
         
         # Initialize clients
         await self.initialize_clients()
+        full = prepare_full_sync(self.manifest, self.search_endpoint, self.search_key, full)
         
         # Get list of JSON files
         json_files = await self.get_parsed_json_files()
-        if not json_files:
+        if json_files is None:
+            return False
+        if not json_files and not self.manifest.entries:
             print("❌ No JSON files found to process")
             return False
         
-        # Process each file
+        plan = self.manifest.plan({name: {name: version} for name, version in json_files.items()}, full=full)
+        print(f"🧮 Sync plan: {plan.summary()}")
+        if not self.manifest.deletes_allowed(plan, full):
+            return False
+        
+        # Process each new or changed file
         documents = []
-        for i, blob_name in enumerate(json_files, 1):
-            print(f"  📄 Processing {i}/{len(json_files)}: {blob_name}")
+        for i, blob_name in enumerate(plan.changed, 1):
+            print(f"  📄 Processing {i}/{len(plan.changed)}: {blob_name}")
             
             json_data = await self.download_json_file(blob_name)
             if not json_data:
                 print(f"    ❌ Failed to download {blob_name}")
                 continue
             
+            blobs = {blob_name: json_files[blob_name]}
+            content_sha256 = IndexSyncManifest.content_hash(json_data)
+            if not full and self.manifest.content_unchanged(blob_name, content_sha256):
+                # Re-written with identical content: nothing to re-embed
+                self.manifest.touch(blob_name, blobs)
+                continue
+            
             # Create content for embedding
             # Flatten staffing strings prior to creating the document
             staffing_plan = json_data.get("staffing_plan", [])
@@ -286,18 +299,21 @@ class VectorIndexPopulator:
             document = self.prepare_document_for_vector_index(
                 json_data, content_vector, scope_vector, deliverables_vector
             )
-            documents.append(document)
+            documents.append(PendingDocument(blob_name, blobs, content_sha256, document))
             
             print(f"    ✅ Processed: {json_data.get('client_name', 'Unknown')} - {json_data.get('project_title', 'Unknown')}")
         
-        if documents:
-            # Upload documents to index
-            uploaded_count = self.upload_documents_to_index(documents)
-            print(f"✅ Successfully populated vector index with {uploaded_count} documents")
+        # Upsert changed documents and delete removed ones in the same batches
+        actions = self.manifest.build_actions(plan, documents)
+        if not actions:
+            self.manifest.save()
+            print("✅ Vector index is up to date")
             return True
-        else:
-            print("❌ No documents to upload")
-            return False
+        print(f"📤 Sending {len(actions)} index actions ({len(documents)} upserts, {len(actions) - len(documents)} deletes)...")
+        acknowledged = post_index_actions(self.search_endpoint, self.search_key, self.index_name, actions)
+        failed = self.manifest.apply_results(plan, documents, acknowledged)
+        print(f"✅ Synced vector index: {len(acknowledged)}/{len(actions)} actions applied")
+        return failed == 0
 
 
 async def main():
@@ -305,9 +321,14 @@ async def main():
     print("🚀 Vector Index Population")
     print("=" * 50)
     
+    parser = argparse.ArgumentParser(description="Populate the vector index")
+    parser.add_argument("--full", action="store_true", default=None,
+                        help="Re-process every document instead of only those that changed")
+    args = parser.parse_args()
+    
     try:
         populator = VectorIndexPopulator()
-        success = await populator.populate_index()
+        success = await populator.populate_index(full=args.full)
         
         if success:
             print("\n🎉 Vector index population completed successfully!")
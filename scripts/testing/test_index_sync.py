@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the incremental index sync (scripts/indexing/index_sync.py)
+and its use in create_parsed_sows_index.py.
+
+The search service and blob listings are stubbed, so these run without Azure
+access: python -m pytest scripts/testing/test_index_sync.py
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+# Add the indexing scripts directory to the path
+sys.path.insert(0, str(Path(__file__).parents[1] / "indexing"))
+
+import index_sync
+from index_sync import IndexSyncManifest, index_document_id, prepare_full_sync
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None, text=""):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = text
+
+    def json(self):
+        return self._payload
+
+
+class FakeSearchService:
+    """Stands in for `requests` in index_sync: answers $count, id listings and index batches"""
+
+    def __init__(self, document_ids=(), fail_listing=False):
+        self.document_ids = set(document_ids)
+        self.fail_listing = fail_listing
+        self.gets = []
+        self.posts = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.gets.append(url)
+        if "/docs/$count" in url:
+            return FakeResponse(text=str(len(self.document_ids)))
+        return FakeResponse(404)
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.posts.append((url, json))
+        if "/docs/search" in url:
+            if self.fail_listing:
+                return FakeResponse(503, text="unavailable")
+            ids = sorted(self.document_ids)[json["skip"]:json["skip"] + json["top"]]
+            return FakeResponse(payload={"value": [{"id": doc_id} for doc_id in ids]})
+        if "/docs/index" in url:
+            results = []
+            for action in json["value"]:
+                if action["@search.action"] == "delete":
+                    self.document_ids.discard(action["id"])
+                else:
+                    self.document_ids.add(action["id"])
+                results.append({"key": action["id"], "status": True})
+            return FakeResponse(payload={"value": results})
+        return FakeResponse(404)
+
+    def index_batches(self):
+        return [body["value"] for url, body in self.posts if "/docs/index" in url]
+
+
+@pytest.fixture
+def search(monkeypatch):
+    service = FakeSearchService()
+    monkeypatch.setattr(index_sync, "requests", service)
+    return service
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return IndexSyncManifest("test-index", path=tmp_path / "test-index.json")
+
+
+def version(etag):
+    return {"etag": etag, "last_modified": ""}
+
+
+def listing(**etags):
+    """{blob name: {blob name: version}} as the populate scripts pass to plan()"""
+    return {f"{name}.json": {f"{name}.json": version(etag)} for name, etag in etags.items()}
+
+
+def test_plan_splits_changed_unchanged_and_deleted(manifest):
+    for name, etag in (("a", "1"), ("b", "1"), ("c", "1")):
+        manifest.record(f"{name}.json", {f"{name}.json": version(etag)}, "sha", name)
+
+    plan = manifest.plan(listing(a="1", b="2", d="1"))
+
+    assert plan.unchanged == ["a.json"]
+    assert sorted(plan.changed) == ["b.json", "d.json"]
+    assert plan.deleted == {"c.json": "c"}
+
+
+def test_full_plan_reprocesses_unchanged_documents(manifest):
+    manifest.record("a.json", {"a.json": version("1")}, "sha", "a")
+
+    plan = manifest.plan(listing(a="1"), full=True)
+
+    assert plan.changed == ["a.json"]
+    assert plan.unchanged == []
+
+
+def test_incremental_deletes_are_capped(manifest, monkeypatch):
+    monkeypatch.setenv("INDEX_SYNC_MAX_DELETE_FRACTION", "0.5")
+    for name in "abcd":
+        manifest.record(f"{name}.json", {f"{name}.json": version("1")}, "sha", name)
+
+    assert manifest.deletes_allowed(manifest.plan(listing(a="1", b="1", c="1")))
+    assert manifest.deletes_allowed(manifest.plan(listing(a="1", b="1")))
+    too_many = manifest.plan(listing(a="1"))
+    assert not manifest.deletes_allowed(too_many)
+    assert manifest.deletes_allowed(too_many, full=True)
+
+
+def test_prepare_full_sync_when_index_is_empty(manifest, search):
+    # Nothing synced yet: no reason to count
+    assert prepare_full_sync(manifest, "https://search", "key") is False
+    assert search.gets == []
+
+    manifest.record("a.json", {"a.json": version("1")}, "sha", "a")
+    assert prepare_full_sync(manifest, "https://search", "key") is True
+
+    search.document_ids = {"a"}
+    assert prepare_full_sync(manifest, "https://search", "key") is False
+    assert prepare_full_sync(manifest, "https://search", "key", full=True) is True
+
+
+def test_index_document_ids_are_distinct_per_blob():
+    assert index_document_id("Acme_SOW_2024.json") == "Acme_SOW_2024"
+    assert index_document_id("Acme SOW.json") != index_document_id("Acme_SOW.json")
+    assert index_document_id("Acme SOW.json") != index_document_id("Acme-SOW.json")
+
+
+# create_parsed_sows_index.py
+
+@pytest.fixture
+def parsed_manager(tmp_path, monkeypatch, search):
+    monkeypatch.setenv("INDEX_MANIFEST_DIR", str(tmp_path))
+    from create_parsed_sows_index import ParsedSOWsIndexManager
+
+    manager = ParsedSOWsIndexManager()
+    manager.search_endpoint = "https://search"
+    manager.search_key = "key"
+    manager.blobs = {}
+    manager.downloads = []
+
+    async def get_parsed_json_files():
+        return None if manager.blobs is None else {name: version(etag) for name, etag in manager.blobs.items()}
+
+    async def download_json_file(blob_name):
+        manager.downloads.append(blob_name)
+        return {"file_name": blob_name.replace(".json", ".pdf"), "client_name": "Acme", "project_title": blob_name}
+
+    manager.get_parsed_json_files = get_parsed_json_files
+    manager.download_json_file = download_json_file
+    return manager
+
+
+def populate(manager, full=None):
+    return asyncio.run(manager.populate_index(full=full))
+
+
+def test_populate_syncs_changes_and_deletes(parsed_manager, search):
+    parsed_manager.blobs = {"a.json": "1", "b.json": "1"}
+    assert populate(parsed_manager)
+    assert search.document_ids == {"a", "b"}
+
+    parsed_manager.downloads.clear()
+    parsed_manager.blobs = {"a.json": "1", "c.json": "1"}
+    assert populate(parsed_manager)
+
+    assert parsed_manager.downloads == ["c.json"]
+    assert search.document_ids == {"a", "c"}
+    assert set(parsed_manager.manifest.entries) == {"a.json", "c.json"}
+
+
+def test_populate_aborts_when_blob_listing_fails(parsed_manager, search):
+    parsed_manager.blobs = {"a.json": "1", "b.json": "1"}
+    assert populate(parsed_manager)
+    batches = len(search.index_batches())
+
+    parsed_manager.blobs = None
+    assert not populate(parsed_manager)
+
+    assert len(search.index_batches()) == batches
+    assert search.document_ids == {"a", "b"}
+    assert set(parsed_manager.manifest.entries) == {"a.json", "b.json"}
+
+
+def test_populate_refuses_mass_delete(parsed_manager, search, monkeypatch):
+    monkeypatch.setenv("INDEX_SYNC_MAX_DELETE_FRACTION", "0.5")
+    parsed_manager.blobs = {"a.json": "1", "b.json": "1", "c.json": "1"}
+    assert populate(parsed_manager)
+    batches = len(search.index_batches())
+
+    parsed_manager.blobs = {"a.json": "1"}
+    assert not populate(parsed_manager)
+    assert len(search.index_batches()) == batches
+    assert search.document_ids == {"a", "b", "c"}
+
+    # A full run may delete anything
+    assert populate(parsed_manager, full=True)
+    assert search.document_ids == {"a"}
+
+
+def test_first_run_deletes_documents_under_old_ids(parsed_manager, search):
+    # Indexed before the manifest existed, under random ids
+    search.document_ids = {"0b5c2f0e-8d1b-4a52-9e0c-3f1f0a7f6b1d", "a"}
+    parsed_manager.blobs = {"a.json": "1", "b.json": "1"}
+
+    assert populate(parsed_manager)
+
+    assert search.document_ids == {"a", "b"}
+    assert parsed_manager.manifest.doc_id("b.json") == "b"
+
+
+def test_first_run_aborts_when_index_listing_fails(parsed_manager, search):
+    search.document_ids = {"0b5c2f0e-8d1b-4a52-9e0c-3f1f0a7f6b1d"}
+    search.fail_listing = True
+    parsed_manager.blobs = {"a.json": "1"}
+
+    assert not populate(parsed_manager)
+    assert search.index_batches() == []
@@ -260,10 +260,12 @@ os.environ['SSL_CERT_FILE'] = certifi.where()
 # Add the services directory to the path
 sys.path.append(str(Path(__file__).parent / "services"))
 
-from sow_extraction_service import SOWExtractionService, ExtractionProgress
+from sow_extraction_service import SOWExtractionService
+from extraction_events import ExtractionEvent, PROGRESS
 from azure_search_service import get_search_service
 from vector_search_service import get_vector_search_service
 from hybrid_search_service import get_hybrid_search_service
+from parsed_blob_cache import get_parsed_blob_cache
 
 
 
@@ -295,6 +297,16 @@ def get_extraction_service():
     return st.session_state.extraction_service
 
 
+def subscribe_progress_widgets(service, progress_bar, status_text):
+    """Drive a progress bar and status line from the service's event bus"""
+    def show_progress(event: ExtractionEvent):
+        progress_bar.progress(service.batch_progress.fraction)
+        if event.kind == PROGRESS:
+            status_text.text(f"{event.stage}: {event.message}")
+
+    return service.events.subscribe(show_progress, name="streamlit_progress")
+
+
 def process_uploaded_file(uploaded_file, progress_bar, status_text):
     """Process an uploaded file"""
     try:
@@ -311,12 +323,7 @@ def process_uploaded_file(uploaded_file, progress_bar, status_text):
             # Defer initialization into the extraction flow's event loop
             st.session_state.extraction_service = service
         
-        # Set progress callback
-        def progress_callback(progress: ExtractionProgress):
-            progress_bar.progress(progress.percentage / 100)
-            status_text.text(f"{progress.stage}: {progress.message}")
-        
-        service.set_progress_callback(progress_callback)
+        subscription = subscribe_progress_widgets(service, progress_bar, status_text)
         
         # Process in a fresh loop to ensure Azure clients are created/used within the same loop
         loop = asyncio.new_event_loop()
@@ -324,7 +331,10 @@ def process_uploaded_file(uploaded_file, progress_bar, status_text):
             asyncio.set_event_loop(loop)
             result = loop.run_until_complete(service.process_single_sow(temp_path))
         finally:
+            # Like asyncio.run(): let loop-bound clients close before the loop does
+            loop.run_until_complete(loop.shutdown_asyncgens())
             loop.close()
+            service.events.unsubscribe(subscription)
         
         # Clean up temp file
         temp_path.unlink()
@@ -359,27 +369,11 @@ def _ensure_extraction_initialized():
 def fetch_staffing_from_blob(file_name: str):
     """Fetch staffing_plan from parsed blob when search index lacks it."""
     try:
-        from azure.identity import DefaultAzureCredential
-        from azure.storage.blob import BlobServiceClient
-        
-        # Get storage account URL from environment
-        storage_account_url = os.getenv('AZURE_STORAGE_ACCOUNT_URL')
-        if not storage_account_url:
+        cache = get_parsed_blob_cache()
+        if cache is None:
             return []
-        
-        # Initialize synchronous blob client
-        cred = DefaultAzureCredential()
-        blob_service_client = BlobServiceClient(account_url=storage_account_url, credential=cred)
-        
-        blob_name = f"{file_name.replace('.pdf', '').replace('.docx', '')}_parsed.json"
-        blob_client = blob_service_client.get_blob_client(container="parsed", blob=blob_name)
-        
-        # Download blob content synchronously
-        blob_data = blob_client.download_blob()
-        content = blob_data.readall()
-        data = json.loads(content.decode('utf-8'))
-        
-        return data.get('staffing_plan', [])
+        data = cache.get(file_name)
+        return (data or {}).get('staffing_plan', [])
     except Exception:
         return []
 
@@ -429,36 +423,29 @@ def generate_sow_recommendations(sow_data, client_filter="All Clients", length_f
         )
         
         if results and 'value' in results:
-            # Deduplicate by file_name and keep highest hybrid strategy score
-            dedup = {}
-            for doc in results['value']:
-                key = (doc.get('file_name') or '').strip() or doc.get('id')
+            # Results arrive fused, deduplicated by file_name and sorted by score
+            recommendations = []
+            for doc in results['value'][:top]:
                 score = doc.get('strategy_score', doc.get('@search.score', 0.0))
-                if not key:
-                    continue
-                if key not in dedup or score > dedup[key]['relevance_score']:
-                    # Prefer structured staffing data from blob hydration, fallback to search index data
-                    staffing_plan = doc.get('staffing_plan_structured') or doc.get('staffing_plan', [])
-                    
-                    dedup[key] = {
-                        'client_name': doc.get('client_name', 'Unknown'),
-                        'project_title': doc.get('project_title', 'No title'),
-                        'scope_summary': doc.get('scope_summary', 'No summary'),
-                        'deliverables': doc.get('deliverables', []),
-                        'staffing_plan': staffing_plan,
-                        'staffing_plan_structured': doc.get('staffing_plan_structured'),
-                        'start_date': doc.get('start_date', ''),
-                        'end_date': doc.get('end_date', ''),
-                        'project_length': doc.get('project_length', ''),
-                        'file_name': doc.get('file_name', ''),
-                        'extraction_timestamp': doc.get('extraction_timestamp', ''),
-                        'relevance_score': score,
-                        'search_strategy': doc.get('search_strategy', 'hybrid')
-                    }
-
-            # Sort by score and return top N unique
-            unique_sorted = sorted(dedup.values(), key=lambda d: d['relevance_score'], reverse=True)
-            return unique_sorted[:top]
+                # Prefer structured staffing data from blob hydration, fallback to search index data
+                staffing_plan = doc.get('staffing_plan_structured') or doc.get('staffing_plan', [])
+                
+                recommendations.append({
+                    'client_name': doc.get('client_name', 'Unknown'),
+                    'project_title': doc.get('project_title', 'No title'),
+                    'scope_summary': doc.get('scope_summary', 'No summary'),
+                    'deliverables': doc.get('deliverables', []),
+                    'staffing_plan': staffing_plan,
+                    'staffing_plan_structured': doc.get('staffing_plan_structured'),
+                    'start_date': doc.get('start_date', ''),
+                    'end_date': doc.get('end_date', ''),
+                    'project_length': doc.get('project_length', ''),
+                    'file_name': doc.get('file_name', ''),
+                    'extraction_timestamp': doc.get('extraction_timestamp', ''),
+                    'relevance_score': score,
+                    'search_strategy': doc.get('search_strategy', 'hybrid')
+                })
+            return recommendations
         
         return []
         
@@ -687,10 +674,7 @@ def main():
                         if st.session_state.extraction_service is None:
                             st.session_state.extraction_service = service
 
-                        def progress_callback(progress: ExtractionProgress):
-                            progress_bar.progress(progress.percentage / 100)
-                            status_text.text(f"{progress.stage}: {progress.message}")
-                        service.set_progress_callback(progress_callback)
+                        subscription = subscribe_progress_widgets(service, progress_bar, status_text)
 
                         try:
                             result = asyncio.run(service.process_single_sow(temp_path, skip_uploads=True))
@@ -698,7 +682,10 @@ def main():
                             loop = asyncio.new_event_loop()
                             asyncio.set_event_loop(loop)
                             result = loop.run_until_complete(service.process_single_sow(temp_path, skip_uploads=True))
+                            loop.run_until_complete(loop.shutdown_asyncgens())
                             loop.close()
+                        finally:
+                            service.events.unsubscribe(subscription)
                     finally:
                         try:
                             temp_path.unlink()
@@ -1033,11 +1020,12 @@ def main():
                             filter_expression=filter_expression
                         )
                         
-                        # Filter out low-relevance results (threshold: 0.01 for hybrid)
+                        # Filter out low-relevance results on the fused 0-1 score
+                        # (@search.score is a raw RRF score, ~0.003-0.06, in single-request mode)
                         if results and 'value' in results:
                             filtered_results = []
                             for doc in results['value']:
-                                score = doc.get('@search.score', 0.0)
+                                score = doc.get('strategy_score', doc.get('@search.score', 0.0))
                                 if score >= 0.01:  # Lower threshold for hybrid search
                                     filtered_results.append(doc)
                             results['value'] = filtered_results
@@ -1057,9 +1045,9 @@ def main():
                                     'project_length': doc.get('project_length', ''),
                                     'file_name': doc.get('file_name', ''),
                                     'extraction_timestamp': doc.get('extraction_timestamp', ''),
-                                    'raw_content': doc.get('raw_content', ''),
+                                    'id': doc.get('id', ''),
                                     'search_strategy': doc.get('search_strategy', 'hybrid_vector_search'),
-                                    'relevance_score': doc.get('@search.score', 0.0)
+                                    'relevance_score': doc.get('strategy_score', doc.get('@search.score', 0.0))
                                 })
                             st.session_state.search_results = formatted_results
                         else:
@@ -1098,6 +1086,7 @@ def main():
                                     'project_length': doc.get('project_length', ''),
                                     'file_name': doc.get('file_name', ''),
                                     'extraction_timestamp': doc.get('extraction_timestamp', ''),
+                                    'id': doc.get('id', ''),
                                     'search_strategy': doc.get('search_strategy', 'vector_search'),
                                     'relevance_score': doc.get('@search.score', 0.0)
                                 })
@@ -1214,6 +1203,15 @@ def main():
                                     parsed = _parse_staffing_item_to_columns(staff)
                                     st.write(f"{j}. {parsed.get('name','')} - {parsed.get('title','')} {parsed.get('allocation','')}")
                         
+                        # Full document text is not part of search results; fetch it on demand
+                        if result.get('id') and st.checkbox("Show full document text", key=f"raw_content_{i}"):
+                            document = get_hybrid_search_service().get_document_fields(result['id'])
+                            raw_content = (document or {}).get('raw_content')
+                            if raw_content:
+                                st.text_area("Full text", raw_content, height=300, key=f"raw_content_text_{i}")
+                            else:
+                                st.info("Full text is not available for this document")
+                        
                         # Download options for this result
                         st.markdown("**Download Options:**")
                         download_col1, download_col2 = st.columns(2)
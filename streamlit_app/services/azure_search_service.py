@@ -9,10 +9,21 @@ allowing users to search through parsed SOW data with various filters and option
 
 import os
 import json
-import requests
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from dotenv import load_dotenv
+try:
+    from .http_transport import get_http_transport  # type: ignore
+except Exception:
+    from http_transport import get_http_transport  # type: ignore
+try:
+    from .index_metadata import IndexMetadata, get_index_metadata  # type: ignore
+except Exception:
+    from index_metadata import IndexMetadata, get_index_metadata  # type: ignore
+try:
+    from .search_projections import select_for  # type: ignore
+except Exception:
+    from search_projections import select_for  # type: ignore
 
 
 class AzureSearchService:
@@ -46,7 +57,8 @@ class AzureSearchService:
         filter_expression: Optional[str] = None,
         top: int = 20,
         skip: int = 0,
-        order_by: Optional[str] = None
+        order_by: Optional[str] = None,
+        projection: Optional[str] = "detail"
     ) -> Optional[Dict[str, Any]]:
         """
         Perform a search query against the Azure Search index
@@ -58,6 +70,7 @@ class AzureSearchService:
             top: Number of results to return
             skip: Number of results to skip
             order_by: Field to sort by
+            projection: Fields to return (see search_projections; "full" for every field)
         
         Returns:
             Search results dictionary or None if error
@@ -76,7 +89,8 @@ class AzureSearchService:
             "skip": skip,
             "count": True,
             "queryType": "simple",
-            "searchMode": "all"
+            "searchMode": "all",
+            "select": select_for(projection)
         }
         
         if search_fields:
@@ -89,7 +103,7 @@ class AzureSearchService:
             payload["orderby"] = order_by
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = get_http_transport().post(url, headers=headers, json=payload)
             
             if response.status_code == 200:
                 return response.json()
@@ -166,67 +180,22 @@ class AzureSearchService:
         """Get all documents from the index"""
         return self.search(query="*", top=top)
     
+    @property
+    def metadata(self) -> IndexMetadata:
+        """Facet/$count metadata for this index (TTL-cached, shared across instances)"""
+        return get_index_metadata(self.search_endpoint, self.search_key, self.index_name)
+    
     def get_unique_clients(self) -> List[str]:
-        """Get list of unique client names"""
-        results = self.search(query="*", top=1000)
-        if not results:
-            return []
-        
-        clients = set()
-        for doc in results.get('value', []):
-            client = (doc.get('client_name') or '').strip()
-            if client:
-                clients.add(client)
-        
-        return sorted(list(clients))
+        """Get list of unique client names (from a facet, no documents fetched)"""
+        return self.metadata.unique_values('client_name')
     
     def get_unique_project_lengths(self) -> List[str]:
-        """Get list of unique project lengths"""
-        results = self.search(query="*", top=1000)
-        if not results:
-            return []
-        
-        lengths = set()
-        for doc in results.get('value', []):
-            length = (doc.get('project_length') or '').strip()
-            if length:
-                lengths.add(length)
-        
-        return sorted(list(lengths))
+        """Get list of unique project lengths (from a facet, no documents fetched)"""
+        return self.metadata.unique_values('project_length')
     
     def get_stats(self) -> Dict[str, Any]:
         """Get basic statistics about the index"""
-        results = self.get_all_documents(top=1000)
-        if not results:
-            return {"total_documents": 0, "clients": 0, "date_range": None}
-        
-        documents = results.get('value', [])
-        total_docs = len(documents)
-        
-        # Count unique clients
-        clients = set()
-        for doc in documents:
-            client = (doc.get('client_name') or '').strip()
-            if client:
-                clients.add(client)
-        
-        # Get date range
-        dates = []
-        for doc in documents:
-            start_date = doc.get('start_date', '')
-            if start_date:
-                dates.append(start_date)
-        
-        date_range = None
-        if dates:
-            dates.sort()
-            date_range = {"earliest": dates[0], "latest": dates[-1]}
-        
-        return {
-            "total_documents": total_docs,
-            "clients": len(clients),
-            "date_range": date_range
-        }
+        return self.metadata.stats()
     
     def format_search_results(self, results: Dict[str, Any], show_details: bool = True) -> List[Dict[str, Any]]:
         """Format search results for display in Streamlit"""
@@ -238,6 +207,7 @@ class AzureSearchService:
         
         for doc in documents:
             formatted_doc = {
+                "id": doc.get('id', ''),
                 "client_name": doc.get('client_name', 'Unknown Client'),
                 "project_title": doc.get('project_title', 'No title'),
                 "project_length": doc.get('project_length', 'Unknown'),
@@ -10,11 +10,16 @@ rendered as images.
 Requirements:
 - Env vars: AZURE_DOCINT_ENDPOINT, AZURE_DOCINT_API_KEY, AZURE_DOCINT_API_VERSION
 - Package: azure-ai-documentintelligence>=1.0.0b4
+
+Optional env vars:
+- AZURE_DOCINT_POLL_TIMEOUT: seconds to wait for one analysis (default 180)
+- AZURE_DOCINT_MAX_CONNECTIONS: pooled connections for the async client (default 10)
 """
 
 from __future__ import annotations
 
 import os
+import asyncio
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -28,6 +33,32 @@ except Exception:  # pragma: no cover
 import time
 import httpx
 
+# Adaptive polling: start fast (small layouts finish in ~1-2s), back off
+# geometrically, and always honour the service's Retry-After when present.
+_POLL_INITIAL_DELAY = 0.5
+_POLL_BACKOFF = 1.5
+_POLL_MAX_DELAY = 5.0
+_SUBMIT_MAX_RETRIES = 5
+
+
+def _retry_after_seconds(headers: Any, default: float) -> float:
+    """Parse a Retry-After (seconds) header, falling back to `default`."""
+    value = None
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+    except Exception:
+        pass
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _next_poll_delay(current: float) -> float:
+    return min(_POLL_MAX_DELAY, max(_POLL_INITIAL_DELAY, current * _POLL_BACKOFF))
+
 
 @dataclass
 class TableCell:
@@ -66,6 +97,37 @@ class TableResult:
             lines.append(" | ".join(row))
         return "\n".join(lines)
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "page_number": self.page_number,
+            "row_count": self.row_count,
+            "column_count": self.column_count,
+            "cells": [[c.row_index, c.column_index, c.content] for c in self.cells],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "TableResult":
+        return cls(
+            page_number=int(payload.get("page_number", 0) or 0),
+            row_count=int(payload.get("row_count", 0) or 0),
+            column_count=int(payload.get("column_count", 0) or 0),
+            cells=[TableCell(row_index=r, column_index=c, content=t) for r, c, t in payload.get("cells", [])],
+        )
+
+
+def analysis_to_dict(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-serializable form of an analyze_layout() result (e.g. for caching)."""
+    out = dict(analysis)
+    out["tables"] = [t.to_dict() for t in analysis.get("tables", [])]
+    return out
+
+
+def analysis_from_dict(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of analysis_to_dict()."""
+    out = dict(payload)
+    out["tables"] = [TableResult.from_dict(t) for t in payload.get("tables", [])]
+    return out
+
 
 class AzureDocumentIntelligenceService:
     """High-level client for Azure Document Intelligence prebuilt-layout."""
@@ -85,6 +147,11 @@ class AzureDocumentIntelligenceService:
                 endpoint=self.endpoint,
                 credential=AzureKeyCredential(self.api_key),
             )
+        self.poll_timeout = float(os.getenv("AZURE_DOCINT_POLL_TIMEOUT", "180"))
+        self.max_connections = int(os.getenv("AZURE_DOCINT_MAX_CONNECTIONS", "10"))
+        # Pooled async client, bound to the event loop that created it
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
 
     def analyze_layout(self, file_path: Path, pages: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -154,24 +221,36 @@ class AzureDocumentIntelligenceService:
 
         return {"file": str(file_path), "text": full_text, "pages": len(result.pages or []), "tables": tables}
 
-    def _analyze_layout_via_rest(self, file_path: Path, pages: Optional[str]) -> Dict[str, Any]:
+    def _rest_analyze_request(self, pages: Optional[str]):
         api_version = self.api_version or "2023-07-31"
         analyze_url = f"{self.endpoint.rstrip('/')}/formrecognizer/documentModels/prebuilt-layout:analyze?api-version={api_version}"
         headers = {
             "Ocp-Apim-Subscription-Key": self.api_key,
             "Content-Type": "application/octet-stream",
         }
-
-        with open(file_path, "rb") as f:
-            data = f.read()
-
         params = {}
         if pages:
             params["pages"] = pages
+        return analyze_url, headers, params
+
+    @staticmethod
+    def _poll_status(payload: Dict[str, Any]) -> str:
+        return (payload.get("status") or payload.get("analyzeResult", {}).get("status") or "").lower()
+
+    def _analyze_layout_via_rest(self, file_path: Path, pages: Optional[str]) -> Dict[str, Any]:
+        analyze_url, headers, params = self._rest_analyze_request(pages)
+
+        with open(file_path, "rb") as f:
+            data = f.read()
 
         # Submit analyze request
         with httpx.Client(timeout=60.0) as client:
-            resp = client.post(analyze_url, headers=headers, params=params, content=data)
+            for attempt in range(_SUBMIT_MAX_RETRIES + 1):
+                resp = client.post(analyze_url, headers=headers, params=params, content=data)
+                if resp.status_code == 429 and attempt < _SUBMIT_MAX_RETRIES:
+                    time.sleep(_retry_after_seconds(resp.headers, 2.0 ** attempt))
+                    continue
+                break
             if resp.status_code not in (200, 202):
                 raise RuntimeError(f"Analyze request failed: {resp.status_code} {resp.text}")
             # Operation-Location header for polling
@@ -185,21 +264,124 @@ class AzureDocumentIntelligenceService:
                 return self._normalize_rest_result(payload, file_path)
 
             # Poll until succeeded/failed
-            for _ in range(60):  # up to ~60 seconds
+            deadline = time.monotonic() + self.poll_timeout
+            delay = _retry_after_seconds(resp.headers, _POLL_INITIAL_DELAY)
+            while True:
+                time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+                if time.monotonic() >= deadline:
+                    break
                 poll = client.get(operation_url, headers={"Ocp-Apim-Subscription-Key": self.api_key})
+                delay = _next_poll_delay(delay)
                 if poll.status_code != 200:
-                    time.sleep(1)
+                    delay = _retry_after_seconds(poll.headers, delay)
                     continue
                 payload = poll.json()
-                status = (payload.get("status") or payload.get("analyzeResult", {}).get("status") or "").lower()
+                status = self._poll_status(payload)
                 if status in {"succeeded", "failed", "canceled"}:
                     if status != "succeeded":
                         raise RuntimeError(f"Analysis {status}: {payload}")
                     return self._normalize_rest_result(payload, file_path)
-                time.sleep(1)
+                delay = _retry_after_seconds(poll.headers, delay)
 
         raise RuntimeError("Analysis polling timed out")
 
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Pooled async client shared by all analyses on the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop or self._async_client.is_closed:
+            self._discard_async_client()
+            self._async_client = httpx.AsyncClient(
+                timeout=60.0,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _discard_async_client(self) -> None:
+        """Close a client left over from another event loop (on that loop, if it still runs)."""
+        client, loop = self._async_client, self._async_client_loop
+        self._async_client, self._async_client_loop = None, None
+        if client is None or client.is_closed or loop is None or loop.is_closed() or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        except RuntimeError:
+            pass  # loop stopped in between
+
+    async def aclose(self) -> None:
+        """Close the pooled async client (call from the loop that used it)."""
+        client, self._async_client = self._async_client, None
+        self._async_client_loop = None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    async def analyze_layout_async(self, file_path: Path, pages: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Awaitable variant of analyze_layout().
+
+        The REST path submits and polls on the shared pooled client without
+        blocking the event loop; the SDK path runs in a worker thread. REST
+        results carry ``timings`` (submit_seconds, poll_seconds, polls).
+        """
+        if not file_path or not Path(file_path).exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        if self.client is not None:
+            return await asyncio.to_thread(self.analyze_layout, file_path, pages)
+
+        analyze_url, headers, params = self._rest_analyze_request(pages)
+        data = await asyncio.to_thread(Path(file_path).read_bytes)
+        client = self._get_async_client()
+        started = time.monotonic()
+
+        for attempt in range(_SUBMIT_MAX_RETRIES + 1):
+            resp = await client.post(analyze_url, headers=headers, params=params, content=data)
+            if resp.status_code == 429 and attempt < _SUBMIT_MAX_RETRIES:
+                await asyncio.sleep(_retry_after_seconds(resp.headers, 2.0 ** attempt))
+                continue
+            break
+        if resp.status_code not in (200, 202):
+            raise RuntimeError(f"Analyze request failed: {resp.status_code} {resp.text}")
+        operation_url = resp.headers.get("operation-location") or resp.headers.get("Operation-Location")
+        if not operation_url:
+            try:
+                payload = resp.json()
+            except Exception:
+                payload = {}
+            return self._normalize_rest_result(payload, file_path)
+
+        submitted = time.monotonic()
+        polls = 0
+        deadline = submitted + self.poll_timeout
+        delay = _retry_after_seconds(resp.headers, _POLL_INITIAL_DELAY)
+        while True:
+            await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            if time.monotonic() >= deadline:
+                break
+            polls += 1
+            poll = await client.get(operation_url, headers={"Ocp-Apim-Subscription-Key": self.api_key})
+            delay = _next_poll_delay(delay)
+            if poll.status_code != 200:
+                delay = _retry_after_seconds(poll.headers, delay)
+                continue
+            payload = poll.json()
+            status = self._poll_status(payload)
+            if status in {"succeeded", "failed", "canceled"}:
+                if status != "succeeded":
+                    raise RuntimeError(f"Analysis {status}: {payload}")
+                result = self._normalize_rest_result(payload, file_path)
+                result["timings"] = {
+                    "submit_seconds": submitted - started,
+                    "poll_seconds": time.monotonic() - submitted,
+                    "polls": polls,
+                }
+                return result
+            delay = _retry_after_seconds(poll.headers, delay)
+
+        raise RuntimeError(f"Analysis polling timed out after {self.poll_timeout:.0f}s")
+
     def _normalize_rest_result(self, payload: Dict[str, Any], file_path: Path) -> Dict[str, Any]:
         # FR 2023 returns { status, createdDateTime, lastUpdatedDateTime, analyzeResult: { pages, tables, ... } }
         result = payload.get("analyzeResult", payload)
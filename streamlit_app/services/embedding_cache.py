@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Query Embedding Cache
+=====================
+
+Process-wide LRU + TTL cache for query embeddings, shared by the search
+services (VectorSearchService, HybridSearchService, SemanticSearchService).
+Recommendation and search flows embed the same query text repeatedly; a
+cache hit skips the embedding round-trip.
+Misses fall through to the persistent embedding store (embedding_store.py),
+so embeddings survive restarts and are shared with the indexing scripts.
+An entry whose TTL expired is not reloaded from the store: the lookup misses,
+and the caller's fresh embedding replaces the stored one.
+get_query_embedding_sync() is the services' cache-then-Azure-OpenAI lookup
+for sync code paths.
+
+Configuration (optional env vars):
+- QUERY_EMBEDDING_CACHE_SIZE: max cached queries (default 512)
+- QUERY_EMBEDDING_CACHE_TTL: seconds before an entry expires (default 3600)
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+try:
+    from .embedding_store import get_embedding_store  # type: ignore
+except Exception:
+    try:
+        from embedding_store import get_embedding_store  # type: ignore
+    except Exception:  # numpy not installed: in-memory cache only
+        get_embedding_store = None
+try:
+    from .http_transport import get_http_transport  # type: ignore
+except Exception:
+    from http_transport import get_http_transport  # type: ignore
+
+EMBEDDINGS_API_VERSION = "2024-08-01-preview"
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache with per-entry TTL, keyed by (model/deployment, text)"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0, store=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.store = store
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Return a cached embedding or None if missing/expired"""
+        key = (model or "", text or "")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, embedding = entry
+                if self.ttl_seconds <= 0 or time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return embedding
+                # Expired: re-embed rather than revive the same vector from the store
+                del self._entries[key]
+                self.misses += 1
+                return None
+        embedding = self.store.get(model or "", text or "") if self.store is not None else None
+        with self._lock:
+            if embedding is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, embedding)
+        return embedding
+
+    def _remember(self, key: Tuple[str, str], embedding: List[float]) -> None:
+        self._entries[key] = (time.monotonic(), embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, model: str, text: str, embedding: Optional[List[float]]) -> None:
+        """Store an embedding; failed lookups (None/empty) are never cached"""
+        if not embedding:
+            return
+        key = (model or "", text or "")
+        with self._lock:
+            self._remember(key, embedding)
+        if self.store is not None:
+            self.store.put(model or "", text or "", embedding)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Global instance for caching
+_query_embedding_cache = None
+_query_embedding_cache_lock = threading.Lock()
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Get or create the process-wide query embedding cache"""
+    global _query_embedding_cache
+    with _query_embedding_cache_lock:
+        if _query_embedding_cache is None:
+            _query_embedding_cache = QueryEmbeddingCache(
+                max_entries=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "512")),
+                ttl_seconds=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600")),
+                store=get_embedding_store() if get_embedding_store else None,
+            )
+        return _query_embedding_cache
+
+
+def get_query_embedding_sync(endpoint: Optional[str], api_key: Optional[str], deployment: Optional[str],
+                             query: str, timeout: Optional[float] = None) -> Optional[List[float]]:
+    """Query embedding from the shared cache/store, falling back to one Azure OpenAI call on the pooled sync transport"""
+    cache = get_query_embedding_cache()
+    cached = cache.get(deployment, query)
+    if cached is not None:
+        return cached
+    if not all([endpoint, api_key, deployment]):
+        print("❌ Query embedding not cached and Azure OpenAI is not configured")
+        return None
+    try:
+        url = f"{endpoint.rstrip('/')}/openai/deployments/{deployment}/embeddings?api-version={EMBEDDINGS_API_VERSION}"
+        response = get_http_transport().post(url, headers={'api-key': api_key, 'Content-Type': 'application/json'},
+                                             json={'input': query}, timeout=timeout)
+        if response.status_code == 200:
+            embedding = response.json()['data'][0]['embedding']
+            cache.put(deployment, query, embedding)
+            return embedding
+        print(f"❌ Error getting query embedding: {response.status_code} - {response.text}")
+    except Exception as e:
+        print(f"❌ Error getting query embedding: {e}")
+    return None
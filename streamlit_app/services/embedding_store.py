@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Embedding Store
+===============
+
+Persistent embedding store shared by the index population scripts and the
+search services, so the same text is never embedded twice for the same
+deployment (re-indexing, adding vector fields, offline evaluation, repeated
+queries across restarts).
+
+Vectors live in one memory-mapped float32 matrix per deployment
+(<root>/<deployment>.f32, one row per text); a SQLite index maps
+(deployment, SHA-256 of the text) to a row. Rows are append-only; the matrix
+file grows in chunks as needed. Safe to share across threads and processes.
+
+Configuration (optional env vars):
+- EMBEDDING_STORE: set to 0 to disable the store
+- EMBEDDING_STORE_DIR: store location (default <project root>/.cache/embeddings)
+"""
+
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rows added to a matrix file each time it has to grow
+_GROW_ROWS = 1024
+
+
+class EmbeddingStore:
+    """Memory-mapped float32 embeddings indexed by (deployment, text hash)"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._matrices: Dict[str, np.memmap] = {}
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.root / "index.sqlite3"), timeout=30.0,
+                                   check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS matrices ("
+                " deployment TEXT PRIMARY KEY,"
+                " dims INTEGER NOT NULL,"
+                " rows INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " deployment TEXT NOT NULL,"
+                " text_sha256 TEXT NOT NULL,"
+                " row INTEGER NOT NULL,"
+                " PRIMARY KEY (deployment, text_sha256))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _matrix_path(self, deployment: str) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9_.\-]", "_", deployment or "default")
+        return self.root / f"{safe}.f32"
+
+    def _matrix(self, deployment: str, dims: int, min_rows: int) -> np.memmap:
+        """Open (or grow and re-open) the deployment's matrix so it holds at least min_rows rows"""
+        matrix = self._matrices.get(deployment)
+        if matrix is not None and matrix.shape[0] >= min_rows:
+            return matrix
+        path = self._matrix_path(deployment)
+        row_bytes = dims * 4
+        capacity = path.stat().st_size // row_bytes if path.exists() else 0
+        if capacity < min_rows:
+            capacity = (min_rows // _GROW_ROWS + 1) * _GROW_ROWS
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, dims))
+        self._matrices[deployment] = matrix
+        return matrix
+
+    def _shape(self, conn: sqlite3.Connection, deployment: str) -> Optional[Tuple[int, int]]:
+        row = conn.execute("SELECT dims, rows FROM matrices WHERE deployment = ?", (deployment,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _rows_for(self, conn: sqlite3.Connection, deployment: str, keys: Sequence[str]) -> Dict[str, int]:
+        rows: Dict[str, int] = {}
+        unique = list(dict.fromkeys(keys))
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows.update(conn.execute(
+                f"SELECT text_sha256, row FROM embeddings WHERE deployment = ? AND text_sha256 IN ({placeholders})",
+                [deployment, *chunk],
+            ).fetchall())
+        return rows
+
+    def get(self, deployment: str, text: str) -> Optional[List[float]]:
+        return self.get_many(deployment, [text])[0]
+
+    def get_many(self, deployment: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """One vector (or None) per text"""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        keys = [self.text_key(t) for t in texts]
+        try:
+            with self._lock:
+                conn = self._connection()
+                shape = self._shape(conn, deployment)
+                if shape is None:
+                    return results
+                rows = self._rows_for(conn, deployment, keys)
+                if not rows:
+                    return results
+                matrix = self._matrix(deployment, shape[0], max(rows.values()) + 1)
+                for i, key in enumerate(keys):
+                    if key in rows:
+                        results[i] = matrix[rows[key]].tolist()
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"⚠️ Embedding store read failed: {e}")
+        return results
+
+    def put(self, deployment: str, text: str, vector: Optional[Sequence[float]]) -> None:
+        self.put_many(deployment, [text], [vector])
+
+    def put_many(self, deployment: str, texts: Sequence[str], vectors: Sequence[Optional[Sequence[float]]]) -> None:
+        """Store vectors for texts not stored yet (best-effort; empty vectors are skipped)"""
+        items: Dict[str, Sequence[float]] = {}
+        for text, vector in zip(texts, vectors):
+            if vector is not None and len(vector):
+                items.setdefault(self.text_key(text), vector)
+        if not items:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                # BEGIN IMMEDIATE serializes writers across processes while rows are allocated
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    shape = self._shape(conn, deployment)
+                    dims = shape[0] if shape else len(next(iter(items.values())))
+                    next_row = shape[1] if shape else 0
+                    existing = set(self._rows_for(conn, deployment, list(items)))
+                    new = [(k, v) for k, v in items.items() if k not in existing and len(v) == dims]
+                    if len(new) < len(items) - len(existing):
+                        print(f"⚠️ Embedding store: skipped vectors whose size differs from {dims} for {deployment}")
+                    if new:
+                        matrix = self._matrix(deployment, dims, next_row + len(new))
+                        matrix[next_row:next_row + len(new)] = np.asarray([v for _, v in new], dtype=np.float32)
+                        matrix.flush()
+                        conn.executemany(
+                            "INSERT INTO embeddings (deployment, text_sha256, row) VALUES (?, ?, ?)",
+                            [(deployment, k, next_row + i) for i, (k, _) in enumerate(new)],
+                        )
+                        conn.execute(
+                            "INSERT OR REPLACE INTO matrices (deployment, dims, rows) VALUES (?, ?, ?)",
+                            (deployment, dims, next_row + len(new)),
+                        )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"⚠️ Embedding store write failed: {e}")
+
+    def matrix(self, deployment: str) -> Optional[np.ndarray]:
+        """Read-only view of every stored vector for a deployment (rows in insertion order)"""
+        with self._lock:
+            shape = self._shape(self._connection(), deployment)
+            if shape is None or shape[1] == 0:
+                return None
+            view = self._matrix(deployment, shape[0], shape[1])[:shape[1]]
+            view.flags.writeable = False
+            return view
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            rows = self._connection().execute("SELECT deployment, dims, rows FROM matrices").fetchall()
+        return {deployment: {"dims": dims, "vectors": count} for deployment, dims, count in rows}
+
+
+# Global instance for caching
+_embedding_store = None
+_store_lock = threading.Lock()
+
+def get_embedding_store() -> Optional[EmbeddingStore]:
+    """Get or create the process-wide embedding store, or None when disabled"""
+    global _embedding_store
+    if os.getenv("EMBEDDING_STORE", "1").strip().lower() in {"0", "false", "no", "off"}:
+        return None
+    with _store_lock:
+        if _embedding_store is None:
+            default_root = Path(__file__).parents[2] / ".cache" / "embeddings"
+            _embedding_store = EmbeddingStore(Path(os.getenv("EMBEDDING_STORE_DIR") or default_root))
+        return _embedding_store
@@ -12,10 +12,21 @@ This service provides enhanced search capabilities with:
 
 import os
 import json
-import requests
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from dotenv import load_dotenv
+try:
+    from .multi_strategy_search import SearchStrategy, get_multi_strategy_engine  # type: ignore
+except Exception:
+    from multi_strategy_search import SearchStrategy, get_multi_strategy_engine  # type: ignore
+try:
+    from .http_transport import get_http_transport  # type: ignore
+except Exception:
+    from http_transport import get_http_transport  # type: ignore
+try:
+    from .index_metadata import IndexMetadata, get_index_metadata  # type: ignore
+except Exception:
+    from index_metadata import IndexMetadata, get_index_metadata  # type: ignore
 
 
 class EnhancedSearchService:
@@ -100,6 +111,17 @@ class EnhancedSearchService:
         # Join with OR operators for better matching
         return " OR ".join(fuzzy_terms)
     
+    def get_phonetic_variations(self, query: str) -> List[str]:
+        """Get whole-query variants for similar-sounding terms (e.g. august <-> augusta)"""
+        swaps = {"august": "augusta", "augusta": "august"}
+        terms = query.split()
+        variations = []
+        for i, term in enumerate(terms):
+            replacement = swaps.get(term.lower())
+            if replacement:
+                variations.append(" ".join(terms[:i] + [replacement] + terms[i + 1:]))
+        return variations
+    
     def search_with_multiple_strategies(
         self, 
         query: str, 
@@ -109,89 +131,53 @@ class EnhancedSearchService:
         skip: int = 0
     ) -> Optional[Dict[str, Any]]:
         """
-        Search using multiple strategies and combine results
+        Search using multiple strategies and combine results.
+
+        Strategies run concurrently; results are merged in priority order
+        (exact, fuzzy, phonetic, synonym, per-term).
         """
-        all_results = []
-        seen_ids = set()
+        strategies = []
         
         # Strategy 1: Original query
-        results1 = self._search_single_strategy(
-            query, search_fields, filter_expression, top, skip
-        )
-        if results1 and results1.get('value'):
-            for doc in results1['value']:
-                if doc['id'] not in seen_ids:
-                    doc['search_strategy'] = 'exact_match'
-                    doc['strategy_score'] = 1.0
-                    all_results.append(doc)
-                    seen_ids.add(doc['id'])
+        strategies.append(self._strategy('exact_match', 1.0, query, search_fields, filter_expression, top, skip))
         
         # Strategy 2: Fuzzy query
         fuzzy_query = self.create_fuzzy_query(query)
         if fuzzy_query != query:
-            results2 = self._search_single_strategy(
-                fuzzy_query, search_fields, filter_expression, top, skip
-            )
-            if results2 and results2.get('value'):
-                for doc in results2['value']:
-                    if doc['id'] not in seen_ids:
-                        doc['search_strategy'] = 'fuzzy_match'
-                        doc['strategy_score'] = 0.8
-                        all_results.append(doc)
-                        seen_ids.add(doc['id'])
+            strategies.append(self._strategy('fuzzy_match', 0.8, fuzzy_query, search_fields, filter_expression, top, skip))
         
         # Strategy 2.5: Direct phonetic variations
-        phonetic_variations = self.get_phonetic_variations(query)
-        for variation in phonetic_variations:
+        for variation in self.get_phonetic_variations(query):
             if variation != query:
-                results_phonetic = self._search_single_strategy(
-                    variation, search_fields, filter_expression, top, skip
-                )
-                if results_phonetic and results_phonetic.get('value'):
-                    for doc in results_phonetic['value']:
-                        if doc['id'] not in seen_ids:
-                            doc['search_strategy'] = 'phonetic_match'
-                            doc['strategy_score'] = 0.75
-                            all_results.append(doc)
-                            seen_ids.add(doc['id'])
+                strategies.append(self._strategy('phonetic_match', 0.75, variation, search_fields, filter_expression, top, skip))
         
         # Strategy 3: Synonym expansion
         expanded_query = self.expand_query_with_synonyms(query)
         if expanded_query != query:
-            results3 = self._search_single_strategy(
-                expanded_query, search_fields, filter_expression, top, skip
-            )
-            if results3 and results3.get('value'):
-                for doc in results3['value']:
-                    if doc['id'] not in seen_ids:
-                        doc['search_strategy'] = 'synonym_match'
-                        doc['strategy_score'] = 0.7
-                        all_results.append(doc)
-                        seen_ids.add(doc['id'])
+            strategies.append(self._strategy('synonym_match', 0.7, expanded_query, search_fields, filter_expression, top, skip))
         
         # Strategy 4: Individual term search (for multi-word queries)
         if len(query.split()) > 1:
             for term in query.split():
                 if len(term) > 2:  # Skip short terms
-                    results4 = self._search_single_strategy(
-                        term, search_fields, filter_expression, top//2, skip
-                    )
-                    if results4 and results4.get('value'):
-                        for doc in results4['value']:
-                            if doc['id'] not in seen_ids:
-                                doc['search_strategy'] = 'term_match'
-                                doc['strategy_score'] = 0.6
-                                all_results.append(doc)
-                                seen_ids.add(doc['id'])
+                    strategies.append(self._strategy('term_match', 0.6, term, search_fields, filter_expression, top//2, skip))
         
-        # Sort by strategy score (exact matches first)
-        all_results.sort(key=lambda x: x.get('strategy_score', 0), reverse=True)
-        
-        # Return in the same format as original search
-        return {
-            '@odata.count': len(all_results),
-            'value': all_results[:top]
-        }
+        return get_multi_strategy_engine().run(strategies, top)
+    
+    def _strategy(
+        self,
+        name: str,
+        score: float,
+        query: str,
+        search_fields: Optional[str],
+        filter_expression: Optional[str],
+        top: int,
+        skip: int
+    ) -> SearchStrategy:
+        """Wrap one keyword query as a strategy for the shared engine"""
+        def run(timeout: float) -> Optional[Dict[str, Any]]:
+            return self._search_single_strategy(query, search_fields, filter_expression, top, skip, timeout=timeout)
+        return SearchStrategy(name=name, score=score, run=run)
     
     def _search_single_strategy(
         self, 
@@ -199,7 +185,8 @@ class EnhancedSearchService:
         search_fields: Optional[str] = None,
         filter_expression: Optional[str] = None,
         top: int = 20,
-        skip: int = 0
+        skip: int = 0,
+        timeout: Optional[float] = None
     ) -> Optional[Dict[str, Any]]:
         """Perform a single search strategy"""
         url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
@@ -225,7 +212,7 @@ class EnhancedSearchService:
             payload["filter"] = filter_expression
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = get_http_transport().post(url, headers=headers, json=payload, timeout=timeout)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -339,67 +326,22 @@ class EnhancedSearchService:
         """Get all documents from the index"""
         return self.enhanced_search(query="*", top=top, use_enhanced=use_enhanced)
     
+    @property
+    def metadata(self) -> IndexMetadata:
+        """Facet/$count metadata for this index (TTL-cached, shared across instances)"""
+        return get_index_metadata(self.search_endpoint, self.search_key, self.index_name)
+    
     def get_unique_clients(self) -> List[str]:
-        """Get list of unique client names"""
-        results = self.enhanced_search(query="*", top=1000, use_enhanced=False)
-        if not results:
-            return []
-        
-        clients = set()
-        for doc in results.get('value', []):
-            client = doc.get('client_name', '').strip()
-            if client:
-                clients.add(client)
-        
-        return sorted(list(clients))
+        """Get list of unique client names (from a facet, no documents fetched)"""
+        return self.metadata.unique_values('client_name')
     
     def get_unique_project_lengths(self) -> List[str]:
-        """Get list of unique project lengths"""
-        results = self.enhanced_search(query="*", top=1000, use_enhanced=False)
-        if not results:
-            return []
-        
-        lengths = set()
-        for doc in results.get('value', []):
-            length = doc.get('project_length', '').strip()
-            if length:
-                lengths.add(length)
-        
-        return sorted(list(lengths))
+        """Get list of unique project lengths (from a facet, no documents fetched)"""
+        return self.metadata.unique_values('project_length')
     
     def get_stats(self) -> Dict[str, Any]:
         """Get basic statistics about the index"""
-        results = self.get_all_documents(top=1000, use_enhanced=False)
-        if not results:
-            return {"total_documents": 0, "clients": 0, "date_range": None}
-        
-        documents = results.get('value', [])
-        total_docs = len(documents)
-        
-        # Count unique clients
-        clients = set()
-        for doc in documents:
-            client = doc.get('client_name', '').strip()
-            if client:
-                clients.add(client)
-        
-        # Get date range
-        dates = []
-        for doc in documents:
-            start_date = doc.get('start_date', '')
-            if start_date:
-                dates.append(start_date)
-        
-        date_range = None
-        if dates:
-            dates.sort()
-            date_range = {"earliest": dates[0], "latest": dates[-1]}
-        
-        return {
-            "total_documents": total_docs,
-            "clients": len(clients),
-            "date_range": date_range
-        }
+        return self.metadata.stats()
     
     def format_search_results(self, results: Dict[str, Any], show_details: bool = True) -> List[Dict[str, Any]]:
         """Format search results for display in Streamlit"""
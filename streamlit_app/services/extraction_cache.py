@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Extraction Cache
+================
+
+Content-addressed, on-disk cache for SOW extraction stages. Each entry is keyed
+by the SHA-256 of the source file bytes plus the stage name, the stage's
+prompt/schema version and the model used, so:
+- re-submitting the same document (under any file name) skips the stage
+- bumping one stage's version only invalidates that stage
+
+Entries are JSON files under <root>/<stage>/<key[:2]>/<key>.json. When the
+store grows past `max_bytes`, the least recently used entries are evicted.
+
+Configuration (optional env vars):
+- SOW_EXTRACTION_CACHE: set to 0 to disable caching
+- SOW_EXTRACTION_CACHE_DIR: cache location (default <project root>/.cache/extraction)
+- SOW_EXTRACTION_CACHE_MAX_MB: size budget in megabytes (default 512)
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+
+class ExtractionCache:
+    """Per-stage JSON cache keyed by file content hash, with size-based LRU eviction"""
+
+    def __init__(self, root: Path, max_bytes: int = 512 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def hash_file(file_path: Path) -> str:
+        """SHA-256 of the file contents"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def stage_key(file_hash: str, stage: str, version: str, model: str = "") -> str:
+        material = "\x1f".join([file_hash, stage, str(version), model or ""])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, stage: str, key: str) -> Path:
+        return self.root / stage / key[:2] / f"{key}.json"
+
+    def get(self, file_hash: str, stage: str, version: str, model: str = "") -> Optional[Any]:
+        """Return the cached value for a stage, or None on a miss"""
+        path = self._entry_path(stage, self.stage_key(file_hash, stage, version, model))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        return payload.get("value")
+
+    def put(self, file_hash: str, stage: str, version: str, value: Any, model: str = "") -> None:
+        """Store a JSON-serializable value for a stage (best-effort; errors are ignored)"""
+        key = self.stage_key(file_hash, stage, version, model)
+        path = self._entry_path(stage, key)
+        try:
+            data = json.dumps(
+                {"stage": stage, "version": str(version), "model": model, "file_sha256": file_hash, "value": value},
+                ensure_ascii=False,
+            ).encode("utf-8")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            previous = path.stat().st_size if path.exists() else 0
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data) - previous
+        self._evict_if_needed()
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        for path in self._entries():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        with self._lock:
+            self._size = 0
+
+    def _entries(self):
+        if not self.root.exists():
+            return []
+        return [p for p in self.root.glob("*/*/*.json") if p.is_file()]
+
+    def _evict_if_needed(self) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(p.stat().st_size for p in self._entries())
+            if self._size <= self.max_bytes:
+                return
+            entries = []
+            for p in self._entries():
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            entries.sort()
+            # Evict down to 90% of the budget so we don't evict on every put
+            target = int(self.max_bytes * 0.9)
+            for _, size, p in entries:
+                if self._size <= target:
+                    break
+                try:
+                    p.unlink()
+                    self._size -= size
+                except OSError:
+                    continue
+
+
+def get_default_extraction_cache() -> Optional[ExtractionCache]:
+    """Build the cache from env settings, or None when disabled"""
+    if os.getenv("SOW_EXTRACTION_CACHE", "1").strip().lower() in {"0", "false", "no", "off"}:
+        return None
+    default_root = Path(__file__).parents[2] / ".cache" / "extraction"
+    root = Path(os.getenv("SOW_EXTRACTION_CACHE_DIR") or default_root)
+    max_mb = float(os.getenv("SOW_EXTRACTION_CACHE_MAX_MB", "512"))
+    return ExtractionCache(root, max_bytes=int(max_mb * 1024 * 1024))
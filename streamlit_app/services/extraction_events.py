@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Extraction Events
+=================
+
+Structured progress events for the SOW extraction pipeline, published on an
+in-process bus that any number of subscribers consume without blocking the
+workers producing them (Streamlit UI, a JSONL log, a metrics sink, ...).
+
+- ExtractionEvent: one per document/stage transition (start, end, duration,
+  bytes, tokens) or free-form progress message. Document and stage events
+  carry trace/span ids (a trace per document, stages nested under it), so
+  they can be exported as spans (see extraction_tracing)
+- ProgressEventBus: publish() never blocks and is safe from worker threads;
+  each subscriber has its own bounded queue drained by a task on the event
+  loop, so a slow subscriber only delays (or, past its queue size, drops)
+  its own events. Handlers may be plain functions or coroutines.
+- BatchProgress: aggregate batch progress from stage completions across all
+  documents in flight, instead of hardcoded per-stage percentages
+- JsonlEventSink / StageMetrics: ready-made subscribers
+
+Configuration (optional env vars):
+- EXTRACTION_EVENT_QUEUE_SIZE: events buffered per subscriber before the oldest are dropped (default 1000)
+- EXTRACTION_EVENT_LOG: append every event to this JSONL file (subscribed by SOWExtractionService)
+"""
+
+import os
+import json
+import time
+import asyncio
+import inspect
+import threading
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Union
+
+# Event kinds
+DOCUMENT_START = "document_start"
+DOCUMENT_END = "document_end"
+STAGE_START = "stage_start"
+STAGE_END = "stage_end"
+PROGRESS = "progress"
+BATCH_START = "batch_start"
+BATCH_END = "batch_end"
+
+
+@dataclass
+class ExtractionEvent:
+    """One pipeline event; fields that don't apply to a kind stay None"""
+    kind: str
+    stage: Optional[str] = None
+    trace_id: Optional[str] = None
+    span_id: Optional[str] = None
+    parent_id: Optional[str] = None
+    file_name: Optional[str] = None
+    message: Optional[str] = None
+    percentage: Optional[int] = None
+    started_at: Optional[float] = None
+    ended_at: Optional[float] = None
+    duration: Optional[float] = None
+    bytes: Optional[int] = None
+    tokens: Optional[Dict[str, int]] = None
+    error: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+EventHandler = Callable[[ExtractionEvent], Union[None, Awaitable[None]]]
+
+
+class Subscription:
+    """A subscriber's queue and delivery counters"""
+
+    def __init__(self, handler: EventHandler, name: str, max_queue: int):
+        self.handler = handler
+        self.name = name
+        self.max_queue = max_queue
+        self.pending: Deque[ExtractionEvent] = deque()
+        self.task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+
+
+class ProgressEventBus:
+    """Fan-out of ExtractionEvents to subscribers, off the publishing code path"""
+
+    def __init__(self, max_queue: Optional[int] = None):
+        self.max_queue = int(os.getenv("EXTRACTION_EVENT_QUEUE_SIZE", "1000")) if max_queue is None else max_queue
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Deliver on this loop; events published from other threads are handed to it"""
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+
+    def subscribe(self, handler: EventHandler, name: Optional[str] = None,
+                  max_queue: Optional[int] = None) -> Subscription:
+        subscription = Subscription(handler, name or getattr(handler, "__name__", type(handler).__name__),
+                                    max(1, max_queue or self.max_queue))
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        subscription.pending.clear()
+
+    @property
+    def subscriptions(self) -> List[Subscription]:
+        with self._lock:
+            return list(self._subscriptions)
+
+    def publish(self, event: ExtractionEvent) -> None:
+        """Queue an event for every subscriber; never blocks, callable from any thread"""
+        if not self._subscriptions:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None:
+            self._enqueue(event, running)
+            return
+        loop = self._loop
+        if loop is not None and not loop.is_closed() and loop.is_running() \
+                and threading.get_ident() != self._loop_thread_id:
+            try:
+                loop.call_soon_threadsafe(self._enqueue, event, loop)
+                return
+            except RuntimeError:
+                pass  # loop closed in between
+        # No event loop to deliver on (plain sync caller)
+        for subscription in self.subscriptions:
+            self._deliver_sync(subscription, event)
+
+    def _enqueue(self, event: ExtractionEvent, loop: asyncio.AbstractEventLoop) -> None:
+        for subscription in self.subscriptions:
+            if len(subscription.pending) >= subscription.max_queue:
+                subscription.pending.popleft()
+                subscription.dropped += 1
+            subscription.pending.append(event)
+            task = subscription.task
+            if task is None or task.done() or task.get_loop() is not loop:
+                subscription.task = loop.create_task(self._drain(subscription))
+
+    async def _drain(self, subscription: Subscription) -> None:
+        # Runs only while events are pending, so no task outlives the batch
+        while subscription.pending:
+            event = subscription.pending.popleft()
+            try:
+                result = subscription.handler(event)
+                if inspect.isawaitable(result):
+                    await result
+                subscription.delivered += 1
+            except Exception as e:
+                subscription.failed += 1
+                if subscription.failed == 1:
+                    print(f"⚠️ Progress subscriber {subscription.name} failed: {e}")
+            # Let the pipeline run between events
+            await asyncio.sleep(0)
+
+    def _deliver_sync(self, subscription: Subscription, event: ExtractionEvent) -> None:
+        try:
+            result = subscription.handler(event)
+            if inspect.iscoroutine(result):
+                result.close()
+                subscription.dropped += 1
+                return
+            subscription.delivered += 1
+        except Exception as e:
+            subscription.failed += 1
+            if subscription.failed == 1:
+                print(f"⚠️ Progress subscriber {subscription.name} failed: {e}")
+
+    async def flush(self) -> None:
+        """Wait until every subscriber has handled the events published so far"""
+        while True:
+            tasks = [s.task for s in self.subscriptions if s.task is not None and not s.task.done()]
+            if not tasks:
+                return
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class BatchProgress:
+    """Aggregate progress of a batch from per-document stage completions.
+
+    A document's progress is the share of its planned stages that ended
+    (``details["stages"]`` of its document_start event; top-level stages that
+    start without being planned are added, nested spans are ignored). Batch progress is the mean over the
+    batch's documents, so concurrent documents each contribute their real
+    share instead of racing a shared percentage.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, total_documents: int = 0) -> None:
+        with self._lock:
+            self.total_documents = total_documents
+            self._planned: Dict[str, set] = {}
+            self._ended: Dict[str, set] = {}
+            self._done: Dict[str, bool] = {}
+            self._fractions: Dict[str, float] = {}
+            self._roots: Dict[str, Optional[str]] = {}
+
+    def __call__(self, event: ExtractionEvent) -> None:
+        self.observe(event)
+
+    def observe(self, event: ExtractionEvent) -> None:
+        name = event.file_name
+        if event.kind == BATCH_START:
+            self.reset(int((event.details or {}).get("total", 0)))
+            return
+        if not name:
+            return
+        with self._lock:
+            root = self._roots.get(name)
+            if event.kind in (STAGE_START, STAGE_END) and root and event.parent_id and event.parent_id != root:
+                return
+            if event.kind == DOCUMENT_START:
+                self._roots[name] = event.span_id
+                self._planned[name] = set((event.details or {}).get("stages", []))
+                self._ended[name] = set()
+                self._done[name] = False
+                self._fractions[name] = 0.0
+            elif event.kind == STAGE_START and event.stage:
+                self._planned.setdefault(name, set()).add(event.stage)
+            elif event.kind == STAGE_END and event.stage:
+                self._planned.setdefault(name, set()).add(event.stage)
+                self._ended.setdefault(name, set()).add(event.stage)
+            elif event.kind == DOCUMENT_END:
+                self._done[name] = True
+            else:
+                return
+            planned = self._planned.get(name) or set()
+            if self._done.get(name):
+                fraction = 1.0
+            elif planned:
+                # A document is only complete at document_end
+                fraction = min(0.99, len(self._ended.get(name, set()) & planned) / len(planned))
+            else:
+                fraction = 0.0
+            # Never move backwards when a fallback stage joins the plan
+            self._fractions[name] = max(self._fractions.get(name, 0.0), fraction)
+
+    @property
+    def fraction(self) -> float:
+        with self._lock:
+            total = max(self.total_documents, len(self._fractions))
+            if total == 0:
+                return 0.0
+            return sum(self._fractions.values()) / total
+
+    @property
+    def percentage(self) -> int:
+        return int(self.fraction * 100)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            documents = dict(self._fractions)
+            completed = sum(1 for done in self._done.values() if done)
+        return {
+            "total": max(self.total_documents, len(documents)),
+            "completed": completed,
+            "in_progress": len(documents) - completed,
+            "percentage": self.percentage,
+            "documents": documents,
+        }
+
+
+class JsonlEventSink:
+    """Subscriber appending each event as one JSON line"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._handle = None
+        self._lock = threading.Lock()
+
+    def __call__(self, event: ExtractionEvent) -> None:
+        line = json.dumps(event.to_dict(), default=str)
+        with self._lock:
+            if self._handle is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._handle = open(self.path, "a", encoding="utf-8")
+            self._handle.write(line + "\n")
+            self._handle.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+
+class StageMetrics:
+    """Subscriber aggregating count, duration, bytes, tokens and errors per stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def __call__(self, event: ExtractionEvent) -> None:
+        if event.kind != STAGE_END or not event.stage:
+            return
+        with self._lock:
+            stats = self.stages.setdefault(event.stage, {
+                "count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0, "bytes": 0, "tokens": {},
+            })
+            stats["count"] += 1
+            if event.error:
+                stats["errors"] += 1
+            if event.duration is not None:
+                stats["total_seconds"] += event.duration
+                stats["max_seconds"] = max(stats["max_seconds"], event.duration)
+            stats["bytes"] += event.bytes or 0
+            for key, value in (event.tokens or {}).items():
+                stats["tokens"][key] = stats["tokens"].get(key, 0) + int(value or 0)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for stage, stats in self.stages.items():
+                entry = dict(stats, tokens=dict(stats["tokens"]))
+                entry["mean_seconds"] = stats["total_seconds"] / stats["count"] if stats["count"] else 0.0
+                result[stage] = entry
+            return result
+
+
+def planned_stages(use_di: bool, skip_uploads: bool) -> Sequence[str]:
+    """Stages a document is expected to run (targeted staffing joins when DI falls back)"""
+    stages = ["text_extraction", "metadata"]
+    stages.append("di_extraction" if use_di else "staffing")
+    if not skip_uploads:
+        stages += ["upload_raw", "upload_text", "upload_json"]
+    return stages
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Extraction Tracing
+==================
+
+Stage-level spans for the SOW extraction pipeline, built from the document
+and stage events SOWExtractionService publishes (see extraction_events).
+
+Every document is one trace: a root span per document with the pipeline
+stages nested under it (text extraction with PDF parse / native text / OCR
+steps, Document Intelligence analyze with submit/poll timings, the metadata
+and staffing LLM calls with model and prompt/completion tokens, each upload).
+
+- TraceRecorder: event bus subscriber collecting finished spans, optionally
+  streaming them to a JSONL file as they end
+- to_otlp / write_otlp: OpenTelemetry OTLP/JSON trace export (loadable by an
+  OTel collector's file receiver, Jaeger, Tempo, ...)
+- load_spans / summarize / format_summary: per-stage count, p50, p95, max,
+  errors and tokens across a batch (scripts/extraction/trace_summary.py)
+
+Configuration (optional env vars):
+- EXTRACTION_TRACE_JSONL: stream spans to this JSONL file (subscribed by SOWExtractionService)
+- EXTRACTION_TRACE_OTLP: write an OTLP/JSON trace file here after each run
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+try:
+    from .extraction_events import ExtractionEvent, STAGE_END, DOCUMENT_END  # type: ignore
+except Exception:
+    from extraction_events import ExtractionEvent, STAGE_END, DOCUMENT_END  # type: ignore
+
+SERVICE_NAME = "sow-extraction"
+DOCUMENT_SPAN = "document"
+
+
+def span_from_event(event: ExtractionEvent) -> Optional[Dict[str, Any]]:
+    """Span record for a finished document/stage event (None for other events)"""
+    if event.kind not in (STAGE_END, DOCUMENT_END) or event.ended_at is None:
+        return None
+    duration = event.duration or 0.0
+    started_at = event.started_at if event.started_at is not None else event.ended_at - duration
+    span = {
+        "trace_id": event.trace_id,
+        "span_id": event.span_id,
+        "parent_id": event.parent_id,
+        "name": event.stage if event.kind == STAGE_END else DOCUMENT_SPAN,
+        "file_name": event.file_name,
+        "start": started_at,
+        "end": event.ended_at,
+        "duration": duration,
+        "status": "error" if event.error else "ok",
+    }
+    if event.error:
+        span["error"] = event.error
+    if event.bytes is not None:
+        span["bytes"] = event.bytes
+    if event.tokens:
+        span["tokens"] = dict(event.tokens)
+    if event.details:
+        span["attributes"] = dict(event.details)
+    return span
+
+
+class TraceRecorder:
+    """Event bus subscriber collecting finished spans"""
+
+    def __init__(self, jsonl_path: Optional[Union[str, Path]] = None):
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.spans: List[Dict[str, Any]] = []
+        self._handle = None
+        self._lock = threading.Lock()
+
+    def __call__(self, event: ExtractionEvent) -> None:
+        span = span_from_event(event)
+        if span is None:
+            return
+        with self._lock:
+            self.spans.append(span)
+            if self.jsonl_path is not None:
+                if self._handle is None:
+                    self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._handle = open(self.jsonl_path, "a", encoding="utf-8")
+                self._handle.write(json.dumps(span, default=str) + "\n")
+                self._handle.flush()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans = []
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    if isinstance(value, dict):
+        return {"stringValue": json.dumps(value, default=str)}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(span: Dict[str, Any]) -> List[Dict[str, Any]]:
+    attributes: Dict[str, Any] = {}
+    if span.get("file_name"):
+        attributes["sow.file_name"] = span["file_name"]
+    if span.get("bytes") is not None:
+        attributes["sow.bytes"] = span["bytes"]
+    for key, value in (span.get("tokens") or {}).items():
+        # OpenTelemetry GenAI semantic conventions
+        name = {"prompt": "input_tokens", "completion": "output_tokens"}.get(key, key)
+        attributes[f"gen_ai.usage.{name}"] = value
+    for key, value in (span.get("attributes") or {}).items():
+        if value is None:
+            continue
+        attributes["gen_ai.request.model" if key == "model" else f"sow.{key}"] = value
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def to_otlp(spans: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest for span records"""
+    otlp_spans = []
+    for span in spans:
+        if not span.get("trace_id") or not span.get("span_id"):
+            continue
+        entry = {
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "name": span["name"],
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(int(span["start"] * 1e9)),
+            "endTimeUnixNano": str(int(span["end"] * 1e9)),
+            "attributes": _otlp_attributes(span),
+            "status": {"code": 2, "message": span.get("error", "")} if span.get("status") == "error" else {"code": 1},
+        }
+        if span.get("parent_id"):
+            entry["parentSpanId"] = span["parent_id"]
+        otlp_spans.append(entry)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "sow_extraction_service"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+def write_otlp(spans: Iterable[Dict[str, Any]], path: Union[str, Path]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(to_otlp(spans)), encoding="utf-8")
+    return path
+
+
+def _from_otlp(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    spans = []
+    for resource_spans in payload.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for entry in scope_spans.get("spans", []):
+                attributes = {}
+                for attribute in entry.get("attributes", []):
+                    value = attribute.get("value", {})
+                    raw = next(iter(value.values()), None) if value else None
+                    attributes[attribute.get("key")] = int(raw) if "intValue" in value else raw
+                tokens = {key.rsplit(".", 1)[-1].replace("input_tokens", "prompt").replace("output_tokens", "completion"): v
+                          for key, v in attributes.items() if key.startswith("gen_ai.usage.")}
+                start = int(entry.get("startTimeUnixNano", 0)) / 1e9
+                end = int(entry.get("endTimeUnixNano", 0)) / 1e9
+                error = entry.get("status", {}).get("code") == 2
+                spans.append({
+                    "trace_id": entry.get("traceId"),
+                    "span_id": entry.get("spanId"),
+                    "parent_id": entry.get("parentSpanId"),
+                    "name": entry.get("name"),
+                    "file_name": attributes.get("sow.file_name"),
+                    "start": start,
+                    "end": end,
+                    "duration": end - start,
+                    "status": "error" if error else "ok",
+                    "tokens": tokens,
+                    "attributes": {"model": attributes["gen_ai.request.model"]} if "gen_ai.request.model" in attributes else {},
+                })
+    return spans
+
+
+def load_spans(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """Spans from a TraceRecorder JSONL file, an event log (EXTRACTION_EVENT_LOG) or an OTLP/JSON file"""
+    text = Path(path).read_text(encoding="utf-8")
+    stripped = text.lstrip()
+    if stripped.startswith("{") and '"resourceSpans"' in stripped[:200]:
+        return _from_otlp(json.loads(text))
+    spans = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "kind" in record:
+            # Raw event log line
+            fields = ExtractionEvent.__dataclass_fields__
+            span = span_from_event(ExtractionEvent(**{k: v for k, v in record.items() if k in fields}))
+            if span is not None:
+                spans.append(span)
+        elif "name" in record and "duration" in record:
+            spans.append(record)
+    return spans
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(spans: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per span name: count, errors, p50/p95/max/total seconds, bytes and token totals"""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        grouped.setdefault(span["name"], []).append(span)
+    summary = {}
+    for name, group in grouped.items():
+        durations = [float(s.get("duration") or 0.0) for s in group]
+        tokens: Dict[str, int] = {}
+        models = set()
+        for span in group:
+            for key, value in (span.get("tokens") or {}).items():
+                tokens[key] = tokens.get(key, 0) + int(value or 0)
+            model = (span.get("attributes") or {}).get("model")
+            if model:
+                models.add(model)
+        summary[name] = {
+            "count": len(group),
+            "errors": sum(1 for s in group if s.get("status") == "error"),
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "max": max(durations),
+            "total": sum(durations),
+            "bytes": sum(int(s.get("bytes") or 0) for s in group),
+            "tokens": tokens,
+            "models": sorted(models),
+        }
+    return summary
+
+
+def format_summary(summary: Dict[str, Dict[str, Any]]) -> str:
+    """Fixed-width table of a summarize() result, slowest total first"""
+    header = f"{'stage':<28} {'count':>6} {'err':>4} {'p50 s':>9} {'p95 s':>9} {'max s':>9} {'total s':>10} {'tokens in/out':>16}"
+    lines = [header, "-" * len(header)]
+    for name, stats in sorted(summary.items(), key=lambda item: item[1]["total"], reverse=True):
+        tokens = stats["tokens"]
+        token_text = f"{tokens.get('prompt', 0)}/{tokens.get('completion', 0)}" if tokens else "-"
+        lines.append(
+            f"{name:<28} {stats['count']:>6} {stats['errors']:>4} {stats['p50']:>9.3f} {stats['p95']:>9.3f} "
+            f"{stats['max']:>9.3f} {stats['total']:>10.2f} {token_text:>16}"
+        )
+    return "\n".join(lines)
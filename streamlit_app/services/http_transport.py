@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+HTTP Transport
+==============
+
+Shared HTTP transport for the search services and embedding calls (Azure AI
+Search, Azure OpenAI), with one sync and one async facade:
+- keep-alive connection pools (one sync client per process, one async client
+  per event loop, closed when its loop shuts down), HTTP/2 when the `h2`
+  package is installed
+- gzip-compressed request bodies above a size threshold (vector queries are
+  ~30 KB of JSON); responses are gzip-negotiated automatically. If a host
+  rejects a compressed body but accepts the same request plain, it is sent
+  plain requests from then on
+- retry with jittered exponential backoff on 429/502/503/504 and connection
+  errors, honouring Retry-After
+
+Both facades return httpx.Response (status_code, json(), text), which the
+services already read the same way as requests' responses.
+
+Configuration (optional env vars):
+- HTTP_MAX_CONNECTIONS: pool size per client (default 32)
+- HTTP_TIMEOUT: default request timeout in seconds (default 60)
+- HTTP_MAX_RETRIES: retries on throttling/transient errors (default 3)
+- HTTP_GZIP_MIN_BYTES: compress request bodies at least this large; 0 disables (default 16384)
+"""
+
+import os
+import gzip
+import json
+import time
+import random
+import asyncio
+import threading
+from typing import Any, AsyncGenerator, Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+RETRY_STATUSES = {429, 502, 503, 504}
+# Statuses a server may answer a compressed body it cannot read with
+_GZIP_REJECTED_STATUSES = {400, 415}
+
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+
+class _TransportPolicy:
+    """Settings and request preparation shared by the sync and async facades"""
+
+    def __init__(self):
+        self.max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+        self.timeout = float(os.getenv("HTTP_TIMEOUT", "60"))
+        self.max_retries = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+        self.gzip_min_bytes = int(os.getenv("HTTP_GZIP_MIN_BYTES", "16384"))
+        self._no_gzip_hosts: Set[str] = set()
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def prepare(self, url: str, headers: Optional[Dict[str, str]], json_body: Any,
+                compress: bool = True) -> Tuple[Dict[str, str], Optional[bytes], bool]:
+        """Encode the JSON body, gzip it when large enough; returns (headers, content, compressed)"""
+        headers = dict(headers or {})
+        if json_body is None:
+            return headers, None, False
+        content = json.dumps(json_body).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+        if (compress and self.gzip_min_bytes > 0 and len(content) >= self.gzip_min_bytes
+                and urlsplit(url).netloc not in self._no_gzip_hosts):
+            headers["Content-Encoding"] = "gzip"
+            return headers, gzip.compress(content, compresslevel=5), True
+        return headers, content, False
+
+    def gzip_maybe_rejected(self, response: httpx.Response, compressed: bool) -> bool:
+        """The server may have refused a compressed body: worth one plain retry"""
+        return compressed and response.status_code in _GZIP_REJECTED_STATUSES
+
+    def disable_gzip(self, url: str) -> None:
+        self._no_gzip_hosts.add(urlsplit(url).netloc)
+
+    def retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Retry-After when given, else exponential backoff with full jitter"""
+        if response is not None:
+            try:
+                return min(60.0, max(0.0, float(response.headers.get("retry-after", ""))))
+            except ValueError:
+                pass
+        return random.uniform(0, min(30.0, 0.5 * (2 ** attempt)))
+
+
+class HTTPTransport:
+    """Sync facade: pooled keep-alive client with gzip and retries"""
+
+    def __init__(self, policy: Optional[_TransportPolicy] = None):
+        self.policy = policy or _TransportPolicy()
+        self._client = httpx.Client(http2=_HTTP2, timeout=self.policy.timeout, limits=self.policy.limits())
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, json: Any = None,
+                params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> httpx.Response:
+        compress = True
+        plain_retry = False
+        attempt = 0
+        while True:
+            send_headers, content, compressed = self.policy.prepare(url, headers, json, compress)
+            try:
+                response = self._client.request(method, url, headers=send_headers, content=content, params=params,
+                                                timeout=timeout if timeout is not None else self.policy.timeout)
+            except httpx.TransportError:
+                if attempt >= self.policy.max_retries:
+                    raise
+                time.sleep(self.policy.retry_delay(attempt))
+                attempt += 1
+                continue
+            if self.policy.gzip_maybe_rejected(response, compressed):
+                compress = False
+                plain_retry = True
+                continue
+            if plain_retry and response.status_code < 400:
+                self.policy.disable_gzip(url)
+                plain_retry = False
+            if response.status_code in RETRY_STATUSES and attempt < self.policy.max_retries:
+                time.sleep(self.policy.retry_delay(attempt, response))
+                attempt += 1
+                continue
+            return response
+
+    def post(self, url: str, headers: Optional[Dict[str, str]] = None, json: Any = None,
+             timeout: Optional[float] = None) -> httpx.Response:
+        return self.request("POST", url, headers=headers, json=json, timeout=timeout)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None,
+            timeout: Optional[float] = None) -> httpx.Response:
+        return self.request("GET", url, headers=headers, params=params, timeout=timeout)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+async def _loop_lifetime(client: httpx.AsyncClient) -> AsyncGenerator[None, None]:
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+def _close_at_loop_shutdown(client: httpx.AsyncClient) -> AsyncGenerator[None, None]:
+    """Park an async generator on the running loop that closes the client on that loop's shutdown.
+
+    asyncio.run() (and loop.shutdown_asyncgens()) finalizes pending async
+    generators before closing the loop, which is the last moment the client's
+    connections can still be closed cleanly. The caller keeps the reference:
+    the loop only tracks async generators weakly.
+    """
+    guard = _loop_lifetime(client)
+    step = guard.__anext__()
+    try:
+        # Runs up to the yield without awaiting, which registers the generator with the loop
+        step.send(None)
+    except StopIteration:
+        pass
+    return guard
+
+
+class AsyncHTTPTransport:
+    """Async facade: one pooled client per event loop, same gzip and retry policy"""
+
+    def __init__(self, policy: Optional[_TransportPolicy] = None):
+        self.policy = policy or _TransportPolicy()
+        # loop id -> (loop, client, async generator that closes the client when the loop shuts down)
+        self._clients: Dict[int, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient, AsyncGenerator[None, None]]] = {}
+        self._lock = threading.Lock()
+        self._closing: Set[asyncio.Task] = set()
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        stale = []
+        with self._lock:
+            # Clients are bound to the loop that created them; close those of closed loops
+            for key, (other_loop, other_client, _) in list(self._clients.items()):
+                if other_loop.is_closed() or (key == id(loop) and other_loop is not loop):
+                    stale.append(other_client)
+                    del self._clients[key]
+            entry = self._clients.get(id(loop))
+            if entry is None or entry[1].is_closed:
+                client = self._build_client()
+                self._clients[id(loop)] = (loop, client, _close_at_loop_shutdown(client))
+            else:
+                client = entry[1]
+        for old_client in stale:
+            task = loop.create_task(self._close_stale(old_client))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        return client
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(http2=_HTTP2, timeout=self.policy.timeout, limits=self.policy.limits())
+
+    @staticmethod
+    async def _close_stale(client: httpx.AsyncClient) -> None:
+        # Only reached for loops closed without shutdown_asyncgens(): closing raises once the
+        # pool is released, and the orphaned sockets are freed with their transports
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+    async def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, json: Any = None,
+                      params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> httpx.Response:
+        client = self._client()
+        compress = True
+        plain_retry = False
+        attempt = 0
+        while True:
+            send_headers, content, compressed = self.policy.prepare(url, headers, json, compress)
+            try:
+                response = await client.request(method, url, headers=send_headers, content=content, params=params,
+                                                timeout=timeout if timeout is not None else self.policy.timeout)
+            except httpx.TransportError:
+                if attempt >= self.policy.max_retries:
+                    raise
+                await asyncio.sleep(self.policy.retry_delay(attempt))
+                attempt += 1
+                continue
+            if self.policy.gzip_maybe_rejected(response, compressed):
+                compress = False
+                plain_retry = True
+                continue
+            if plain_retry and response.status_code < 400:
+                self.policy.disable_gzip(url)
+                plain_retry = False
+            if response.status_code in RETRY_STATUSES and attempt < self.policy.max_retries:
+                await asyncio.sleep(self.policy.retry_delay(attempt, response))
+                attempt += 1
+                continue
+            return response
+
+    async def post(self, url: str, headers: Optional[Dict[str, str]] = None, json: Any = None,
+                   timeout: Optional[float] = None) -> httpx.Response:
+        return await self.request("POST", url, headers=headers, json=json, timeout=timeout)
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None,
+                  timeout: Optional[float] = None) -> httpx.Response:
+        return await self.request("GET", url, headers=headers, params=params, timeout=timeout)
+
+    async def aclose(self) -> None:
+        """Close the current loop's client"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.pop(id(loop), None)
+        if entry is not None:
+            await entry[2].aclose()
+
+
+# Global instances for caching
+_policy = None
+_http_transport = None
+_async_http_transport = None
+_transport_lock = threading.Lock()
+
+def _get_policy() -> _TransportPolicy:
+    global _policy
+    if _policy is None:
+        _policy = _TransportPolicy()
+    return _policy
+
+def get_http_transport() -> HTTPTransport:
+    """Get or create the process-wide sync transport"""
+    global _http_transport
+    with _transport_lock:
+        if _http_transport is None:
+            _http_transport = HTTPTransport(_get_policy())
+        return _http_transport
+
+def get_async_http_transport() -> AsyncHTTPTransport:
+    """Get or create the process-wide async transport"""
+    global _async_http_transport
+    with _transport_lock:
+        if _async_http_transport is None:
+            _async_http_transport = AsyncHTTPTransport(_get_policy())
+        return _async_http_transport
@@ -9,20 +9,87 @@ This service provides:
 - Parsed data vector search using structured fields
 - Hybrid ranking that combines both approaches
 - Multiple vector field search capabilities
+
+Results carry the "card" projection by default (see search_projections);
+raw_content is fetched per document with get_document_fields.
+
+Hybrid queries go out as one request: all four vector fields (weighted) plus
+BM25 text, fused server-side with RRF (see build_hybrid_query). Set
+HYBRID_QUERY_MODE=legs to issue per-field requests and fuse client-side.
 """
 
 import os
-import json
-import requests
-import aiohttp
 import asyncio
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 from dotenv import load_dotenv
-from azure.identity.aio import DefaultAzureCredential
-from azure.storage.blob.aio import BlobServiceClient
-from azure.identity import DefaultAzureCredential as SyncDefaultAzureCredential
-from azure.storage.blob import BlobServiceClient as SyncBlobServiceClient
+try:
+    from .embedding_cache import get_query_embedding_cache, get_query_embedding_sync  # type: ignore
+except Exception:
+    from embedding_cache import get_query_embedding_cache, get_query_embedding_sync  # type: ignore
+try:
+    from .http_transport import get_http_transport, get_async_http_transport  # type: ignore
+except Exception:
+    from http_transport import get_http_transport, get_async_http_transport  # type: ignore
+try:
+    from .result_fusion import RRF_K, FusionLeg, fuse_results, result_key  # type: ignore
+except Exception:
+    from result_fusion import RRF_K, FusionLeg, fuse_results, result_key  # type: ignore
+try:
+    from .search_projections import HEAVY_FIELDS, fetch_document_fields, select_for  # type: ignore
+except Exception:
+    from search_projections import HEAVY_FIELDS, fetch_document_fields, select_for  # type: ignore
+try:
+    from .parsed_blob_cache import get_parsed_blob_cache  # type: ignore
+except Exception:
+    from parsed_blob_cache import get_parsed_blob_cache  # type: ignore
+
+# Per-vector weights require api-version 2024-07-01 or later
+MULTI_VECTOR_API_VERSION = "2024-07-01"
+
+# Vector query weights, relative to the BM25 text leg (fixed at 1.0 by the service)
+VECTOR_FIELD_WEIGHTS = {
+    'full_text_vector': 1.2,
+    'parsed_content_vector': 0.8,
+    'scope_vector': 0.4,
+    'deliverables_vector': 0.4,
+}
+
+TEXT_SEARCH_FIELDS = ["client_name", "project_title", "scope_summary", "deliverables", "staffing_plan", "raw_content"]
+
+
+def build_hybrid_query(
+    query_embedding: List[float],
+    text: Optional[str],
+    field_weights: Dict[str, float],
+    top: int = 10,
+    skip: int = 0,
+    filter_expression: Optional[str] = None,
+    k: Optional[int] = None,
+    select: str = "*",
+) -> Dict[str, Any]:
+    """Search payload with one weighted vector query per field plus optional BM25 text"""
+    payload: Dict[str, Any] = {
+        "vectorQueries": [
+            {
+                "kind": "vector",
+                "vector": query_embedding,
+                "k": k or (top + skip) * 2,
+                "fields": field,
+                "weight": weight
+            }
+            for field, weight in field_weights.items() if weight > 0
+        ],
+        "select": select,
+        "top": top,
+        "skip": skip
+    }
+    if text:
+        payload["search"] = text
+        payload["searchFields"] = ",".join(TEXT_SEARCH_FIELDS)
+    if filter_expression:
+        payload["filter"] = filter_expression
+    return payload
 
 
 class HybridSearchService:
@@ -36,7 +103,6 @@ class HybridSearchService:
         self.openai_deployment = None
         self.index_name = "octagon-sows-hybrid"
         self._load_environment()
-        self._blob_client = None
     
     def _load_environment(self):
         """Load environment variables"""
@@ -58,65 +124,30 @@ class HybridSearchService:
         # Remove trailing slash if present
         self.search_endpoint = self.search_endpoint.rstrip('/')
 
-    async def _ensure_blob_client(self):
-        if self._blob_client is None and self.storage_account_url:
-            cred = DefaultAzureCredential()
-            self._blob_client = BlobServiceClient(account_url=self.storage_account_url, credential=cred)
-
-    async def _download_parsed_json(self, file_name: str) -> Optional[Dict[str, Any]]:
-        try:
-            await self._ensure_blob_client()
-            if not self._blob_client:
-                return None
-            base = file_name.replace('.pdf', '').replace('.docx', '')
-            blob_name = f"{base}_parsed.json"
-            bc = self._blob_client.get_blob_client(container="parsed", blob=blob_name)
-            data = await bc.download_blob()
-            content = await data.readall()
-            return json.loads(content.decode('utf-8'))
-        except Exception:
-            return None
-
     def _hydrate_structured_staffing(self, docs: List[Dict[str, Any]]):
         """Attach structured staffing from parsed blobs to result docs.
-        Uses synchronous blob download to avoid asyncio event loop conflicts in Streamlit.
+        All blobs are fetched concurrently through the shared ETag-validated cache.
         """
         try:
-            # Initialize synchronous blob client
-            if not hasattr(self, '_sync_blob_client') and self.storage_account_url:
-                cred = SyncDefaultAzureCredential()
-                self._sync_blob_client = SyncBlobServiceClient(account_url=self.storage_account_url, credential=cred)
-            
-            if not self._sync_blob_client:
+            cache = get_parsed_blob_cache()
+            if cache is None:
                 return
-                
+            names = {id(d): (d.get('file_name') or d.get('id') or '').strip() for d in docs}
+            plans = cache.staffing_plans(list(names.values()))
             for d in docs:
-                fn = (d.get('file_name') or d.get('id') or '').strip()
-                if not fn:
-                    continue
-                
-                try:
-                    # Use synchronous blob download
-                    base = fn.replace('.pdf', '').replace('.docx', '')
-                    blob_name = f"{base}_parsed.json"
-                    blob_client = self._sync_blob_client.get_blob_client(container="parsed", blob=blob_name)
-                    
-                    # Download blob content synchronously
-                    blob_data = blob_client.download_blob()
-                    content = blob_data.readall()
-                    parsed = json.loads(content.decode('utf-8'))
-                    
-                    if isinstance(parsed, dict) and isinstance(parsed.get('staffing_plan'), list):
-                        d['staffing_plan_structured'] = parsed['staffing_plan']
-                except Exception:
-                    # If blob download fails, continue without structured data
-                    continue
+                plan = plans.get(names[id(d)])
+                if plan is not None:
+                    d['staffing_plan_structured'] = plan
         except Exception:
-            # If blob client initialization fails, continue without hydration
+            # If blob access fails, continue without structured data
             pass
     
     async def get_query_embedding(self, query: str) -> List[float]:
-        """Get vector embedding for search query"""
+        """Get vector embedding for search query (served from the shared cache when possible)"""
+        cache = get_query_embedding_cache()
+        cached = cache.get(self.openai_deployment, query)
+        if cached is not None:
+            return cached
         try:
             url = f"{self.openai_endpoint}openai/deployments/{self.openai_deployment}/embeddings?api-version=2024-08-01-preview"
             headers = {
@@ -127,19 +158,22 @@ class HybridSearchService:
                 'input': query
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result['data'][0]['embedding']
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ Error getting query embedding: {response.status} - {error_text}")
-                        return None
+            response = await get_async_http_transport().post(url, headers=headers, json=data)
+            if response.status_code == 200:
+                embedding = response.json()['data'][0]['embedding']
+                cache.put(self.openai_deployment, query, embedding)
+                return embedding
+            else:
+                print(f"❌ Error getting query embedding: {response.status_code} - {response.text}")
+                return None
         except Exception as e:
             print(f"❌ Error getting query embedding: {e}")
             return None
     
+    def _get_query_embedding_sync(self, query: str) -> Optional[List[float]]:
+        """Resolve a query embedding from sync code on the pooled sync transport (no event loop)"""
+        return get_query_embedding_sync(self.openai_endpoint, self.openai_api_key, self.openai_deployment, query)
+    
     def hybrid_vector_search(
         self, 
         query: str, 
@@ -147,79 +181,110 @@ class HybridSearchService:
         skip: int = 0,
         filter_expression: Optional[str] = None,
         full_text_weight: float = 0.6,
-        parsed_weight: float = 0.4
+        parsed_weight: float = 0.4,
+        fusion_method: Optional[str] = None,
+        projection: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Perform hybrid vector search by combining individual vector searches"""
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, self.get_query_embedding(query))
-                    query_embedding = future.result()
-            else:
-                query_embedding = asyncio.run(self.get_query_embedding(query))
-        except:
-            query_embedding = asyncio.run(self.get_query_embedding(query))
-            
+        """Perform hybrid search: one multi-vector + text request, or per-field requests fused client-side"""
+        # Embed once and share the vector with every vector query
+        query_embedding = self._get_query_embedding_sync(query)
         if not query_embedding:
             return {"error": "Failed to get query embedding"}
         
-        # Get results from both individual searches
-        full_text_results = self.full_text_vector_search(query, top=top*2, skip=skip, filter_expression=filter_expression)
-        parsed_results = self.parsed_data_vector_search(query, top=top*2, skip=skip, filter_expression=filter_expression)
-        
-        # Combine and deduplicate results
-        all_results = []
-        seen_ids = set()
-        
-        # Add full text results with weight
-        if full_text_results and 'value' in full_text_results:
-            for doc in full_text_results['value']:
-                if doc['id'] not in seen_ids:
-                    doc['search_strategy'] = 'hybrid_full_text'
-                    doc['strategy_score'] = doc.get('@search.score', 0.0) * full_text_weight
-                    all_results.append(doc)
-                    seen_ids.add(doc['id'])
+        if os.getenv("HYBRID_QUERY_MODE", "single").strip().lower() != "legs":
+            field_weights = dict(VECTOR_FIELD_WEIGHTS)
+            # Keep the caller's full text / parsed balance (defaults 0.6 / 0.4 -> 1.2 / 0.8)
+            field_weights['full_text_vector'] = 2 * full_text_weight
+            field_weights['parsed_content_vector'] = 2 * parsed_weight
+            result = self.multi_vector_search(
+                query, top=top, skip=skip, filter_expression=filter_expression,
+                field_weights=field_weights, query_embedding=query_embedding, projection=projection
+            )
+            if 'error' not in result:
+                return result
+            print(f"⚠️ Single-request hybrid query failed, falling back to per-field requests: {result['error']}")
         
-        # Add parsed results with weight
-        if parsed_results and 'value' in parsed_results:
-            for doc in parsed_results['value']:
-                if doc['id'] not in seen_ids:
-                    doc['search_strategy'] = 'hybrid_parsed'
-                    doc['strategy_score'] = doc.get('@search.score', 0.0) * parsed_weight
-                    all_results.append(doc)
-                    seen_ids.add(doc['id'])
-                else:
-                    # If document already exists, combine scores
-                    for existing_doc in all_results:
-                        if existing_doc['id'] == doc['id']:
-                            existing_doc['strategy_score'] += doc.get('@search.score', 0.0) * parsed_weight
-                            existing_doc['search_strategy'] = 'hybrid_combined'
-                            break
+        # Get results from both individual searches
+        full_text_results = self.full_text_vector_search(
+            query, top=top*2, skip=skip, filter_expression=filter_expression, query_embedding=query_embedding,
+            projection=projection
+        )
+        parsed_results = self.parsed_data_vector_search(
+            query, top=top*2, skip=skip, filter_expression=filter_expression, query_embedding=query_embedding,
+            projection=projection
+        )
         
-        # Deduplicate by file_name (fallback to id) keeping the highest score
-        dedup: Dict[str, Any] = {}
-        for doc in all_results:
-            key = (doc.get('file_name') or '').strip() or doc.get('id')
-            if key not in dedup or doc.get('strategy_score', 0.0) > dedup[key].get('strategy_score', 0.0):
-                dedup[key] = doc
-
-        deduped_results = list(dedup.values())
-        deduped_results.sort(key=lambda x: x.get('strategy_score', 0.0), reverse=True)
+        # Fuse both legs in one pass, one result per file_name (fallback to id)
+        legs = [
+            FusionLeg('full_text', (full_text_results or {}).get('value', []), full_text_weight),
+            FusionLeg('parsed', (parsed_results or {}).get('value', []), parsed_weight),
+        ]
+        fused = fuse_results(legs, method=fusion_method)
         
         # Return top results
         return {
-            'value': deduped_results[:top],
-            '@odata.count': len(deduped_results)
+            'value': fused[:top],
+            '@odata.count': len(fused)
+        }
+    
+    def multi_vector_search(
+        self,
+        query: str,
+        top: int = 10,
+        skip: int = 0,
+        filter_expression: Optional[str] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        include_text: bool = True,
+        query_embedding: Optional[List[float]] = None,
+        projection: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One request: weighted vector queries over all vector fields plus BM25 text, fused by the service"""
+        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version={MULTI_VECTOR_API_VERSION}"
+        
+        headers = {
+            'Content-Type': 'application/json',
+            'api-key': self.search_key
         }
+        
+        if query_embedding is None:
+            query_embedding = self._get_query_embedding_sync(query)
+        if not query_embedding:
+            return {"error": "Failed to get query embedding"}
+        
+        field_weights = field_weights or VECTOR_FIELD_WEIGHTS
+        payload = build_hybrid_query(
+            query_embedding, query if include_text else None, field_weights,
+            top=top, skip=skip, filter_expression=filter_expression, select=select_for(projection)
+        )
+        # Scale the service's RRF score to 0-1 (1.0 = ranked first by every leg)
+        best_possible = (sum(w for w in field_weights.values() if w > 0) + (1.0 if include_text else 0.0)) / (RRF_K + 1)
+        
+        try:
+            response = get_http_transport().post(url, headers=headers, json=payload)
+            
+            if response.status_code == 200:
+                result = response.json()
+                # One result per file_name (fallback to id), in service rank order
+                dedup: Dict[str, Any] = {}
+                for doc in result.get('value', []):
+                    doc['search_strategy'] = 'hybrid_multi_vector'
+                    doc['strategy_score'] = min(1.0, doc.get('@search.score', 0.0) / best_possible)
+                    dedup.setdefault(result_key(doc), doc)
+                return {'value': list(dedup.values()), '@odata.count': len(dedup)}
+            else:
+                return {"error": f"Search failed: {response.status_code} - {response.text}"}
+                
+        except Exception as e:
+            return {"error": f"Search failed: {e}"}
     
     def full_text_vector_search(
         self, 
         query: str, 
         top: int = 10,
         skip: int = 0,
-        filter_expression: Optional[str] = None
+        filter_expression: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None,
+        projection: Optional[str] = None
     ) -> Dict[str, Any]:
         """Perform vector search using only full text embeddings"""
         url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
@@ -229,19 +294,9 @@ class HybridSearchService:
             'api-key': self.search_key
         }
         
-        # Get query embedding
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, self.get_query_embedding(query))
-                    query_embedding = future.result()
-            else:
-                query_embedding = asyncio.run(self.get_query_embedding(query))
-        except:
-            query_embedding = asyncio.run(self.get_query_embedding(query))
-            
+        # Get query embedding (reuse a precomputed vector when provided)
+        if query_embedding is None:
+            query_embedding = self._get_query_embedding_sync(query)
         if not query_embedding:
             return {"error": "Failed to get query embedding"}
         
@@ -254,7 +309,7 @@ class HybridSearchService:
                     "fields": "full_text_vector"
                 }
             ],
-            "select": "*",
+            "select": select_for(projection),
             "top": top,
             "skip": skip
         }
@@ -263,7 +318,7 @@ class HybridSearchService:
             payload["filter"] = filter_expression
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = get_http_transport().post(url, headers=headers, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -282,7 +337,9 @@ class HybridSearchService:
         query: str, 
         top: int = 10,
         skip: int = 0,
-        filter_expression: Optional[str] = None
+        filter_expression: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None,
+        projection: Optional[str] = None
     ) -> Dict[str, Any]:
         """Perform vector search using only parsed data embeddings"""
         url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
@@ -292,19 +349,9 @@ class HybridSearchService:
             'api-key': self.search_key
         }
         
-        # Get query embedding
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, self.get_query_embedding(query))
-                    query_embedding = future.result()
-            else:
-                query_embedding = asyncio.run(self.get_query_embedding(query))
-        except:
-            query_embedding = asyncio.run(self.get_query_embedding(query))
-            
+        # Get query embedding (reuse a precomputed vector when provided)
+        if query_embedding is None:
+            query_embedding = self._get_query_embedding_sync(query)
         if not query_embedding:
             return {"error": "Failed to get query embedding"}
         
@@ -317,7 +364,7 @@ class HybridSearchService:
                     "fields": "parsed_content_vector"
                 }
             ],
-            "select": "*",
+            "select": select_for(projection),
             "top": top,
             "skip": skip
         }
@@ -326,7 +373,7 @@ class HybridSearchService:
             payload["filter"] = filter_expression
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = get_http_transport().post(url, headers=headers, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -345,7 +392,8 @@ class HybridSearchService:
         query: str, 
         top: int = 10,
         skip: int = 0,
-        filter_expression: Optional[str] = None
+        filter_expression: Optional[str] = None,
+        projection: Optional[str] = None
     ) -> Dict[str, Any]:
         """Perform semantic search with ranking using the hybrid index"""
         url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
@@ -357,7 +405,7 @@ class HybridSearchService:
         
         payload = {
             "search": query,
-            "select": "*",
+            "select": select_for(projection),
             "top": top,
             "skip": skip,
             "queryType": "semantic",
@@ -378,7 +426,7 @@ class HybridSearchService:
             payload["filter"] = filter_expression
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = get_http_transport().post(url, headers=headers, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -398,17 +446,21 @@ class HybridSearchService:
         search_type: str = "hybrid",
         top: int = 10,
         skip: int = 0,
-        filter_expression: Optional[str] = None
+        filter_expression: Optional[str] = None,
+        projection: Optional[str] = None
     ) -> Dict[str, Any]:
         """Main search method with different search types"""
+        kwargs = dict(top=top, skip=skip, filter_expression=filter_expression, projection=projection)
         if search_type == "hybrid":
-            result = self.hybrid_vector_search(query, top=top, skip=skip, filter_expression=filter_expression)
+            result = self.hybrid_vector_search(query, **kwargs)
+        elif search_type == "multi_vector":
+            result = self.multi_vector_search(query, **kwargs)
         elif search_type == "full_text":
-            result = self.full_text_vector_search(query, top=top, skip=skip, filter_expression=filter_expression)
+            result = self.full_text_vector_search(query, **kwargs)
         elif search_type == "parsed":
-            result = self.parsed_data_vector_search(query, top=top, skip=skip, filter_expression=filter_expression)
+            result = self.parsed_data_vector_search(query, **kwargs)
         elif search_type == "semantic":
-            result = self.semantic_search(query, top=top, skip=skip, filter_expression=filter_expression)
+            result = self.semantic_search(query, **kwargs)
         else:
             return {"error": f"Unknown search type: {search_type}"}
 
@@ -420,10 +472,24 @@ class HybridSearchService:
         except Exception:
             pass
         return result
+    
+    def get_document_fields(self, doc_id: str, fields=HEAVY_FIELDS) -> Optional[Dict[str, Any]]:
+        """Fetch fields left out of search projections (e.g. raw_content) for one document"""
+        return fetch_document_fields(self.search_endpoint, self.search_key, self.index_name, doc_id, fields)
 
 
 def get_hybrid_search_service() -> HybridSearchService:
-    """Get an instance of the hybrid search service"""
+    """Get an instance of the hybrid search service.
+
+    SEARCH_BACKEND=local serves vector searches from the local snapshot
+    (LocalVectorSearchService) instead of Azure AI Search.
+    """
+    if os.getenv("SEARCH_BACKEND", "azure").strip().lower() == "local":
+        try:
+            from .local_vector_search_service import get_local_vector_search_service  # type: ignore
+        except Exception:
+            from local_vector_search_service import get_local_vector_search_service  # type: ignore
+        return get_local_vector_search_service()
     return HybridSearchService()
 
 
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Index Metadata
+==============
+
+Cheap metadata queries for filter dropdowns and index statistics, shared by
+AzureSearchService, SemanticSearchService, EnhancedSearchService and
+SimpleSemanticSearchService.
+
+Instead of fetching up to 1000 full documents (raw_content and all), values
+come from Azure Search facets (`top: 0`, so no documents are returned), the
+document total from `$count`, and the date range from two `top: 1` sorted
+queries selecting only the date field. Results are cached per index for a
+short TTL, so re-rendering a Streamlit page costs no requests at all.
+
+If a field is not facetable in an index, its values are read with a scan
+that selects only that field.
+
+Configuration (optional env vars):
+- INDEX_METADATA_TTL: seconds to cache metadata results (default 300, 0 disables)
+- INDEX_METADATA_MAX_VALUES: max distinct values per facet (default 1000)
+"""
+
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+try:
+    from .http_transport import get_http_transport  # type: ignore
+except Exception:
+    from http_transport import get_http_transport  # type: ignore
+
+SEARCH_API_VERSION = "2023-11-01"
+
+
+class IndexMetadata:
+    """Facet / $count backed metadata for one search index, with a TTL cache"""
+
+    def __init__(self, search_endpoint: str, search_key: str, index_name: str,
+                 ttl_seconds: Optional[float] = None, max_values: Optional[int] = None):
+        self.search_endpoint = search_endpoint.rstrip('/')
+        self.search_key = search_key
+        self.index_name = index_name
+        self.ttl_seconds = float(os.getenv("INDEX_METADATA_TTL", "300")) if ttl_seconds is None else ttl_seconds
+        self.max_values = int(os.getenv("INDEX_METADATA_MAX_VALUES", "1000")) if max_values is None else max_values
+        self._cache: Dict[Tuple[Any, ...], Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def _headers(self) -> Dict[str, str]:
+        return {'Content-Type': 'application/json', 'api-key': self.search_key}
+
+    def _cached(self, key: Tuple[Any, ...], compute: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                return entry[1]
+        value = compute()
+        # Failed lookups (None) are not cached, so the next render retries
+        if value is not None and self.ttl_seconds > 0:
+            with self._lock:
+                self._cache[key] = (now, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _search(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version={SEARCH_API_VERSION}"
+        response = get_http_transport().post(url, headers=self._headers, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        print(f"Metadata query error: {response.status_code} - {response.text}")
+        return None
+
+    def _facet_values(self, field: str) -> Optional[Dict[str, int]]:
+        payload = {
+            "search": "*",
+            "top": 0,
+            "facets": [f"{field},count:{self.max_values},sort:value"],
+        }
+        result = self._search(payload)
+        if result is None:
+            return None
+        facets = result.get('@search.facets', {}).get(field)
+        if facets is None:
+            return None
+        return {str(f.get('value')): int(f.get('count') or 0) for f in facets if f.get('value') is not None}
+
+    def _scanned_values(self, field: str) -> Optional[Dict[str, int]]:
+        """Fallback for non-facetable fields: scan, selecting only the field"""
+        result = self._search({"search": "*", "top": self.max_values, "select": field})
+        if result is None:
+            return None
+        counts: Dict[str, int] = {}
+        for doc in result.get('value', []):
+            value = doc.get(field)
+            if value is not None:
+                counts[str(value)] = counts.get(str(value), 0) + 1
+        return counts
+
+    def value_counts(self, field: str) -> Optional[Dict[str, int]]:
+        """{value: document count} for a field (None if the index could not be queried)"""
+        def compute():
+            try:
+                counts = self._facet_values(field)
+                if counts is None:
+                    counts = self._scanned_values(field)
+                return counts
+            except Exception as e:
+                print(f"Error getting {field} values: {e}")
+                return None
+        return self._cached(("values", field), compute)
+
+    def unique_values(self, field: str) -> List[str]:
+        """Sorted distinct non-blank values of a field"""
+        counts = self.value_counts(field) or {}
+        return sorted({value.strip() for value in counts if value.strip()})
+
+    def document_count(self) -> Optional[int]:
+        def compute():
+            url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/$count?api-version={SEARCH_API_VERSION}"
+            try:
+                response = get_http_transport().get(url, headers={'api-key': self.search_key})
+                if response.status_code == 200:
+                    return int(response.text.strip().lstrip('\ufeff'))
+                print(f"Metadata count error: {response.status_code} - {response.text}")
+            except Exception as e:
+                print(f"Error getting document count: {e}")
+            return None
+        return self._cached(("count",), compute)
+
+    def value_range(self, field: str) -> Optional[Dict[str, Any]]:
+        """{"earliest", "latest"} of a sortable field, ignoring blank values"""
+        def edge(direction: str) -> Optional[Any]:
+            result = self._search({
+                "search": "*",
+                "top": 1,
+                "select": field,
+                "filter": f"{field} ne null and {field} ne ''",
+                "orderby": f"{field} {direction}",
+            })
+            if result is None:
+                raise RuntimeError("query failed")
+            values = result.get('value', [])
+            return values[0].get(field) if values else None
+
+        def compute():
+            try:
+                earliest, latest = edge("asc"), edge("desc")
+            except Exception as e:
+                print(f"Error getting {field} range: {e}")
+                return None
+            # {} marks "no values" so an empty index is cached too
+            return {"earliest": earliest, "latest": latest} if earliest and latest else {}
+        return self._cached(("range", field), compute) or None
+
+    def stats(self) -> Dict[str, Any]:
+        """Same shape as the services' get_stats()"""
+        return {
+            "total_documents": self.document_count() or 0,
+            "clients": len(self.unique_values("client_name")),
+            "date_range": self.value_range("start_date"),
+        }
+
+
+# Global instances for caching (one per index)
+_index_metadata: Dict[Tuple[str, str], IndexMetadata] = {}
+_metadata_lock = threading.Lock()
+
+def get_index_metadata(search_endpoint: str, search_key: str, index_name: str) -> IndexMetadata:
+    """Get or create the shared metadata cache for an index"""
+    key = (search_endpoint.rstrip('/'), index_name)
+    with _metadata_lock:
+        if key not in _index_metadata:
+            _index_metadata[key] = IndexMetadata(search_endpoint, search_key, index_name)
+        return _index_metadata[key]
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Local Vector Search Service
+===========================
+
+In-process vector search over a local snapshot of the hybrid index
+(octagon-sows-hybrid), for offline use and low-latency recommendations.
+
+The snapshot holds the same four vector fields as the Azure index
+(full_text, parsed_content, scope, deliverables), L2-normalized in float32
+matrices, plus the document fields. Queries are brute-force cosine similarity
+(one matrix-vector product); for large corpora an HNSW index (hnswlib, if
+installed) is used instead. Filters support `field <op> 'value'` clauses
+joined with `and`, where <op> is eq, ne, gt, ge, lt or le; values compare
+as strings (ISO dates order correctly), and a missing field only matches `ne`.
+
+Scores follow Azure AI Search's cosine scoring (1 / (1 + cosine distance)),
+so weights and thresholds tuned against HybridSearchService carry over.
+
+The snapshot is built by scripts/indexing/build_local_vector_index.py.
+Select this backend with SEARCH_BACKEND=local (see get_hybrid_search_service).
+Retrieval needs no network; query embeddings come from the shared embedding
+cache/store when the query was seen before, otherwise from Azure OpenAI.
+
+Configuration (optional env vars):
+- LOCAL_VECTOR_INDEX_DIR: snapshot location (default <project root>/.cache/local_index)
+- LOCAL_VECTOR_ANN_MIN_DOCS: corpus size from which HNSW is used (default 5000)
+"""
+
+import os
+import re
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+try:
+    from .embedding_cache import get_query_embedding_sync  # type: ignore
+except Exception:
+    from embedding_cache import get_query_embedding_sync  # type: ignore
+try:
+    from .result_fusion import result_key  # type: ignore
+except Exception:
+    from result_fusion import result_key  # type: ignore
+try:
+    from .search_projections import HEAVY_FIELDS, project  # type: ignore
+except Exception:
+    from search_projections import HEAVY_FIELDS, project  # type: ignore
+
+# Vector fields of octagon-sows-hybrid (see create_hybrid_vector_index.py)
+VECTOR_FIELDS = ['full_text', 'parsed_content', 'scope', 'deliverables']
+
+# Same relative weights as HybridSearchService's single-request query (no BM25 leg locally)
+MULTI_VECTOR_WEIGHTS = {'full_text': 1.2, 'parsed_content': 0.8, 'scope': 0.4, 'deliverables': 0.4}
+
+_FILTER_CLAUSE_RE = re.compile(r"^\s*(\w+)\s+(eq|ne|gt|ge|lt|le)\s+'((?:[^']|'')*)'\s*$", re.I)
+
+_FILTER_OPERATORS = {
+    'eq': lambda a, b: a == b,
+    'ne': lambda a, b: a != b,
+    'gt': lambda a, b: a > b,
+    'ge': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'le': lambda a, b: a <= b,
+}
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def parse_filter(filter_expression: Optional[str]) -> List[Tuple[str, str, str]]:
+    """Parse `a eq 'x' and b ge 'y'` into [(a, eq, x), (b, ge, y)]; raises ValueError otherwise"""
+    if not filter_expression or not filter_expression.strip():
+        return []
+    conditions: List[Tuple[str, str, str]] = []
+    for clause in re.split(r"\s+and\s+", filter_expression.strip(), flags=re.I):
+        match = _FILTER_CLAUSE_RE.match(clause)
+        if not match:
+            raise ValueError(f"Unsupported filter clause: {clause}")
+        conditions.append((match.group(1), match.group(2).lower(), match.group(3).replace("''", "'")))
+    return conditions
+
+
+def matches_filter(document: Dict[str, Any], conditions: List[Tuple[str, str, str]]) -> bool:
+    """True if the document satisfies every (field, op, value) condition"""
+    for field, op, value in conditions:
+        actual = document.get(field)
+        if actual is None:
+            # OData: null equals nothing but null and orders against nothing
+            if op != 'ne':
+                return False
+            continue
+        if not _FILTER_OPERATORS[op](str(actual), value):
+            return False
+    return True
+
+
+class LocalVectorIndex:
+    """Documents plus one normalized float32 matrix per vector field"""
+
+    def __init__(self, documents: List[Dict[str, Any]], vectors: Dict[str, np.ndarray],
+                 ann_min_docs: Optional[int] = None):
+        self.documents = documents
+        self.vectors = {field: _normalize_rows(np.asarray(matrix, dtype=np.float32)) for field, matrix in vectors.items()}
+        for field, matrix in self.vectors.items():
+            if matrix.shape[0] != len(documents):
+                raise ValueError(f"{field}: {matrix.shape[0]} vectors for {len(documents)} documents")
+        self.ann_min_docs = ann_min_docs if ann_min_docs is not None else int(os.getenv("LOCAL_VECTOR_ANN_MIN_DOCS", "5000"))
+        self._ann: Dict[str, Any] = {}
+        self._masks: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        if len(documents) >= self.ann_min_docs:
+            self._build_ann()
+
+    # Persistence
+
+    def save(self, directory: Path) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / "documents.json", "w", encoding="utf-8") as f:
+            json.dump(self.documents, f, ensure_ascii=False)
+        np.savez(directory / "vectors.npz", **self.vectors)
+
+    @classmethod
+    def load(cls, directory: Path, ann_min_docs: Optional[int] = None) -> "LocalVectorIndex":
+        directory = Path(directory)
+        with open(directory / "documents.json", "r", encoding="utf-8") as f:
+            documents = json.load(f)
+        with np.load(directory / "vectors.npz") as data:
+            vectors = {field: data[field] for field in data.files}
+        return cls(documents, vectors, ann_min_docs=ann_min_docs)
+
+    # Search
+
+    def _build_ann(self) -> None:
+        try:
+            import hnswlib
+        except ImportError:
+            print("⚠️ hnswlib not installed; using brute-force search")
+            return
+        for field, matrix in self.vectors.items():
+            index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+            index.init_index(max_elements=matrix.shape[0], ef_construction=200, M=16)
+            index.add_items(matrix, np.arange(matrix.shape[0]))
+            index.set_ef(128)
+            self._ann[field] = index
+
+    def filter_mask(self, filter_expression: Optional[str]) -> Optional[np.ndarray]:
+        """Boolean mask of matching documents (None = no filter), cached per expression"""
+        conditions = parse_filter(filter_expression)
+        if not conditions:
+            return None
+        key = json.dumps(conditions)
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is None:
+                mask = np.array([matches_filter(doc, conditions) for doc in self.documents], dtype=bool)
+                self._masks[key] = mask
+        return mask
+
+    def similarities(self, field: str, query: np.ndarray, mask: Optional[np.ndarray] = None,
+                     candidates: Optional[int] = None) -> np.ndarray:
+        """Cosine similarity of every document to the query (-inf where filtered out or not retrieved)"""
+        index = self._ann.get(field)
+        if index is not None and candidates:
+            k = min(len(self.documents), candidates if mask is None else candidates * 4)
+            labels, distances = index.knn_query(query, k=k)
+            sims = np.full(len(self.documents), -np.inf, dtype=np.float32)
+            sims[labels[0]] = 1.0 - distances[0]
+            if mask is not None and np.isfinite(sims[mask]).sum() < min(candidates, int(mask.sum())):
+                # Too few filtered matches among the approximate neighbours: score the subset exactly
+                sims = self.vectors[field] @ query
+        else:
+            sims = self.vectors[field] @ query
+        if mask is not None:
+            sims = np.where(mask, sims, -np.inf)
+        return sims
+
+    def search(self, query_vector: List[float], field_weights: Dict[str, float], top: int = 10, skip: int = 0,
+               filter_expression: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """Rank documents by the weighted sum of per-field scores; returns (document, score) pairs"""
+        if not self.documents:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        mask = self.filter_mask(filter_expression)
+        total = np.zeros(len(self.documents), dtype=np.float32)
+        for field, weight in field_weights.items():
+            sims = self.similarities(field, query, mask, candidates=top + skip)
+            # Azure AI Search cosine score: 1 / (1 + (1 - cos))
+            total += weight * np.where(np.isfinite(sims), 1.0 / (2.0 - sims), 0.0)
+        if mask is not None:
+            total = np.where(mask, total, 0.0)
+        wanted = top + skip
+        candidates = np.flatnonzero(total > 0)
+        if len(candidates) > wanted:
+            candidates = candidates[np.argpartition(-total[candidates], wanted - 1)[:wanted]]
+        ranked = candidates[np.argsort(-total[candidates], kind="stable")][skip:wanted]
+        return [(self.documents[i], float(total[i])) for i in ranked]
+
+
+class LocalVectorSearchService:
+    """Drop-in for HybridSearchService's vector searches, served from a local snapshot"""
+
+    def __init__(self, index: Optional[LocalVectorIndex] = None, index_dir: Optional[Path] = None):
+        env_path = Path(__file__).parent.parent.parent / '.env'
+        if env_path.exists():
+            load_dotenv(env_path)
+        self.openai_api_key = os.getenv('AZURE_OPENAI_API_KEY')
+        self.openai_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
+        self.openai_deployment = os.getenv('AOAI_DEPLOYMENT')
+        self.index_name = "octagon-sows-hybrid"
+        default_dir = Path(__file__).parents[2] / ".cache" / "local_index"
+        self.index_dir = Path(index_dir or os.getenv("LOCAL_VECTOR_INDEX_DIR") or default_dir) / self.index_name
+        self.index = index if index is not None else LocalVectorIndex.load(self.index_dir)
+        self._documents_by_id: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _get_query_embedding_sync(self, query: str) -> Optional[List[float]]:
+        """Query embedding from the shared cache/store, falling back to one Azure OpenAI call"""
+        return get_query_embedding_sync(self.openai_endpoint, self.openai_api_key, self.openai_deployment, query, timeout=30)
+
+    def _vector_search(self, query: str, field_weights: Dict[str, float], strategy: str, top: int, skip: int,
+                       filter_expression: Optional[str], query_embedding: Optional[List[float]],
+                       projection: Optional[str] = None) -> Dict[str, Any]:
+        if query_embedding is None:
+            query_embedding = self._get_query_embedding_sync(query)
+        if not query_embedding:
+            return {"error": "Failed to get query embedding"}
+        try:
+            ranked = self.index.search(query_embedding, field_weights, top=top, skip=skip, filter_expression=filter_expression)
+        except ValueError as e:
+            return {"error": f"Search failed: {e}"}
+        results = []
+        for document, score in ranked:
+            doc = project(document, projection)
+            # Structured staffing ships with the snapshot in place of blob hydration
+            if 'staffing_plan_structured' in document:
+                doc['staffing_plan_structured'] = document['staffing_plan_structured']
+            doc['@search.score'] = score
+            doc['search_strategy'] = strategy
+            doc['strategy_score'] = score
+            results.append(doc)
+        return {'value': results, '@odata.count': len(results)}
+
+    def hybrid_vector_search(
+        self,
+        query: str,
+        top: int = 10,
+        skip: int = 0,
+        filter_expression: Optional[str] = None,
+        full_text_weight: float = 0.6,
+        parsed_weight: float = 0.4,
+        query_embedding: Optional[List[float]] = None,
+        projection: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Weighted full text + parsed content vector search (scores combined for every document)"""
+        result = self._vector_search(
+            query, {'full_text': full_text_weight, 'parsed_content': parsed_weight}, 'hybrid_combined',
+            top, skip, filter_expression, query_embedding, projection
+        )
+        if 'value' in result:
+            # Deduplicate by file_name (fallback to id) keeping the highest score
+            dedup: Dict[str, Any] = {}
+            for doc in result['value']:
+                dedup.setdefault(result_key(doc), doc)
+            result = {'value': list(dedup.values()), '@odata.count': len(dedup)}
+        return result
+
+    def full_text_vector_search(self, query: str, top: int = 10, skip: int = 0,
+                                filter_expression: Optional[str] = None,
+                                query_embedding: Optional[List[float]] = None,
+                                projection: Optional[str] = None) -> Dict[str, Any]:
+        return self._vector_search(query, {'full_text': 1.0}, 'full_text_vector_search',
+                                   top, skip, filter_expression, query_embedding, projection)
+
+    def parsed_data_vector_search(self, query: str, top: int = 10, skip: int = 0,
+                                  filter_expression: Optional[str] = None,
+                                  query_embedding: Optional[List[float]] = None,
+                                  projection: Optional[str] = None) -> Dict[str, Any]:
+        return self._vector_search(query, {'parsed_content': 1.0}, 'parsed_data_vector_search',
+                                   top, skip, filter_expression, query_embedding, projection)
+
+    def search(
+        self,
+        query: str,
+        search_type: str = "hybrid",
+        top: int = 10,
+        skip: int = 0,
+        filter_expression: Optional[str] = None,
+        projection: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Main search method with different search types"""
+        kwargs = dict(top=top, skip=skip, filter_expression=filter_expression, projection=projection)
+        if search_type == "hybrid":
+            return self.hybrid_vector_search(query, **kwargs)
+        if search_type == "full_text":
+            return self.full_text_vector_search(query, **kwargs)
+        if search_type == "parsed":
+            return self.parsed_data_vector_search(query, **kwargs)
+        if search_type == "multi_vector":
+            return self._vector_search(query, MULTI_VECTOR_WEIGHTS, 'hybrid_multi_vector',
+                                       top, skip, filter_expression, None, projection)
+        if search_type in ("scope", "deliverables"):
+            return self._vector_search(query, {search_type: 1.0}, f"{search_type}_vector_search",
+                                       top, skip, filter_expression, None, projection)
+        if search_type == "semantic":
+            return {"error": "Semantic ranking requires Azure AI Search (not available with the local backend)"}
+        return {"error": f"Unknown search type: {search_type}"}
+
+    def get_document_fields(self, doc_id: str, fields=HEAVY_FIELDS) -> Optional[Dict[str, Any]]:
+        """Fields left out of search projections (e.g. raw_content), read from the snapshot"""
+        if self._documents_by_id is None:
+            self._documents_by_id = {doc.get('id'): doc for doc in self.index.documents}
+        document = self._documents_by_id.get(doc_id)
+        if document is None:
+            return None
+        return {field: document[field] for field in fields if field in document}
+
+
+# Global instance for caching
+_local_vector_search_service = None
+_service_lock = threading.Lock()
+
+def get_local_vector_search_service() -> LocalVectorSearchService:
+    """Get or create the local search service (the snapshot is loaded once per process)"""
+    global _local_vector_search_service
+    with _service_lock:
+        if _local_vector_search_service is None:
+            _local_vector_search_service = LocalVectorSearchService()
+        return _local_vector_search_service
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Multi-Strategy Search Engine
+============================
+
+Shared fan-out engine for the multi-strategy keyword searches used by
+SimpleSemanticSearchService, EnhancedSearchService and SemanticSearchService.
+
+Every strategy (phonetic, fuzzy, exact, synonym, per-term, ...) is dispatched
+at once on a shared thread pool over the shared pooled HTTP transport
+(http_transport). Results are
+then merged in priority order (highest strategy_score first), exactly as the
+old serial loops did, but:
+- each strategy has its own timeout, counted from when a worker picks it up
+  (not from submission, so queueing behind busy workers does not use it
+  up); a slow strategy is skipped, not awaited
+- once `top` unique documents are filled by higher-priority strategies, the
+  remaining strategies are dropped (they could never reach the final page)
+
+Configuration (optional env vars):
+- SEARCH_STRATEGY_TIMEOUT: per-strategy timeout in seconds (default 10)
+- SEARCH_STRATEGY_WORKERS: max concurrent strategy requests (default 8)
+"""
+
+import os
+import time
+import threading
+import concurrent.futures
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _StartTime:
+    """When a worker picked a strategy up"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.at = 0.0
+
+    def run(self, fn: Callable[[float], Optional[Dict[str, Any]]], timeout: float) -> Optional[Dict[str, Any]]:
+        self.at = time.monotonic()
+        self.event.set()
+        return fn(timeout)
+
+
+@dataclass
+class SearchStrategy:
+    """One search strategy: `run(timeout)` returns an Azure Search response dict or None"""
+    name: str
+    score: float
+    run: Callable[[float], Optional[Dict[str, Any]]]
+    timeout: Optional[float] = None
+
+
+class MultiStrategySearchEngine:
+    """Runs search strategies concurrently and merges them by priority"""
+
+    def __init__(self, max_workers: int = 8, default_timeout: float = 10.0):
+        self.default_timeout = default_timeout
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="search-strategy"
+        )
+
+    def run(self, strategies: List[SearchStrategy], top: int) -> Dict[str, Any]:
+        """Dispatch all strategies and merge unique documents (by id) in priority order"""
+        # Stable sort: equal scores keep the caller's order
+        ordered = sorted(strategies, key=lambda s: s.score, reverse=True)
+        futures = []
+        for strategy in ordered:
+            timeout = strategy.timeout if strategy.timeout is not None else self.default_timeout
+            started = _StartTime()
+            futures.append((strategy, timeout, started, self._executor.submit(started.run, strategy.run, timeout)))
+
+        all_results: List[Dict[str, Any]] = []
+        seen_ids = set()
+        try:
+            for strategy, timeout, started, future in futures:
+                # Early cutoff: lower-priority strategies can't displace what we have
+                if len(all_results) >= top:
+                    break
+                # Queued strategies wait for a worker; the workers' own requests are bounded by their timeouts
+                started.event.wait()
+                remaining = max(0.0, started.at + timeout - time.monotonic())
+                try:
+                    results = future.result(timeout=remaining)
+                except concurrent.futures.TimeoutError:
+                    print(f"Search strategy '{strategy.name}' timed out after {timeout:.1f}s")
+                    continue
+                except Exception as e:
+                    print(f"Search strategy '{strategy.name}' failed: {e}")
+                    continue
+                if not results or not results.get('value'):
+                    continue
+                for doc in results['value']:
+                    if doc['id'] not in seen_ids:
+                        doc['search_strategy'] = strategy.name
+                        doc['strategy_score'] = strategy.score
+                        all_results.append(doc)
+                        seen_ids.add(doc['id'])
+        finally:
+            # Drop anything not yet started; in-flight requests finish in the background
+            for _, _, _, future in futures:
+                future.cancel()
+
+        # Sort by strategy score (stable, so per-strategy ranking is preserved)
+        all_results.sort(key=lambda x: x.get('strategy_score', 0), reverse=True)
+
+        # Return in the same format as a single Azure Search response
+        return {
+            '@odata.count': len(all_results),
+            'value': all_results[:top]
+        }
+
+
+_engine = None
+_lock = threading.Lock()
+
+def get_multi_strategy_engine() -> MultiStrategySearchEngine:
+    """Get or create the shared multi-strategy engine (cached)"""
+    global _engine
+    with _lock:
+        if _engine is None:
+            _engine = MultiStrategySearchEngine(
+                max_workers=int(os.getenv("SEARCH_STRATEGY_WORKERS", "8")),
+                default_timeout=float(os.getenv("SEARCH_STRATEGY_TIMEOUT", "10")),
+            )
+        return _engine
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Normalization Memo
+==================
+
+Small persistent key/value memo (SQLite) for normalization decisions that are
+expensive to make and stable across documents, e.g.:
+- raw staffing title -> canonical org chart title ("Sr. Account Exec" -> "Sr. Account Executive")
+- DI table header tuple -> canonical column keys
+
+Entries are grouped by namespace; put a version or input fingerprint in the
+namespace (e.g. the org chart hash) so stale decisions are simply never read.
+The store is shared across documents, threads and processes (WAL mode).
+
+Configuration (optional env vars):
+- SOW_NORMALIZATION_MEMO_PATH: database file (default <project root>/.cache/normalization_memo.sqlite3)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+
+class NormalizationMemo:
+    """Namespaced JSON memo persisted in SQLite"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS memo ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " source TEXT,"
+                " updated_at REAL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        return self.get_many(namespace, [key]).get(key)
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return {key: value} for the keys that are memoized"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found: Dict[str, Any] = {}
+        try:
+            with self._lock:
+                conn = self._connection()
+                # Stay well under SQLite's bound-parameter limit
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    placeholders = ",".join("?" for _ in chunk)
+                    rows = conn.execute(
+                        f"SELECT key, value FROM memo WHERE namespace = ? AND key IN ({placeholders})",
+                        [namespace, *chunk],
+                    ).fetchall()
+                    for key, value in rows:
+                        found[key] = json.loads(value)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"⚠️ Normalization memo read failed: {e}")
+        return found
+
+    def put(self, namespace: str, key: str, value: Any, source: str = "") -> None:
+        self.put_many(namespace, {key: value}, source=source)
+
+    def put_many(self, namespace: str, values: Dict[str, Any], source: str = "") -> None:
+        """Insert or replace memo entries (best-effort)"""
+        if not values:
+            return
+        now = time.time()
+        try:
+            rows = [(namespace, k, json.dumps(v, ensure_ascii=False), source, now) for k, v in values.items()]
+            with self._lock:
+                conn = self._connection()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO memo (namespace, key, value, source, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.commit()
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Normalization memo write failed: {e}")
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            conn = self._connection()
+            if namespace is None:
+                conn.execute("DELETE FROM memo")
+            else:
+                conn.execute("DELETE FROM memo WHERE namespace = ?", (namespace,))
+            conn.commit()
+
+
+# Global instance for caching
+_normalization_memo = None
+_memo_lock = threading.Lock()
+
+def get_normalization_memo() -> NormalizationMemo:
+    """Get or create the process-wide normalization memo"""
+    global _normalization_memo
+    with _memo_lock:
+        if _normalization_memo is None:
+            default_path = Path(__file__).parents[2] / ".cache" / "normalization_memo.sqlite3"
+            _normalization_memo = NormalizationMemo(Path(os.getenv("SOW_NORMALIZATION_MEMO_PATH") or default_path))
+        return _normalization_memo
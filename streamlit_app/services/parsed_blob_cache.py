@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Parsed Blob Cache
+=================
+
+Process-wide access to the parsed SOW JSON (`<file>_parsed.json` in the
+"parsed" container) for hydrating search results, e.g. structured staffing
+plans the index only stores as flattened strings.
+
+- one DefaultAzureCredential and BlobServiceClient for the process lifetime
+- get_many() fetches every result's blob concurrently (one parallel wave)
+- parsed JSON is cached in memory and on disk with its ETag; a cached blob is
+  revalidated with a conditional GET (If-None-Match) and only re-downloaded
+  when it changed. Entries checked within the last few seconds are served
+  without a request, so Streamlit re-renders cost nothing.
+
+Configuration (optional env vars):
+- AZURE_STORAGE_ACCOUNT_URL: storage account (required for hydration)
+- PARSED_BLOB_CACHE_DIR: on-disk cache location (default <project root>/.cache/parsed_blobs)
+- PARSED_BLOB_FRESH_SECONDS: serve cached entries without revalidating for this long (default 30)
+- PARSED_BLOB_WORKERS: concurrent blob requests (default 8)
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import concurrent.futures
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+from azure.identity import DefaultAzureCredential
+from azure.storage.blob import BlobServiceClient
+
+PARSED_CONTAINER = "parsed"
+
+
+def parsed_blob_name(file_name: str) -> str:
+    """`<base>_parsed.json` for a source file name (same rule as the extraction pipeline)"""
+    base = file_name.strip().replace('.pdf', '').replace('.docx', '')
+    return f"{base}_parsed.json"
+
+
+class ParsedBlobCache:
+    """ETag-validated cache of parsed SOW JSON blobs, fetched concurrently"""
+
+    def __init__(self, account_url: str, container: str = PARSED_CONTAINER, cache_dir: Optional[Path] = None,
+                 fresh_seconds: Optional[float] = None, max_workers: Optional[int] = None):
+        self.account_url = account_url
+        self.container = container
+        default_dir = Path(__file__).parents[2] / ".cache" / "parsed_blobs"
+        self.cache_dir = Path(cache_dir or os.getenv("PARSED_BLOB_CACHE_DIR") or default_dir)
+        self.fresh_seconds = float(os.getenv("PARSED_BLOB_FRESH_SECONDS", "30")) if fresh_seconds is None else fresh_seconds
+        self.max_workers = int(os.getenv("PARSED_BLOB_WORKERS", "8")) if max_workers is None else max_workers
+        self._service_client: Optional[BlobServiceClient] = None
+        # blob name -> (etag, parsed json, monotonic time last validated)
+        self._entries: Dict[str, Tuple[str, Any, float]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.downloads = 0
+        self.not_modified = 0
+
+    def _client(self) -> BlobServiceClient:
+        with self._lock:
+            if self._service_client is None:
+                self._service_client = BlobServiceClient(account_url=self.account_url, credential=DefaultAzureCredential())
+            return self._service_client
+
+    def _pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="parsed-blob")
+            return self._executor
+
+    def _disk_path(self, blob_name: str) -> Path:
+        return self.cache_dir / re.sub(r"[^A-Za-z0-9_.\-]", "_", blob_name)
+
+    def _cached_entry(self, blob_name: str) -> Optional[Tuple[str, Any, float]]:
+        with self._lock:
+            entry = self._entries.get(blob_name)
+        if entry is not None:
+            return entry
+        try:
+            stored = json.loads(self._disk_path(blob_name).read_text(encoding="utf-8"))
+            # Loaded from disk: known ETag, but never validated by this process
+            return stored["etag"], stored["data"], float("-inf")
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _remember(self, blob_name: str, etag: str, data: Any, write_disk: bool) -> None:
+        with self._lock:
+            self._entries[blob_name] = (etag, data, time.monotonic())
+        if write_disk and etag:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                path = self._disk_path(blob_name)
+                tmp = path.with_suffix(path.suffix + ".tmp")
+                tmp.write_text(json.dumps({"etag": etag, "data": data}), encoding="utf-8")
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"⚠️ Parsed blob cache write failed: {e}")
+
+    def get(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """Parsed JSON for a source file (None if missing or unreadable)"""
+        blob_name = parsed_blob_name(file_name)
+        cached = self._cached_entry(blob_name)
+        if cached is not None and time.monotonic() - cached[2] < self.fresh_seconds:
+            return cached[1]
+
+        blob_client = self._client().get_blob_client(container=self.container, blob=blob_name)
+        try:
+            if cached is not None:
+                downloader = blob_client.download_blob(etag=cached[0], match_condition=MatchConditions.IfModified)
+            else:
+                downloader = blob_client.download_blob()
+            content = downloader.readall()
+        except ResourceNotModifiedError:
+            self.not_modified += 1
+            self._remember(blob_name, cached[0], cached[1], write_disk=False)
+            return cached[1]
+        except ResourceNotFoundError:
+            return None
+        except Exception as e:
+            # Storage unreachable: a previously cached copy beats nothing
+            if cached is not None:
+                return cached[1]
+            print(f"⚠️ Could not download {blob_name}: {e}")
+            return None
+
+        try:
+            data = json.loads(content.decode('utf-8'))
+        except ValueError:
+            return None
+        self.downloads += 1
+        self._remember(blob_name, downloader.properties.etag or "", data, write_disk=True)
+        return data
+
+    def get_many(self, file_names: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Parsed JSON per file name, fetched concurrently"""
+        unique: List[str] = list(dict.fromkeys(name.strip() for name in file_names if name and name.strip()))
+        if not unique:
+            return {}
+        if len(unique) == 1:
+            return {unique[0]: self.get(unique[0])}
+        return dict(zip(unique, self._pool().map(self.get, unique)))
+
+    def staffing_plans(self, file_names: Sequence[str]) -> Dict[str, List[Any]]:
+        """Structured staffing_plan lists per file name (files without one are omitted)"""
+        plans = {}
+        for name, data in self.get_many(file_names).items():
+            if isinstance(data, dict) and isinstance(data.get('staffing_plan'), list):
+                plans[name] = data['staffing_plan']
+        return plans
+
+
+# Global instance for caching
+_parsed_blob_cache = None
+_cache_lock = threading.Lock()
+
+def get_parsed_blob_cache() -> Optional[ParsedBlobCache]:
+    """Get or create the process-wide parsed blob cache (None without AZURE_STORAGE_ACCOUNT_URL)"""
+    global _parsed_blob_cache
+    with _cache_lock:
+        if _parsed_blob_cache is None:
+            account_url = os.getenv('AZURE_STORAGE_ACCOUNT_URL')
+            if not account_url:
+                return None
+            _parsed_blob_cache = ParsedBlobCache(account_url)
+        return _parsed_blob_cache
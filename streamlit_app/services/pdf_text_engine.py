@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+PDF Text Engine
+===============
+
+Single-pass, page-targeted text extraction for PDFs.
+
+The PDF is parsed once (PyPDF2, falling back to pdfplumber when PyPDF2 is
+missing or cannot parse the file). Each page is then handled on its own:
+- pages with a native text layer use it directly
+- pages with little native text are re-read with pdfplumber when it is
+  installed: its text plus table rows rendered as " | "-joined lines, which
+  the targeted staffing extraction reads as table rows
+- image-only pages (still little text, embedded images, including images
+  nested in form XObjects) are rasterized individually and OCR'd with
+  Tesseract
+
+Pages are yielded as they finish (`iter_pages`) and tagged with their page
+number, so callers can stream progress and downstream consumers can cite
+pages. There is no page cap unless `max_pages` is set.
+
+`extract(on_step=...)` reports where the time went: `on_step(step, seconds,
+attributes)` is called for "pdf_parse" (opening the PDF; attribute `parser`),
+each "ocr" page (attribute `page`) and once for "pdf_text" (native text of all
+pages; attribute `pages`).
+
+Configuration (optional env vars):
+- PDF_OCR_MIN_CHARS: pages with fewer native characters are OCR candidates (default 40)
+- PDF_OCR_DPI: rasterization resolution for OCR pages (default 200)
+"""
+
+import io
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+StepCallback = Callable[[str, float, Dict[str, Any]], None]
+
+
+@dataclass
+class PageText:
+    """Text of one PDF page and how it was obtained ("native", "tables", "ocr" or "empty")"""
+    page_number: int
+    text: str
+    method: str
+
+
+def format_page(page: PageText) -> str:
+    return f"--- PAGE {page.page_number} ---\n{page.text}"
+
+
+class PDFTextEngine:
+    """Extracts page-tagged text from a PDF, using OCR only where needed"""
+
+    def __init__(self, min_native_chars: Optional[int] = None, ocr_dpi: Optional[int] = None, max_pages: Optional[int] = None):
+        self.min_native_chars = min_native_chars if min_native_chars is not None else int(os.getenv("PDF_OCR_MIN_CHARS", "40"))
+        self.ocr_dpi = ocr_dpi or int(os.getenv("PDF_OCR_DPI", "200"))
+        self.max_pages = max_pages
+        self.parser: Optional[str] = None
+
+    def iter_pages(self, data: bytes, on_error: Optional[Callable[[int, Exception], None]] = None) -> Iterator[PageText]:
+        """Yield PageText for each page in order, as soon as it is ready"""
+        with self._open(data) as opened:
+            yield from self._iter_opened(data, opened, on_error)
+
+    def extract(self, data: bytes, on_page: Optional[Callable[[PageText, int], None]] = None,
+                on_error: Optional[Callable[[int, Exception], None]] = None,
+                on_step: Optional[StepCallback] = None) -> str:
+        """Full page-tagged text; `on_page(page, total_pages)` is called as each page finishes"""
+        started = time.perf_counter()
+        with self._open(data) as opened:
+            if on_step:
+                on_step("pdf_parse", time.perf_counter() - started, {"parser": self.parser})
+            total = self._limit(len(opened[0]))
+            parts: List[str] = []
+            for page in self._iter_opened(data, opened, on_error, on_step):
+                if on_page:
+                    on_page(page, total)
+                if page.text.strip():
+                    parts.append(format_page(page))
+        return "\n".join(parts)
+
+    def _limit(self, total: int) -> int:
+        return min(total, self.max_pages) if self.max_pages else total
+
+    @contextmanager
+    def _open(self, data: bytes):
+        """Parse the PDF once: yields (pages, extract_text(page), has_images(page), table_text(index))"""
+        try:
+            import PyPDF2
+            reader = PyPDF2.PdfReader(io.BytesIO(data))
+            len(reader.pages)  # walks the page tree, so a broken file fails here
+        except Exception as e:
+            pypdf_error = e
+        else:
+            self.parser = "PyPDF2"
+            with ExitStack() as stack:
+                plumber: Dict[str, Any] = {}
+
+                def table_text(index: int) -> str:
+                    # pdfplumber is opened on the first low-text page only, and is optional
+                    if "pdf" not in plumber:
+                        try:
+                            import pdfplumber
+                        except ImportError:
+                            plumber["pdf"] = None
+                        else:
+                            plumber["pdf"] = stack.enter_context(pdfplumber.open(io.BytesIO(data)))
+                    return self._plumber_text(plumber["pdf"].pages[index]) if plumber["pdf"] is not None else ""
+
+                yield reader.pages, (lambda page: page.extract_text() or ""), self._pypdf_has_images, table_text
+            return
+        try:
+            import pdfplumber
+        except ImportError:
+            raise pypdf_error
+        self.parser = "pdfplumber"
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            yield (pdf.pages, (lambda page: page.extract_text() or ""), (lambda page: bool(page.images)),
+                   (lambda index: self._plumber_text(pdf.pages[index])))
+
+    @staticmethod
+    def _plumber_text(page) -> str:
+        """pdfplumber page text followed by its table rows as " | "-joined lines"""
+        lines = [page.extract_text() or ""]
+        for table in page.extract_tables() or []:
+            for row in table or []:
+                row_text = " | ".join(str(cell) for cell in row or [] if cell)
+                if row_text.strip():
+                    lines.append(row_text)
+        return "\n".join(line for line in lines if line)
+
+    def _iter_opened(self, data: bytes, opened, on_error, on_step: Optional[StepCallback] = None) -> Iterator[PageText]:
+        pages, extract, has_images, table_text = opened
+        native_seconds = 0.0
+        count = self._limit(len(pages))
+        for index in range(count):
+            page_number = index + 1
+            started = time.perf_counter()
+            try:
+                text = extract(pages[index])
+            except Exception as e:
+                if on_error:
+                    on_error(page_number, e)
+                text = ""
+            native_seconds += time.perf_counter() - started
+            if on_step and page_number == count:
+                on_step("pdf_text", native_seconds, {"pages": count})
+            if len(text.strip()) >= self.min_native_chars:
+                yield PageText(page_number, text, "native")
+                continue
+            # Little native text: pdfplumber may still recover it, with any tables as rows
+            try:
+                tables = table_text(index)
+            except Exception as e:
+                if on_error:
+                    on_error(page_number, e)
+                tables = ""
+            if len(tables.strip()) >= self.min_native_chars:
+                yield PageText(page_number, tables, "tables")
+                continue
+            # Too little native text: OCR only if the page actually carries an image
+            try:
+                needs_ocr = not text.strip() or has_images(pages[index])
+            except Exception:
+                needs_ocr = True
+            if needs_ocr:
+                started = time.perf_counter()
+                try:
+                    ocr_text = self._ocr_page(data, page_number)
+                    if on_step:
+                        on_step("ocr", time.perf_counter() - started, {"page": page_number})
+                    if len(ocr_text.strip()) > len(text.strip()):
+                        yield PageText(page_number, ocr_text, "ocr")
+                        continue
+                except Exception as e:
+                    if on_error:
+                        on_error(page_number, e)
+            yield PageText(page_number, text, "native" if text.strip() else "empty")
+
+    @classmethod
+    def _pypdf_has_images(cls, page) -> bool:
+        return cls._resources_have_images(page.get("/Resources"), set())
+
+    @classmethod
+    def _resources_have_images(cls, resources, seen: Set[int]) -> bool:
+        """Image XObjects in a resource dictionary, descending into form XObjects"""
+        if resources is None:
+            return False
+        xobjects = resources.get_object().get("/XObject")
+        if not xobjects:
+            return False
+        xobjects = xobjects.get_object()
+        for name in xobjects:
+            xobject = xobjects[name].get_object() or {}
+            subtype = xobject.get("/Subtype")
+            if subtype == "/Image":
+                return True
+            # Resolved objects are cached by the reader, so id() identifies shared forms
+            if subtype == "/Form" and id(xobject) not in seen:
+                seen.add(id(xobject))
+                if cls._resources_have_images(xobject.get("/Resources"), seen):
+                    return True
+        return False
+
+    def _ocr_page(self, data: bytes, page_number: int) -> str:
+        """Rasterize a single page and OCR it"""
+        from pdf2image import convert_from_bytes
+        import pytesseract
+
+        images = convert_from_bytes(data, dpi=self.ocr_dpi, first_page=page_number, last_page=page_number)
+        return "\n".join(pytesseract.image_to_string(image) for image in images)
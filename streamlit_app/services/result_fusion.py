@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Result Fusion
+=============
+
+Merges ranked result lists ("legs": per-field vector searches, keyword or
+semantic searches) into one ranking in a single pass. Candidates are indexed
+by their dedup key (file_name, falling back to id), so the merge is linear in
+the number of results and each SOW appears once.
+
+Methods:
+- "rrf": reciprocal rank fusion, sum of weight / (k + rank). Rank-based, so
+  legs with incomparable score scales (BM25 vs cosine) mix safely. Scores are
+  scaled so a document ranked first in every leg scores 1.0.
+- "normalized": min-max normalize each leg's @search.score to 0-1, then take
+  the weighted sum (divided by the total weight).
+
+Configuration (optional env vars):
+- HYBRID_FUSION_METHOD: default method for hybrid search ("rrf" or "normalized", default "rrf")
+"""
+
+import os
+import heapq
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+RRF_K = 60
+
+
+@dataclass
+class FusionLeg:
+    """One ranked result list (best first) and its weight in the fused ranking"""
+    name: str
+    results: List[Dict[str, Any]]
+    weight: float = 1.0
+
+
+def result_key(doc: Dict[str, Any]) -> Optional[str]:
+    """Dedup key: one result per source file"""
+    return (doc.get('file_name') or '').strip() or doc.get('id')
+
+
+def default_fusion_method() -> str:
+    return os.getenv("HYBRID_FUSION_METHOD", "rrf").strip().lower()
+
+
+def fuse_results(
+    legs: List[FusionLeg],
+    method: Optional[str] = None,
+    top: Optional[int] = None,
+    k: int = RRF_K,
+    key: Callable[[Dict[str, Any]], Optional[str]] = result_key,
+    strategy_prefix: str = "hybrid",
+) -> List[Dict[str, Any]]:
+    """Fuse legs into one deduplicated ranking (best first).
+
+    Each returned doc carries `strategy_score` (the fused score),
+    `search_strategy` ("<prefix>_<leg>" when a single leg found it,
+    "<prefix>_combined" otherwise) and `fusion_ranks` ({leg: 1-based rank}).
+    """
+    method = method or default_fusion_method()
+    if method not in ("rrf", "normalized"):
+        raise ValueError(f"Unknown fusion method: {method}")
+
+    total_weight = sum(leg.weight for leg in legs if leg.results) or 1.0
+    candidates: Dict[str, Dict[str, Any]] = {}
+
+    for leg in legs:
+        if not leg.results:
+            continue
+        if method == "normalized":
+            scores = [float(doc.get('@search.score') or 0.0) for doc in leg.results]
+            low, high = min(scores), max(scores)
+            spread = high - low
+        rank = 0
+        for position, doc in enumerate(leg.results):
+            doc_key = key(doc)
+            if not doc_key:
+                continue
+            candidate = candidates.get(doc_key)
+            if candidate is not None and leg.name in candidate['ranks']:
+                continue  # the same file appears twice in this leg: keep its best rank only
+            rank += 1
+            if method == "rrf":
+                contribution = leg.weight / (k + rank)
+            else:
+                contribution = leg.weight * ((scores[position] - low) / spread if spread > 0 else 1.0)
+            if candidate is None:
+                candidates[doc_key] = {'doc': dict(doc), 'score': contribution, 'ranks': {leg.name: rank}}
+            else:
+                candidate['score'] += contribution
+                candidate['ranks'][leg.name] = rank
+                # Keep the first leg's copy but fill in fields only other legs returned (e.g. captions)
+                for field, value in doc.items():
+                    candidate['doc'].setdefault(field, value)
+
+    # Scale to 0-1: 1.0 = ranked first in every leg (rrf) / top-scored in every leg (normalized)
+    scale = total_weight / (k + 1) if method == "rrf" else total_weight
+
+    def sort_key(c: Dict[str, Any]):
+        return (c['score'], -min(c['ranks'].values()))
+
+    ranked = heapq.nlargest(top, candidates.values(), key=sort_key) if top else sorted(candidates.values(), key=sort_key, reverse=True)
+    fused = []
+    for candidate in ranked:
+        doc = candidate['doc']
+        ranks = candidate['ranks']
+        doc['strategy_score'] = candidate['score'] / scale
+        doc['search_strategy'] = f"{strategy_prefix}_{next(iter(ranks))}" if len(ranks) == 1 else f"{strategy_prefix}_combined"
+        doc['fusion_ranks'] = ranks
+        fused.append(doc)
+    return fused
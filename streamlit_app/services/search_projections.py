@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Search Projections
+==================
+
+Per-use-case `select` lists for the SOW indexes, so searches return only the
+fields a view displays. `raw_content` (the full document text, often tens of
+KB per hit) is never part of a result projection; it is fetched on demand by
+document key with fetch_document_fields when a user expands a result.
+
+Projections:
+- "list": identity, client, title, length and dates (compact result lists)
+- "card": list + scope summary, deliverables and staffing (recommendation
+  cards and search result expanders; the default)
+- "detail": card + exclusions
+- "full": every retrievable field ("*"), the old behaviour
+
+Configuration (optional env vars):
+- SEARCH_RESULT_PROJECTION: default projection (default "card")
+- DOCUMENT_FIELD_CACHE_SIZE: lazily fetched documents kept in memory (default 64)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+try:
+    from .http_transport import get_http_transport  # type: ignore
+except Exception:
+    from http_transport import get_http_transport  # type: ignore
+
+SEARCH_API_VERSION = "2023-11-01"
+
+_LIST_FIELDS = [
+    "id", "file_name", "client_name", "project_title", "project_length",
+    "start_date", "end_date", "extraction_timestamp",
+]
+_CARD_FIELDS = _LIST_FIELDS + ["scope_summary", "deliverables", "staffing_plan"]
+
+PROJECTIONS: Dict[str, List[str]] = {
+    "list": _LIST_FIELDS,
+    "card": _CARD_FIELDS,
+    "detail": _CARD_FIELDS + ["exclusions"],
+    "full": ["*"],
+}
+
+# Fields left out of every projection but "full"; fetch with fetch_document_fields
+HEAVY_FIELDS = ("raw_content",)
+
+
+def default_projection() -> str:
+    return os.getenv("SEARCH_RESULT_PROJECTION", "card").strip().lower()
+
+
+def projection_fields(projection: Optional[str] = None) -> List[str]:
+    projection = projection or default_projection()
+    if projection not in PROJECTIONS:
+        raise ValueError(f"Unknown projection: {projection}")
+    return PROJECTIONS[projection]
+
+
+def select_for(projection: Optional[str] = None) -> str:
+    """The `select` value for a projection"""
+    return ",".join(projection_fields(projection))
+
+
+def project(doc: Dict[str, Any], projection: Optional[str] = None) -> Dict[str, Any]:
+    """Copy of doc restricted to a projection (for results built in-process)"""
+    fields = projection_fields(projection)
+    if fields == ["*"]:
+        return dict(doc)
+    return {field: doc[field] for field in fields if field in doc}
+
+
+# Lazily fetched fields, keyed by (endpoint, index, key, fields); Streamlit re-runs
+# the page on every interaction, so an expanded card must not refetch each time
+_field_cache: "OrderedDict[Tuple[str, str, str, Tuple[str, ...]], Dict[str, Any]]" = OrderedDict()
+_field_cache_lock = threading.Lock()
+
+
+def fetch_document_fields(
+    search_endpoint: str,
+    search_key: str,
+    index_name: str,
+    doc_id: str,
+    fields: Sequence[str] = HEAVY_FIELDS,
+) -> Optional[Dict[str, Any]]:
+    """Look up one document by key, selecting only `fields` (None if not found or on error)"""
+    if not doc_id:
+        return None
+    cache_key = (search_endpoint.rstrip('/'), index_name, doc_id, tuple(fields))
+    with _field_cache_lock:
+        if cache_key in _field_cache:
+            _field_cache.move_to_end(cache_key)
+            return dict(_field_cache[cache_key])
+
+    url = f"{search_endpoint.rstrip('/')}/indexes/{index_name}/docs/{quote(doc_id, safe='')}"
+    params = {"api-version": SEARCH_API_VERSION, "$select": ",".join(fields)}
+    try:
+        response = get_http_transport().get(url, headers={'api-key': search_key}, params=params)
+        if response.status_code != 200:
+            if response.status_code != 404:
+                print(f"Document lookup error: {response.status_code} - {response.text}")
+            return None
+        document = {k: v for k, v in response.json().items() if not k.startswith('@odata')}
+    except Exception as e:
+        print(f"Document lookup error: {e}")
+        return None
+
+    with _field_cache_lock:
+        _field_cache[cache_key] = document
+        while len(_field_cache) > int(os.getenv("DOCUMENT_FIELD_CACHE_SIZE", "64")):
+            _field_cache.popitem(last=False)
+    return dict(document)
@@ -12,12 +12,27 @@ This service provides true semantic search capabilities using:
 
 import os
 import json
-import requests
 import asyncio
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
+try:
+    from .embedding_cache import get_query_embedding_cache  # type: ignore
+except Exception:
+    from embedding_cache import get_query_embedding_cache  # type: ignore
+try:
+    from .multi_strategy_search import SearchStrategy, get_multi_strategy_engine  # type: ignore
+except Exception:
+    from multi_strategy_search import SearchStrategy, get_multi_strategy_engine  # type: ignore
+try:
+    from .http_transport import get_http_transport  # type: ignore
+except Exception:
+    from http_transport import get_http_transport  # type: ignore
+try:
+    from .index_metadata import IndexMetadata, get_index_metadata  # type: ignore
+except Exception:
+    from index_metadata import IndexMetadata, get_index_metadata  # type: ignore
 
 
 class SemanticSearchService:
@@ -70,7 +85,12 @@ class SemanticSearchService:
             )
     
     async def get_embedding(self, text: str) -> Optional[List[float]]:
-        """Get vector embedding for text using OpenAI"""
+        """Get vector embedding for text using OpenAI (served from the shared cache when possible)"""
+        cache = get_query_embedding_cache()
+        cache_model = f"{self.openai_deployment}:text-embedding-3-small"
+        cached = cache.get(cache_model, text)
+        if cached is not None:
+            return cached
         try:
             await self.initialize_openai()
             if not self.openai_client:
@@ -80,7 +100,9 @@ class SemanticSearchService:
                 model="text-embedding-3-small",
                 input=text
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            cache.put(cache_model, text, embedding)
+            return embedding
         except Exception as e:
             print(f"Error getting embedding: {e}")
             return None
@@ -148,14 +170,23 @@ class SemanticSearchService:
         Returns:
             Search results dictionary or None if error
         """
-        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'api-key': self.search_key
-        }
-        
-        # Build search payload
+        embedding = await self.get_embedding(query) if use_vector else None
+        payload = self._build_search_payload(
+            query, search_fields, filter_expression, top, skip, use_semantic, embedding
+        )
+        return await asyncio.to_thread(self._post_search, payload)
+    
+    def _build_search_payload(
+        self,
+        query: str,
+        search_fields: Optional[str],
+        filter_expression: Optional[str],
+        top: int,
+        skip: int,
+        use_semantic: bool,
+        embedding: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        """Build the Azure Search request body for one search"""
         payload = {
             "search": query,
             "top": top,
@@ -178,22 +209,31 @@ class SemanticSearchService:
             payload["answers"] = "extractive|count-3"
             payload["captions"] = "extractive|highlight-true"
         
-        # Add vector search if enabled and we have embeddings
-        if use_vector:
-            embedding = await self.get_embedding(query)
-            if embedding:
-                payload["vectorQueries"] = [{
-                    "kind": "vector",
-                    "vector": embedding,
-                    "kNearestNeighbors": top,
-                    "fields": "content_vector"
-                }]
-                # Use hybrid search (lexical + vector)
-                payload["queryType"] = "semantic"
-                payload["semanticConfiguration"] = "default"
+        # Add vector search if we have an embedding
+        if embedding:
+            payload["vectorQueries"] = [{
+                "kind": "vector",
+                "vector": embedding,
+                "kNearestNeighbors": top,
+                "fields": "content_vector"
+            }]
+            # Use hybrid search (lexical + vector)
+            payload["queryType"] = "semantic"
+            payload["semanticConfiguration"] = "default"
+        
+        return payload
+    
+    def _post_search(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """POST one search request over the pooled session"""
+        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
+        
+        headers = {
+            'Content-Type': 'application/json',
+            'api-key': self.search_key
+        }
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = get_http_transport().post(url, headers=headers, json=payload, timeout=timeout)
             
             if response.status_code == 200:
                 return response.json()
@@ -205,6 +245,12 @@ class SemanticSearchService:
             print(f"Search error: {e}")
             return None
     
+    def _strategy(self, name: str, score: float, payload: Dict[str, Any]) -> SearchStrategy:
+        """Wrap one prepared request as a strategy for the shared engine"""
+        def run(timeout: float) -> Optional[Dict[str, Any]]:
+            return self._post_search(payload, timeout=timeout)
+        return SearchStrategy(name=name, score=score, run=run)
+    
     async def multi_strategy_search(
         self, 
         query: str, 
@@ -214,86 +260,41 @@ class SemanticSearchService:
         skip: int = 0
     ) -> Optional[Dict[str, Any]]:
         """
-        Perform search using multiple strategies and combine results
+        Perform search using multiple strategies and combine results.
+
+        The query is embedded once up front; all strategies then run
+        concurrently and are merged in priority order.
         """
-        all_results = []
-        seen_ids = set()
+        def payload(q: str, n: int, use_semantic: bool, embedding: Optional[List[float]] = None) -> Dict[str, Any]:
+            return self._build_search_payload(q, search_fields, filter_expression, n, skip, use_semantic, embedding)
+        
+        strategies = []
         
         # Strategy 1: Semantic search with vector embeddings
-        results1 = await self.semantic_search(
-            query, search_fields, filter_expression, top, skip, use_semantic=True, use_vector=True
-        )
-        if results1 and results1.get('value'):
-            for doc in results1['value']:
-                if doc['id'] not in seen_ids:
-                    doc['search_strategy'] = 'semantic_vector'
-                    doc['strategy_score'] = 1.0
-                    all_results.append(doc)
-                    seen_ids.add(doc['id'])
+        embedding = await self.get_embedding(query)
+        strategies.append(self._strategy('semantic_vector', 1.0, payload(query, top, True, embedding)))
         
         # Strategy 2: Semantic search without vector (fallback)
-        results2 = await self.semantic_search(
-            query, search_fields, filter_expression, top, skip, use_semantic=True, use_vector=False
-        )
-        if results2 and results2.get('value'):
-            for doc in results2['value']:
-                if doc['id'] not in seen_ids:
-                    doc['search_strategy'] = 'semantic_lexical'
-                    doc['strategy_score'] = 0.9
-                    all_results.append(doc)
-                    seen_ids.add(doc['id'])
+        strategies.append(self._strategy('semantic_lexical', 0.9, payload(query, top, True)))
         
         # Strategy 3: Fuzzy search with Lucene operators
         fuzzy_query = self.create_fuzzy_query(query)
         if fuzzy_query != query:
-            results3 = await self.semantic_search(
-                fuzzy_query, search_fields, filter_expression, top, skip, use_semantic=False, use_vector=False
-            )
-            if results3 and results3.get('value'):
-                for doc in results3['value']:
-                    if doc['id'] not in seen_ids:
-                        doc['search_strategy'] = 'fuzzy_match'
-                        doc['strategy_score'] = 0.8
-                        all_results.append(doc)
-                        seen_ids.add(doc['id'])
+            strategies.append(self._strategy('fuzzy_match', 0.8, payload(fuzzy_query, top, False)))
         
         # Strategy 4: Synonym expansion
         expanded_query = self.expand_query_with_synonyms(query)
         if expanded_query != query:
-            results4 = await self.semantic_search(
-                expanded_query, search_fields, filter_expression, top, skip, use_semantic=False, use_vector=False
-            )
-            if results4 and results4.get('value'):
-                for doc in results4['value']:
-                    if doc['id'] not in seen_ids:
-                        doc['search_strategy'] = 'synonym_match'
-                        doc['strategy_score'] = 0.7
-                        all_results.append(doc)
-                        seen_ids.add(doc['id'])
+            strategies.append(self._strategy('synonym_match', 0.7, payload(expanded_query, top, False)))
         
         # Strategy 5: Individual term search (for multi-word queries)
         if len(query.split()) > 1:
             for term in query.split():
                 if len(term) > 2:  # Skip short terms
-                    results5 = await self.semantic_search(
-                        term, search_fields, filter_expression, top//2, skip, use_semantic=False, use_vector=False
-                    )
-                    if results5 and results5.get('value'):
-                        for doc in results5['value']:
-                            if doc['id'] not in seen_ids:
-                                doc['search_strategy'] = 'term_match'
-                                doc['strategy_score'] = 0.6
-                                all_results.append(doc)
-                                seen_ids.add(doc['id'])
+                    strategies.append(self._strategy('term_match', 0.6, payload(term, top//2, False)))
         
-        # Sort by strategy score (semantic matches first)
-        all_results.sort(key=lambda x: x.get('strategy_score', 0), reverse=True)
-        
-        # Return in the same format as original search
-        return {
-            '@odata.count': len(all_results),
-            'value': all_results[:top]
-        }
+        # Engine blocks on HTTP; keep the event loop free
+        return await asyncio.to_thread(get_multi_strategy_engine().run, strategies, top)
     
     async def search_by_client(self, client_name: str, top: int = 20) -> Optional[Dict[str, Any]]:
         """Search for SOWs by client name with semantic matching"""
@@ -360,101 +361,22 @@ class SemanticSearchService:
         """Get all documents from the index"""
         return await self.multi_strategy_search(query="*", top=top)
     
+    @property
+    def metadata(self) -> IndexMetadata:
+        """Facet/$count metadata for this index (TTL-cached, shared across instances)"""
+        return get_index_metadata(self.search_endpoint, self.search_key, self.index_name)
+    
     def get_unique_clients(self) -> List[str]:
-        """Get list of unique client names"""
-        # Use synchronous search for this
-        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
-        headers = {
-            'Content-Type': 'application/json',
-            'api-key': self.search_key
-        }
-        payload = {"search": "*", "top": 1000, "count": True}
-        
-        try:
-            response = requests.post(url, headers=headers, json=payload)
-            if response.status_code == 200:
-                results = response.json()
-                clients = set()
-                for doc in results.get('value', []):
-                    client = doc.get('client_name', '').strip()
-                    if client:
-                        clients.add(client)
-                return sorted(list(clients))
-        except Exception as e:
-            print(f"Error getting clients: {e}")
-        
-        return []
+        """Get list of unique client names (from a facet, no documents fetched)"""
+        return self.metadata.unique_values('client_name')
     
     def get_unique_project_lengths(self) -> List[str]:
-        """Get list of unique project lengths"""
-        # Use synchronous search for this
-        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
-        headers = {
-            'Content-Type': 'application/json',
-            'api-key': self.search_key
-        }
-        payload = {"search": "*", "top": 1000, "count": True}
-        
-        try:
-            response = requests.post(url, headers=headers, json=payload)
-            if response.status_code == 200:
-                results = response.json()
-                lengths = set()
-                for doc in results.get('value', []):
-                    length = doc.get('project_length', '').strip()
-                    if length:
-                        lengths.add(length)
-                return sorted(list(lengths))
-        except Exception as e:
-            print(f"Error getting lengths: {e}")
-        
-        return []
+        """Get list of unique project lengths (from a facet, no documents fetched)"""
+        return self.metadata.unique_values('project_length')
     
     def get_stats(self) -> Dict[str, Any]:
         """Get basic statistics about the index"""
-        # Use synchronous search for this
-        url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
-        headers = {
-            'Content-Type': 'application/json',
-            'api-key': self.search_key
-        }
-        payload = {"search": "*", "top": 1000, "count": True}
-        
-        try:
-            response = requests.post(url, headers=headers, json=payload)
-            if response.status_code == 200:
-                results = response.json()
-                documents = results.get('value', [])
-                total_docs = len(documents)
-                
-                # Count unique clients
-                clients = set()
-                for doc in documents:
-                    client = doc.get('client_name', '').strip()
-                    if client:
-                        clients.add(client)
-                
-                # Get date range
-                dates = []
-                for doc in documents:
-                    start_date = doc.get('start_date', '')
-                    if start_date:
-                        dates.append(start_date)
-                
-                date_range = None
-                if dates:
-                    dates.sort()
-                    date_range = {"earliest": dates[0], "latest": dates[-1]}
-                
-                return {
-                    "total_documents": total_docs,
-                    "clients": len(clients),
-                    "date_range": date_range
-                }
-        except Exception as e:
-            print(f"Error getting stats: {e}")
-        
-        return {"total_documents": 0, "clients": 0, "date_range": None}
+        return self.metadata.stats()
     
     def format_search_results(self, results: Dict[str, Any], show_details: bool = True) -> List[Dict[str, Any]]:
         """Format search results for display in Streamlit"""
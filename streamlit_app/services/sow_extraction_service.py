@@ -10,6 +10,11 @@ Refactored from sow_data_extractor.py to be reusable across different applicatio
 import os
 import json
 import asyncio
+import contextvars
+import contextlib
+import time
+import uuid
+import re
 import pandas as pd
 from datetime import datetime, date
 from typing import Dict, List, Any, Optional, Callable
@@ -24,16 +29,51 @@ from azure.identity.aio import DefaultAzureCredential
 _DOCINT_AVAILABLE = False
 try:
     # Preferred: relative import when part of package
-    from .document_intelligence_service import AzureDocumentIntelligenceService  # type: ignore
+    from .document_intelligence_service import AzureDocumentIntelligenceService, analysis_to_dict, analysis_from_dict  # type: ignore
     _DOCINT_AVAILABLE = True
 except Exception:
     try:
         # Fallback: absolute import when loaded as a top-level module
-        from document_intelligence_service import AzureDocumentIntelligenceService  # type: ignore
+        from document_intelligence_service import AzureDocumentIntelligenceService, analysis_to_dict, analysis_from_dict  # type: ignore
         _DOCINT_AVAILABLE = True
     except Exception:
         _DOCINT_AVAILABLE = False
 
+try:
+    from .extraction_cache import ExtractionCache, get_default_extraction_cache  # type: ignore
+    from .normalization_memo import get_normalization_memo  # type: ignore
+    from .pdf_text_engine import PDFTextEngine  # type: ignore
+    from .title_matcher import TitleIndex  # type: ignore
+    from .extraction_events import (  # type: ignore
+        ExtractionEvent, ProgressEventBus, BatchProgress, JsonlEventSink, planned_stages,
+        DOCUMENT_START, DOCUMENT_END, STAGE_START, STAGE_END, PROGRESS, BATCH_START, BATCH_END,
+    )
+    from .extraction_tracing import TraceRecorder, write_otlp  # type: ignore
+except Exception:
+    from extraction_cache import ExtractionCache, get_default_extraction_cache  # type: ignore
+    from normalization_memo import get_normalization_memo  # type: ignore
+    from pdf_text_engine import PDFTextEngine  # type: ignore
+    from title_matcher import TitleIndex  # type: ignore
+    from extraction_events import (  # type: ignore
+        ExtractionEvent, ProgressEventBus, BatchProgress, JsonlEventSink, planned_stages,
+        DOCUMENT_START, DOCUMENT_END, STAGE_START, STAGE_END, PROGRESS, BATCH_START, BATCH_END,
+    )
+    from extraction_tracing import TraceRecorder, write_otlp  # type: ignore
+
+# Chat model used for every extraction prompt
+EXTRACTION_MODEL = "gpt-5-mini"
+
+# Cache versions per extraction stage. Bump a stage's version whenever its
+# prompt, schema or parsing logic changes; only that stage's cached results
+# are invalidated.
+EXTRACTION_STAGE_VERSIONS = {
+    "text": "2",
+    "di_analysis": "1",
+    "sow_metadata": "1",
+    "staffing_targeted": "1",
+    "staffing_minimal": "4",
+}
+
 
 @dataclass
 class ExtractionResult:
@@ -47,45 +87,282 @@ class ExtractionResult:
 
 @dataclass
 class ExtractionProgress:
-    """Progress tracking for extraction process"""
+    """Progress tracking for extraction process.
+
+    ``percentage`` is per-file for file-level stages; ``file_name`` identifies
+    which document an event belongs to so concurrent batch events can be
+    aggregated. Batch-level events (``batch_processing``) have no file_name.
+    """
     stage: str
     message: str
     percentage: int
     details: Optional[Dict[str, Any]] = None
+    file_name: Optional[str] = None
+
+
+# File currently being processed by this task; propagated into worker threads
+_current_file: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("sow_current_file", default=None)
+# Trace of the current document and the innermost open span (parent of new spans)
+_current_trace: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("sow_current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("sow_current_span", default=None)
+
+
+def _new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
 
 
 class SOWExtractionService:
     """Core service for extracting structured data from SOW documents using Azure OpenAI"""
     
-    def __init__(self, sows_directory: str = "sows"):
+    def __init__(
+        self,
+        sows_directory: str = "sows",
+        max_concurrency: Optional[int] = None,
+        llm_concurrency: Optional[int] = None,
+        di_concurrency: Optional[int] = None,
+        blob_concurrency: Optional[int] = None,
+        cache: Optional[ExtractionCache] = None,
+        openai_client: Optional[Any] = None,
+        blob_service_client: Optional[Any] = None,
+        docint: Optional["AzureDocumentIntelligenceService"] = None,
+    ):
         self.sows_directory = Path(sows_directory)
         self.openai_client = None
         self.blob_service_client = None
+        # Pre-built clients (e.g. the offline benchmark's replay backends) are used as-is by initialize()
+        self._client_overrides = {"openai": openai_client, "blob": blob_service_client}
         self.containers = {
             "sows": "sows",           # Raw original files
             "extracted": "extracted", # Extracted text files
             "parsed": "parsed"        # Structured JSON data
         }
         self.progress_callback: Optional[Callable[[ExtractionProgress], None]] = None
+        # Structured events (documents, stages, progress) for any number of subscribers
+        self.events = ProgressEventBus()
+        self.batch_progress = BatchProgress()
+        self._progress_subscription = None
+        if os.getenv("EXTRACTION_EVENT_LOG"):
+            self.events.subscribe(JsonlEventSink(os.getenv("EXTRACTION_EVENT_LOG")), name="jsonl_log")
+        # Stage spans (for JSONL / OTLP export and trace_summary.py)
+        self.trace_recorder: Optional[TraceRecorder] = None
+        if os.getenv("EXTRACTION_TRACE_JSONL") or os.getenv("EXTRACTION_TRACE_OTLP"):
+            self.trace_recorder = TraceRecorder(os.getenv("EXTRACTION_TRACE_JSONL") or None)
+            self.events.subscribe(self.trace_recorder, name="trace_recorder")
+        # Batch concurrency: documents in flight, plus per-backend caps so one
+        # service's rate limit doesn't dictate the whole pipeline
+        self.max_concurrency = max_concurrency or int(os.getenv("SOW_MAX_CONCURRENCY", "4"))
+        self.backend_limits = {
+            "llm": llm_concurrency or int(os.getenv("SOW_LLM_CONCURRENCY", "4")),
+            "di": di_concurrency or int(os.getenv("SOW_DI_CONCURRENCY", "2")),
+            "blob": blob_concurrency or int(os.getenv("SOW_BLOB_CONCURRENCY", "8")),
+        }
+        self._backend_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # One Document Intelligence client per service (pooled HTTP connections)
+        self._docint: Optional["AzureDocumentIntelligenceService"] = docint
+        # Content-addressed stage cache (None when disabled via SOW_EXTRACTION_CACHE=0)
+        self.cache = cache if cache is not None else get_default_extraction_cache()
+        # DI staffing tables are accepted without the LLM when every score passes
+        self.di_table_thresholds = {
+            "header": float(os.getenv("STAFFING_DI_MIN_HEADER_SCORE", "0.5")),
+            "numeric": float(os.getenv("STAFFING_DI_MIN_NUMERIC_COVERAGE", "0.6")),
+            "consistency": float(os.getenv("STAFFING_DI_MIN_ROW_CONSISTENCY", "0.6")),
+        }
+        # How staffing was obtained per document, plus actual targeted LLM calls
+        self.staffing_paths: Dict[str, int] = {}
     
-    def set_progress_callback(self, callback: Callable[[ExtractionProgress], None]):
-        """Set callback function for progress updates"""
+    def set_progress_callback(self, callback: Optional[Callable[[ExtractionProgress], None]]):
+        """Set callback function for progress updates.
+
+        The callback is an event bus subscriber for progress messages; use
+        ``self.events.subscribe`` directly for document/stage events.
+        """
+        if self._progress_subscription is not None:
+            self.events.unsubscribe(self._progress_subscription)
+            self._progress_subscription = None
         self.progress_callback = callback
-    
+        if callback is None:
+            return
+
+        def deliver(event: ExtractionEvent) -> None:
+            if event.kind == PROGRESS:
+                callback(ExtractionProgress(
+                    stage=event.stage,
+                    message=event.message,
+                    percentage=event.percentage,
+                    details=event.details,
+                    file_name=event.file_name,
+                ))
+
+        self._progress_subscription = self.events.subscribe(deliver, name="progress_callback")
+
+    def _emit(self, event: ExtractionEvent) -> None:
+        # Batch progress is updated inline so the next progress message reflects it
+        self.batch_progress.observe(event)
+        self.events.publish(event)
+
     def _update_progress(self, stage: str, message: str, percentage: int, details: Optional[Dict[str, Any]] = None):
-        """Update progress if callback is set"""
-        if self.progress_callback:
-            progress = ExtractionProgress(stage=stage, message=message, percentage=percentage, details=details)
-            self.progress_callback(progress)
+        """Publish a progress message.
+
+        Safe to call from worker threads: subscribers (e.g. Streamlit widgets)
+        always run on the event loop thread.
+        """
+        self._emit(ExtractionEvent(
+            kind=PROGRESS,
+            stage=stage,
+            message=message,
+            percentage=percentage,
+            details=details,
+            file_name=_current_file.get(),
+        ))
+
+    @contextlib.contextmanager
+    def _span(self, stage: str, bytes: Optional[int] = None, details: Optional[Dict[str, Any]] = None):
+        """Emit stage_start/stage_end around a pipeline step, nested under the current span.
+
+        Yields a dict the step may fill in (``bytes``, ``tokens``, ``details``).
+        Usable in worker threads (asyncio.to_thread carries the trace context).
+        """
+        span: Dict[str, Any] = {"bytes": bytes, "tokens": None, "details": details}
+        file_name = _current_file.get()
+        trace_id, parent_id, span_id = _current_trace.get(), _current_span.get(), _new_span_id()
+        token = _current_span.set(span_id)
+        started_at = time.time()
+        started = time.perf_counter()
+        self._emit(ExtractionEvent(kind=STAGE_START, stage=stage, file_name=file_name, started_at=started_at,
+                                   trace_id=trace_id, span_id=span_id, parent_id=parent_id))
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            self._emit(ExtractionEvent(
+                kind=STAGE_END,
+                stage=stage,
+                file_name=file_name,
+                trace_id=trace_id,
+                span_id=span_id,
+                parent_id=parent_id,
+                started_at=started_at,
+                ended_at=time.time(),
+                duration=time.perf_counter() - started,
+                bytes=span.get("bytes"),
+                tokens=span.get("tokens"),
+                error=error,
+                details=span.get("details"),
+            ))
+
+    @contextlib.asynccontextmanager
+    async def _stage(self, stage: str, bytes: Optional[int] = None, details: Optional[Dict[str, Any]] = None):
+        """Async form of ``_span`` for pipeline stages"""
+        with self._span(stage, bytes=bytes, details=details) as span:
+            yield span
+
+    def _record_span(self, stage: str, seconds: float, details: Optional[Dict[str, Any]] = None) -> None:
+        """Emit a finished span measured elsewhere (e.g. PDF parse / OCR steps)"""
+        ended_at = time.time()
+        self._emit(ExtractionEvent(
+            kind=STAGE_END,
+            stage=stage,
+            file_name=_current_file.get(),
+            trace_id=_current_trace.get(),
+            span_id=_new_span_id(),
+            parent_id=_current_span.get(),
+            started_at=ended_at - seconds,
+            ended_at=ended_at,
+            duration=seconds,
+            details=details,
+        ))
+
+    async def _chat_completion(self, purpose: str, client=None, **request):
+        """chat.completions.create under the LLM cap, traced as ``llm.<purpose>`` with model and tokens"""
+        client = client or self.openai_client
+        async with self._stage(f"llm.{purpose}") as span:
+            queued = time.perf_counter()
+            async with self._backend("llm"):
+                span["details"] = {"model": request.get("model"), "queued_seconds": round(time.perf_counter() - queued, 4)}
+                response = await client.chat.completions.create(**request)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                span["tokens"] = {
+                    "prompt": getattr(usage, "prompt_tokens", 0) or 0,
+                    "completion": getattr(usage, "completion_tokens", 0) or 0,
+                    "total": getattr(usage, "total_tokens", 0) or 0,
+                }
+            span["details"]["model"] = getattr(response, "model", None) or request.get("model")
+        return response
+
+    def _export_trace(self) -> None:
+        """Write the recorded spans as OTLP/JSON when EXTRACTION_TRACE_OTLP is set"""
+        path = os.getenv("EXTRACTION_TRACE_OTLP")
+        if self.trace_recorder is None or not path:
+            return
+        try:
+            write_otlp(self.trace_recorder.spans, path)
+        except OSError as e:
+            print(f"⚠️ Could not write trace to {path}: {e}")
+
+    async def _in_stage(self, stage: str, coro, bytes: Optional[int] = None):
+        """Await ``coro`` inside a stage (for stages spawned as tasks)"""
+        async with self._stage(stage, bytes=bytes):
+            return await coro
+
+    def _backend(self, name: str) -> asyncio.Semaphore:
+        """Concurrency guard for a backend ("llm", "di" or "blob")."""
+        semaphore = self._backend_semaphores.get(name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, self.backend_limits.get(name, 1)))
+            self._backend_semaphores[name] = semaphore
+        return semaphore
     
+    def _stage_model(self, stage: str) -> str:
+        """Model identity folded into a stage's cache key"""
+        if stage == "di_analysis":
+            return f"prebuilt-layout@{os.getenv('AZURE_DOCINT_API_VERSION', '2023-07-31')}"
+        if stage == "staffing_minimal":
+            # Title/level normalization depends on the org chart and the LLM, and the
+            # accepted/low-confidence split on the DI table thresholds
+            thresholds = ",".join(f"{k}={v:g}" for k, v in sorted(self.di_table_thresholds.items()))
+            return f"{os.getenv('AZURE_OPENAI_DEPLOYMENT', '')}/{EXTRACTION_MODEL}/{self._org_chart_fingerprint()}/{thresholds}"
+        if stage in ("sow_metadata", "staffing_targeted"):
+            return f"{os.getenv('AZURE_OPENAI_DEPLOYMENT', '')}/{EXTRACTION_MODEL}"
+        return ""
+
+    def _cache_get(self, file_hash: Optional[str], stage: str) -> Optional[Any]:
+        if not self.cache or not file_hash:
+            return None
+        return self.cache.get(file_hash, stage, EXTRACTION_STAGE_VERSIONS[stage], self._stage_model(stage))
+
+    def _cache_put(self, file_hash: Optional[str], stage: str, value: Any) -> None:
+        if not self.cache or not file_hash:
+            return
+        self.cache.put(file_hash, stage, EXTRACTION_STAGE_VERSIONS[stage], value, self._stage_model(stage))
+
+    def _org_chart_fingerprint(self) -> str:
+        """Short content hash of the org chart CSV (empty if missing)"""
+        if not hasattr(self, '_org_chart_hash'):
+            csv_path = Path(__file__).parents[2] / 'octagon_org_chart.csv'
+            try:
+                self._org_chart_hash = ExtractionCache.hash_file(csv_path)[:16]
+            except OSError:
+                self._org_chart_hash = ''
+        return self._org_chart_hash
+
     async def initialize(self):
         """Initialize Azure OpenAI client and Azure Storage client"""
+        # Bind to the current loop: semaphores and thread-safe progress need it
+        self._loop = asyncio.get_running_loop()
+        self.events.bind(self._loop)
+        self._backend_semaphores = {}
         self._update_progress("initialization", "Initializing Azure services...", 0)
         
         # Note: SSL certificates should now work properly after upgrading certifi
         
         # Initialize OpenAI client
-        self.openai_client = AsyncOpenAI(
+        self.openai_client = self._client_overrides["openai"] or AsyncOpenAI(
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
             base_url=f"{os.getenv('AZURE_OPENAI_ENDPOINT')}/openai/deployments/{os.getenv('AZURE_OPENAI_DEPLOYMENT')}",
             default_query={"api-version": os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview")}
@@ -93,7 +370,10 @@ class SOWExtractionService:
         
         # Initialize Azure Storage client
         account_url = os.getenv("AZURE_STORAGE_ACCOUNT_URL")
-        if account_url:
+        if self._client_overrides["blob"] is not None:
+            self.blob_service_client = self._client_overrides["blob"]
+            self._update_progress("initialization", "Using provided Azure Storage client", 20)
+        elif account_url:
             import certifi
             
             # Set environment variables to use certifi's certificate bundle
@@ -262,9 +542,19 @@ class SOWExtractionService:
                 return None
         return None
 
-    def _parse_di_table_to_entries(self, matrix: list, page_number: int, table_index: int) -> list:
-        if not matrix or not matrix[0]:
-            return []
+    # Role vocabulary and allocation patterns used to pre-classify DI tables
+    # before any (LLM) header remap is attempted
+    _STAFFING_ROLE_RE = re.compile(
+        r"\b(director|manager|vice president|vp|svp|evp|executive|analyst|coordinator|producer|"
+        r"planner|strategist|associate|assistant|designer|developer|consultant|specialist|intern|trainee|"
+        r"personnel|staff|fte)\b",
+        re.I,
+    )
+    _ALLOCATION_RE = re.compile(r"\d+(?:[.,]\d+)?\s*(?:%|hours?|hrs?|fte)?", re.I)
+    HEADER_MEMO_NAMESPACE = "di_headers:v1"
+
+    def _detect_table_headers(self, matrix: list):
+        """Pick the header row and canonicalize it: (header_idx, headers_raw, headers)"""
         import re as _re
         # Pick best header row among first 3
         def _score(row: list) -> int:
@@ -287,11 +577,6 @@ class SOWExtractionService:
                 header_idx = i
         headers_raw = matrix[header_idx]
         headers = [self._canonicalize_header(h) for h in headers_raw]
-        # Build index
-        idx = {}
-        for i, h in enumerate(headers):
-            if h not in idx:
-                idx[h] = i
         # Fill blank headers based on sample data
         for c in range(len(headers)):
             if headers[c]:
@@ -305,23 +590,97 @@ class SOWExtractionService:
             elif any(_re.fullmatch(r"\d{1,4}(?:[.,]\d+)?", v.replace(',', '')) for v in samples if v):
                 headers[c] = 'hours'
 
-        # Optional LLM safety net: if key signals are missing, try to remap headers via LLM
+        return header_idx, headers_raw, headers
+
+    @staticmethod
+    def _needs_header_remap(headers: list) -> bool:
+        """True when canonical headers lack allocation or role/name signals"""
+        need_allocation = not any(h in {'percentage', 'hours'} for h in headers)
+        need_role = not any(h in {'role', 'primary_role'} for h in headers)
+        need_name_or_title = not any(h in {'name', 'role', 'primary_role'} for h in headers)
+        return need_allocation or (need_role and need_name_or_title)
+
+    def _looks_like_staffing_table(self, matrix: list, header_idx: int, headers_raw: list) -> bool:
+        """Cheap staffing/non-staffing classifier (fee tables, deliverable grids, ...)
+
+        A staffing table has role-like cells (in the header or in a good share
+        of body rows) and at least one row carrying a numeric allocation.
+        """
+        body = [row for row in matrix[header_idx + 1: header_idx + 11] if any((c or '').strip() for c in row)]
+        if not body:
+            return False
+        header_text = " ".join(str(h or '') for h in headers_raw)
+        role_rows = sum(1 for row in body if any(self._STAFFING_ROLE_RE.search(c or '') for c in row))
+        allocation_rows = sum(
+            1 for row in body
+            if any(self._ALLOCATION_RE.fullmatch((c or '').replace('$', '#').strip()) for c in row)
+        )
+        has_role_signal = bool(self._STAFFING_ROLE_RE.search(header_text)) or role_rows / len(body) >= 0.3
+        return has_role_signal and allocation_rows > 0
+
+    @staticmethod
+    def _header_signature(headers_raw: list) -> str:
+        return json.dumps([" ".join(str(h or '').lower().split()) for h in headers_raw])
+
+    def _header_remap_candidate(self, matrix: list) -> Optional[list]:
+        """Raw headers of a table that should be remapped, or None"""
+        if not matrix or len(matrix) < 2 or not matrix[0]:
+            return None
+        header_idx, headers_raw, headers = self._detect_table_headers(matrix)
+        if self._needs_header_remap(headers) and self._looks_like_staffing_table(matrix, header_idx, headers_raw):
+            return headers_raw
+        return None
+
+    async def _prefetch_header_mappings(self, tables: list) -> None:
+        """Resolve header remaps for all staffing-like DI tables of a document.
+
+        Distinct header signatures missing from the memo are mapped by the LLM
+        concurrently; parsing then reads every mapping from the memo.
+        """
+        if getattr(self, 'openai_client', None) is None:
+            return
+
+        def _collect() -> Dict[str, list]:
+            pending: Dict[str, list] = {}
+            for table in tables:
+                headers_raw = self._header_remap_candidate(table.to_matrix())
+                if headers_raw is not None:
+                    pending.setdefault(self._header_signature(headers_raw), headers_raw)
+            known = get_normalization_memo().get_many(self.HEADER_MEMO_NAMESPACE, pending.keys())
+            return {k: v for k, v in pending.items() if k not in known}
+
+        missing = await asyncio.to_thread(_collect)
+        if missing:
+            self._update_progress("di_extraction", f"Mapping {len(missing)} unrecognized table headers with GPT-5-mini...", 56)
+            await asyncio.gather(*(self._llm_map_headers(h) for h in missing.values()))
+
+    def _table_index_headers(self, matrix: list):
+        """(header_idx, headers_raw, index_headers): the canonical headers used to read columns"""
+        header_idx, headers_raw, headers = self._detect_table_headers(matrix)
+        # Column index comes from the header text itself (blank-filled guesses only
+        # inform whether a remap is needed)
+        index_headers = [self._canonicalize_header(h) for h in headers_raw]
+        # Header remap safety net: only for staffing-like tables, and only from the
+        # header-signature memo (filled by _prefetch_header_mappings)
         try:
-            need_allocation = not any(h in {'percentage', 'hours'} for h in headers)
-            need_role = not any(h in {'role', 'primary_role'} for h in headers)
-            need_name_or_title = not any(h in {'name', 'role', 'primary_role'} for h in headers)
-            llm_available = getattr(self, 'openai_client', None) is not None
-            if llm_available and (need_allocation or (need_role and need_name_or_title)):
-                mapped = self._llm_map_headers(headers_raw)
+            if self._needs_header_remap(headers) and self._looks_like_staffing_table(matrix, header_idx, headers_raw):
+                mapped = get_normalization_memo().get(self.HEADER_MEMO_NAMESPACE, self._header_signature(headers_raw))
                 if isinstance(mapped, list) and len(mapped) == len(headers):
-                    headers = mapped
-                    # Rebuild index after override
-                    idx = {}
-                    for i, h in enumerate(headers):
-                        if h not in idx:
-                            idx[h] = i
+                    index_headers = mapped
         except Exception:
             pass
+        return header_idx, headers_raw, index_headers
+
+    def _parse_di_table_to_entries(self, matrix: list, page_number: int, table_index: int) -> list:
+        if not matrix or not matrix[0]:
+            return []
+        import re as _re
+        header_idx, headers_raw, index_headers = self._table_index_headers(matrix)
+        # Build index
+        idx = {}
+        for i, h in enumerate(index_headers):
+            if h not in idx:
+                idx[h] = i
         def get(col: str, row: list) -> str:
             j = idx.get(col)
             if j is None or j >= len(row):
@@ -368,8 +727,56 @@ class SOWExtractionService:
             })
         return entries
 
-    def _to_minimal_staffing(self, di_entries: list) -> list:
-        """Convert DI entries to minimal schema: name, level, title, primary_role, hours, hours_pct."""
+    def _score_di_table(self, matrix: list, entries: list) -> Dict[str, float]:
+        """Confidence that parsed DI rows are a clean staffing table (each score 0-1).
+
+        - header: the header row names a title column (role/primary_role/level)
+          and an allocation column (hours/percentage), half a point each
+        - numeric: share of rows with a parsed hours or percentage value
+        - consistency: share of rows with a title and an allocation in range
+        """
+        if not entries:
+            return {"header": 0.0, "numeric": 0.0, "consistency": 0.0, "confidence": 0.0}
+        _, _, index_headers = self._table_index_headers(matrix)
+        header = 0.5 * any(h in {'role', 'primary_role', 'level'} for h in index_headers) \
+            + 0.5 * any(h in {'hours', 'percentage'} for h in index_headers)
+        numeric = sum(1 for e in entries if e.get('hours') is not None or e.get('percentage') is not None) / len(entries)
+
+        def consistent(e: dict) -> bool:
+            if not (e.get('role') or e.get('primary_role') or e.get('level')):
+                return False
+            pct, hours = e.get('percentage'), e.get('hours')
+            if pct is not None and not 0 < pct <= 100:
+                return False
+            if hours is not None and not 0 < hours <= 10000:
+                return False
+            return pct is not None or hours is not None
+
+        consistency = sum(1 for e in entries if consistent(e)) / len(entries)
+        return {
+            "header": header,
+            "numeric": numeric,
+            "consistency": consistency,
+            "confidence": round((header + numeric + consistency) / 3, 3),
+        }
+
+    def _di_table_accepted(self, scores: Dict[str, float]) -> bool:
+        return all(scores[name] >= threshold for name, threshold in self.di_table_thresholds.items())
+
+    def _record_staffing_path(self, path: str) -> None:
+        # Event-loop and worker-thread updates are rare and a lost increment is harmless
+        self.staffing_paths[path] = self.staffing_paths.get(path, 0) + 1
+
+    def get_staffing_path_stats(self) -> Dict[str, int]:
+        """Documents per staffing path (di_deterministic, llm_low_confidence, llm_no_table,
+        llm_no_di, di_low_confidence_fallback) and llm_calls actually made"""
+        return dict(self.staffing_paths)
+
+    def _to_minimal_staffing(self, di_entries: list, normalize: bool = True) -> list:
+        """Convert DI entries to minimal schema: name, level, title, primary_role, hours, hours_pct.
+
+        With ``normalize=False`` titles are left raw (see ``_normalize_staffing_titles_async``).
+        """
         minimal = []
         FTE_YEARLY_HOURS = 1800.0
         for e in di_entries:
@@ -412,74 +819,133 @@ class SOWExtractionService:
                 'hours': _round(hours_val),
                 'hours_pct': _round(pct_val),
             })
+        if not normalize:
+            return minimal
         # Apply org chart normalization for titles and levels
         try:
             return self._apply_org_chart_normalization(minimal)
         except Exception:
             return minimal
 
+    # Heuristic expansions for common abbreviations, tried before fuzzy/LLM tiers
+    TITLE_ABBREVIATIONS = {
+        'svp': 'Senior Vice President',
+        'evp': 'Executive Vice President',
+        'vp': 'Vice President',
+        'ad': 'Account Director',
+        'sam': 'Senior Account Manager',
+        'sae': 'Senior Account Executive',
+        'am': 'Account Manager',
+        'ae': 'Account Executive',
+        'gd': 'Group Director',
+        'sd': 'Senior Director',
+        'dir': 'Director',
+        'mgr': 'Manager',
+        'pm': 'Project Manager',
+        'ap': 'Account Planner',
+    }
+
+    @staticmethod
+    def _title_memo_key(candidate: str) -> str:
+        return " ".join((candidate or '').lower().split())
+
+    def _title_memo_namespace(self) -> str:
+        # Decisions are only valid for the org chart they were made against
+        return f"org_title:{self._org_chart_fingerprint()}"
+
+    def _get_title_index(self) -> TitleIndex:
+        if getattr(self, '_title_index', None) is None:
+            self._title_index = TitleIndex(self._get_org_chart_map())
+        return self._title_index
+
+    def _resolve_from_chart(self, title: str) -> Dict[str, Any]:
+        """Map a canonical title string to {title, level}, preferring chart casing/level"""
+        chart = self._get_org_chart_map()
+        entry = chart.get((title or '').lower())
+        if entry:
+            return {'title': entry['title'], 'level': entry['level']}
+        return {'title': title or None, 'level': None}
+
+    def _match_title_local(self, candidate: str, memo_hits: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Resolve a title without the network: chart, abbreviations, memo, fuzzy index.
+
+        Returns {title, level} (title None for a remembered "no match"), or
+        None when only the LLM could decide.
+        """
+        chart = self._get_org_chart_map()
+        # 1) Direct chart match
+        key = candidate.lower()
+        if key in chart:
+            return {'title': chart[key]['title'], 'level': chart[key]['level']}
+        # 2) Heuristic expansions for common abbreviations
+        ck = candidate.replace('.', '').replace('/', ' ').strip().lower()
+        if ck in self.TITLE_ABBREVIATIONS:
+            return self._resolve_from_chart(self.TITLE_ABBREVIATIONS[ck])
+        # 3) Memoized decision from an earlier document/process
+        memo_key = self._title_memo_key(candidate)
+        if memo_key in memo_hits:
+            return self._resolve_from_chart(memo_hits[memo_key].get('title') or '')
+        # 4) Fuzzy token/edit-distance match against the chart
+        fuzzy = self._get_title_index().match(candidate)
+        if fuzzy:
+            return {'title': chart[fuzzy[0]]['title'], 'level': chart[fuzzy[0]]['level']}
+        return None
+
+    def _unresolved_titles(self, minimal: list) -> List[str]:
+        """Distinct candidate titles that no local tier can resolve"""
+        candidates = []
+        for row in minimal:
+            candidate = ((row.get('title') or '').strip() or (row.get('primary_role') or '').strip())
+            if candidate:
+                candidates.append(candidate)
+        memo_hits = get_normalization_memo().get_many(
+            self._title_memo_namespace(), [self._title_memo_key(c) for c in candidates]
+        )
+        unresolved = []
+        for candidate in dict.fromkeys(candidates):
+            if self._match_title_local(candidate, memo_hits) is None:
+                unresolved.append(candidate)
+        return unresolved
+
+    async def _normalize_staffing_titles_async(self, minimal: list) -> list:
+        """Org chart normalization with at most one batched LLM call for unknown titles."""
+        try:
+            unresolved = await asyncio.to_thread(self._unresolved_titles, minimal)
+            if unresolved:
+                self._update_progress("di_extraction", f"Normalizing {len(unresolved)} unknown titles with GPT-5-mini...", 57)
+                await self._llm_normalize_titles(unresolved)
+            return await asyncio.to_thread(self._apply_org_chart_normalization, minimal)
+        except Exception:
+            return minimal
+
     def _apply_org_chart_normalization(self, minimal: list) -> list:
         """Normalize titles to organization chart and infer numeric levels.
 
         - Uses local CSV octagon_org_chart.csv at project root
-        - Falls back to LLM to expand abbreviations (e.g., VP → Vice President)
+        - Resolves titles via the chart, abbreviations, the persistent memo and
+          a fuzzy index; LLM decisions arrive through the memo
+          (see ``_normalize_staffing_titles_async``)
         - Ensures level is a numeric string when possible
         """
-        chart = self._get_org_chart_map()
+        candidates = [
+            ((row.get('title') or '').strip() or (row.get('primary_role') or '').strip())
+            for row in minimal
+        ]
+        memo_hits = get_normalization_memo().get_many(
+            self._title_memo_namespace(), [self._title_memo_key(c) for c in candidates if c]
+        )
         normalized: list = []
-        for row in minimal:
-            raw_title = (row.get('title') or '').strip()
+        for row, candidate in zip(minimal, candidates):
             raw_level = (row.get('level') or '').strip()
-            primary_role = (row.get('primary_role') or '').strip()
 
-            candidate = raw_title or primary_role
             normalized_title = None
             level_num = None
+            match = self._match_title_local(candidate, memo_hits) if candidate else None
+            if match:
+                normalized_title = match['title']
+                level_num = match['level']
 
-            # 1) Direct chart match
-            key = candidate.lower()
-            if key in chart:
-                normalized_title = chart[key]['title']
-                level_num = chart[key]['level']
-            else:
-                # 2) Heuristic expansions for common abbreviations BEFORE using LLM
-                abbrev_map = {
-                    'svp': 'Senior Vice President',
-                    'evp': 'Executive Vice President',
-                    'vp': 'Vice President',
-                    'ad': 'Account Director',
-                    'sam': 'Senior Account Manager',
-                    'sae': 'Senior Account Executive',
-                    'am': 'Account Manager',
-                    'ae': 'Account Executive',
-                    'gd': 'Group Director',
-                    'sd': 'Senior Director',
-                    'dir': 'Director',
-                    'mgr': 'Manager',
-                    'pm': 'Project Manager',
-                    'ap': 'Account Planner',
-                }
-                ck = candidate.replace('.', '').replace('/', ' ').strip().lower()
-                if ck in abbrev_map:
-                    heuristic_title = abbrev_map[ck]
-                    normalized_title = heuristic_title
-                    # If present in chart, adopt chart casing/level
-                    if heuristic_title.lower() in chart:
-                        normalized_title = chart[heuristic_title.lower()]['title']
-                        level_num = chart[heuristic_title.lower()]['level']
-                # 3) LLM normalization to chart key (fallback)
-                if normalized_title is None:
-                    try:
-                        mapped = self._llm_normalize_title(candidate)
-                        if mapped and mapped.lower() in chart:
-                            normalized_title = chart[mapped.lower()]['title']
-                            level_num = chart[mapped.lower()]['level']
-                        elif mapped:
-                            normalized_title = mapped
-                    except Exception:
-                        pass
-
-            # 4) Level from raw if numeric, else from chart if available, else fallback map
+            # Level from raw if numeric, else from chart if available, else fallback map
             final_level = None
             if raw_level.isdigit():
                 final_level = raw_level
@@ -560,55 +1026,85 @@ class SOWExtractionService:
         self._org_chart_cache = mapping
         return mapping
 
-    def _llm_normalize_title(self, title_text: str) -> str:
-        """Use LLM to normalize a title to the closest org chart canonical title.
+    async def _llm_normalize_titles(self, titles: List[str]) -> Dict[str, str]:
+        """Map several titles to canonical org chart titles with a single LLM call.
 
-        Returns a string (canonical title) or empty string on failure.
+        Results (including "no match", stored as "") are written to the
+        normalization memo. Returns {title: canonical title or ""}; titles the
+        call failed to cover are omitted and not memoized.
         """
-        title_text = (title_text or '').strip()
-        if not title_text:
-            return ''
+        titles = [t for t in dict.fromkeys((t or '').strip() for t in titles) if t]
         client = getattr(self, 'openai_client', None)
-        if client is None:
-            return ''
+        if not titles or client is None:
+            return {}
         chart = self._get_org_chart_map()
         options = sorted({v['title'] for v in chart.values() if v.get('title')})
         if not options:
-            return ''
+            return {}
         try:
             schema = {
                 "type": "object",
                 "properties": {
-                    "title": {"type": "string"}
+                    "matches": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "candidate": {"type": "string"},
+                                "title": {"type": "string"}
+                            },
+                            "required": ["candidate", "title"]
+                        }
+                    }
                 },
-                "required": ["title"]
+                "required": ["matches"]
             }
             sys_prompt = (
-                "Given a role/title string, select the closest canonical title from this list. "
-                "Return only the chosen title as {\"title\": \"...\"}."
+                "For each candidate role/title string, select the closest canonical title from the options list. "
+                "Use an empty string when no option fits. "
+                "Return {\"matches\": [{\"candidate\": \"...\", \"title\": \"...\"}]} with one entry per candidate."
             )
             user_prompt = (
-                "Candidate: " + title_text + "\n"
-                "Options: " + ", ".join(options[:200])
+                "Candidates: " + json.dumps(titles) + "\n"
+                "Options: " + json.dumps(options)
             )
-            resp = client.chat.completions.create(
-                model="gpt-5-mini",
+            resp = await self._chat_completion(
+                "normalize_titles",
+                client=client,
+                model=EXTRACTION_MODEL,
                 messages=[
                     {"role": "system", "content": sys_prompt},
                     {"role": "user", "content": user_prompt},
                 ],
-                response_format={"type": "json_schema", "json_schema": {"name": "normalize_title", "schema": schema}},
+                response_format={"type": "json_schema", "json_schema": {"name": "normalize_titles", "schema": schema}},
             )
             payload = json.loads(resp.choices[0].message.content)
-            return (payload.get('title') or '').strip()
-        except Exception:
-            return ''
+        except Exception as e:
+            self._update_progress("di_extraction", f"Title normalization skipped: {e}", 57)
+            return {}
+
+        allowed = {o.lower(): o for o in options}
+        requested = set(titles)
+        mapped: Dict[str, str] = {}
+        for item in payload.get('matches') or []:
+            candidate = (item.get('candidate') or '').strip()
+            if candidate not in requested:
+                continue
+            # Only accept answers that are actually in the chart
+            mapped[candidate] = allowed.get((item.get('title') or '').strip().lower(), '')
+        get_normalization_memo().put_many(
+            self._title_memo_namespace(),
+            {self._title_memo_key(c): {'title': t} for c, t in mapped.items()},
+            source="llm",
+        )
+        return mapped
 
-    def _llm_map_headers(self, headers_raw: list) -> list:
+    async def _llm_map_headers(self, headers_raw: list) -> list:
         """Use LLM to map raw header strings to canonical keys.
 
         Returns a list of canonical keys in the same order as headers_raw.
         Canonical keys set: name, role, primary_role, level, location, workstream, percentage, hours, ignore
+        Successful mappings are stored in the normalization memo by header signature.
         """
         try:
             client = getattr(self, 'openai_client', None)
@@ -636,8 +1132,10 @@ class SOWExtractionService:
                 "Use percentage for % time/FTE columns; hours for time allocations in hours."
             )
             user_prompt = "Headers: " + json.dumps([str(h or "").strip() for h in headers_raw])
-            resp = client.chat.completions.create(
-                model="gpt-5-mini",
+            resp = await self._chat_completion(
+                "map_headers",
+                client=client,
+                model=EXTRACTION_MODEL,
                 messages=[
                     {"role": "system", "content": sys_prompt},
                     {"role": "user", "content": user_prompt},
@@ -647,34 +1145,109 @@ class SOWExtractionService:
             payload = json.loads(resp.choices[0].message.content)
             mapped = payload.get("mapped")
             if isinstance(mapped, list) and len(mapped) == len(headers_raw):
+                get_normalization_memo().put(
+                    self.HEADER_MEMO_NAMESPACE, self._header_signature(headers_raw), mapped, source="llm"
+                )
                 return mapped
         except Exception:
             return headers_raw
         return headers_raw
 
+    def _di_enabled(self, file_path: Path) -> bool:
+        """Whether Document Intelligence will run (and supersede LLM staffing) for this file"""
+        return (
+            _DOCINT_AVAILABLE
+            and file_path.suffix.lower() == '.pdf'
+            and bool(os.getenv("AZURE_DOCINT_ENDPOINT") and os.getenv("AZURE_DOCINT_API_KEY"))
+        )
+
+    def _get_docint(self) -> "AzureDocumentIntelligenceService":
+        """Shared Document Intelligence client (created on first use)"""
+        if self._docint is None:
+            self._docint = AzureDocumentIntelligenceService()
+        return self._docint
+
     def _extract_staffing_via_document_intelligence(self, file_path: Path) -> Dict[str, Any]:
         """Use Azure Document Intelligence for PDFs to extract staffing entries and minimal schema."""
         if not _DOCINT_AVAILABLE or file_path.suffix.lower() != '.pdf':
             return {"entries": [], "minimal": []}
         try:
             self._update_progress("di_extraction", f"Running Document Intelligence on {file_path.name}...", 55)
-            di = AzureDocumentIntelligenceService()
-            analysis = di.analyze_layout(file_path)
-            tables = analysis.get('tables', [])
-            all_entries = []
-            for idx, table in enumerate(tables, 1):
-                matrix = table.to_matrix()
-                if not matrix or len(matrix) < 2:
-                    continue
-                entries = self._parse_di_table_to_entries(matrix, page_number=table.page_number, table_index=idx)
-                if entries:
-                    all_entries.extend(entries)
-            minimal = self._to_minimal_staffing(all_entries)
-            self._update_progress("di_extraction", f"DI found {len(all_entries)} rows across {len(tables)} tables", 58)
-            return {"entries": all_entries, "minimal": minimal}
+            analysis = self._get_docint().analyze_layout(file_path)
+            return self._staffing_from_di_analysis(analysis)
         except Exception as e:
             self._update_progress("di_extraction", f"DI failed: {e}", 58)
             return {"entries": [], "minimal": []}
+
+    async def _extract_staffing_via_document_intelligence_async(self, file_path: Path, file_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Non-blocking variant: runs the DI analysis in a worker thread under the DI cap.
+
+        With a ``file_hash``, the DI analysis and the minimal staffing are
+        served from / written to the extraction cache.
+        """
+        if not _DOCINT_AVAILABLE or file_path.suffix.lower() != '.pdf':
+            return {"entries": [], "minimal": []}
+        try:
+            cached = self._cache_get(file_hash, "staffing_minimal")
+            if cached is not None:
+                self._update_progress("di_extraction", f"Using cached staffing ({len(cached.get('minimal', []))} rows)", 58)
+                return cached
+            cached_analysis = self._cache_get(file_hash, "di_analysis")
+            if cached_analysis is not None:
+                self._update_progress("di_extraction", "Using cached Document Intelligence analysis", 55)
+                analysis = analysis_from_dict(cached_analysis)
+            else:
+                self._update_progress("di_extraction", f"Running Document Intelligence on {file_path.name}...", 55)
+                async with self._stage("docint.analyze") as span:
+                    async with self._backend("di"):
+                        docint = self._get_docint()
+                        analysis = await docint.analyze_layout_async(file_path)
+                    # DI bills per page; there are no tokens to report
+                    span["details"] = {
+                        "model": f"prebuilt-layout@{docint.api_version}",
+                        "pages": analysis.get("pages"),
+                        "tables": len(analysis.get("tables", [])),
+                        **(analysis.get("timings") or {}),
+                    }
+                self._cache_put(file_hash, "di_analysis", analysis_to_dict(analysis))
+            await self._prefetch_header_mappings(analysis.get('tables', []))
+            result = await asyncio.to_thread(self._staffing_from_di_analysis, analysis, False)
+            result["minimal"] = await self._normalize_staffing_titles_async(result["minimal"])
+            self._cache_put(file_hash, "staffing_minimal", result)
+            return result
+        except Exception as e:
+            self._update_progress("di_extraction", f"DI failed: {e}", 58)
+            return {"entries": [], "minimal": []}
+
+    def _staffing_from_di_analysis(self, analysis: Dict[str, Any], normalize: bool = True) -> Dict[str, Any]:
+        """Parse DI tables into staffing entries and the minimal schema.
+
+        Only tables passing the confidence thresholds feed ``entries``/``minimal``;
+        rows of the other tables are returned as ``low_confidence_entries``.
+        """
+        tables = analysis.get('tables', [])
+        all_entries = []
+        low_confidence = []
+        table_scores = []
+        for idx, table in enumerate(tables, 1):
+            matrix = table.to_matrix()
+            if not matrix or len(matrix) < 2:
+                continue
+            entries = self._parse_di_table_to_entries(matrix, page_number=table.page_number, table_index=idx)
+            if not entries:
+                continue
+            scores = self._score_di_table(matrix, entries)
+            accepted = self._di_table_accepted(scores)
+            (all_entries if accepted else low_confidence).extend(entries)
+            table_scores.append({"table_index": idx, "page": table.page_number, "rows": len(entries),
+                                 "accepted": accepted, **scores})
+        minimal = self._to_minimal_staffing(all_entries, normalize=normalize)
+        message = f"DI found {len(all_entries)} rows across {len(tables)} tables"
+        if low_confidence:
+            message += f" ({len(low_confidence)} low-confidence rows set aside)"
+        self._update_progress("di_extraction", message, 58)
+        return {"entries": all_entries, "minimal": minimal,
+                "low_confidence_entries": low_confidence, "table_scores": table_scores}
     
     def extract_text_from_file(self, file_path: Path) -> str:
         """Extract text from a local file using PyPDF2 or zipfile"""
@@ -686,7 +1259,8 @@ class SOWExtractionService:
             if file_path.suffix.lower() == '.pdf':
                 return self._extract_pdf_text(file_data)
             elif file_path.suffix.lower() == '.docx':
-                return self._extract_docx_text(file_data)
+                with self._span("text_extraction.docx_parse"):
+                    return self._extract_docx_text(file_data)
             else:
                 return ""
                 
@@ -694,80 +1268,28 @@ class SOWExtractionService:
             raise Exception(f"Error extracting text from {file_path}: {e}")
     
     def _extract_pdf_text(self, data: bytes) -> str:
-        """Extract text from PDF using multiple methods"""
+        """Extract page-tagged text from a PDF in one pass (OCR only for image-only pages)"""
+        counts = {"native": 0, "tables": 0, "ocr": 0, "empty": 0}
+
+        def on_page(page, total: int) -> None:
+            counts[page.method] += 1
+            pct = 20 + int(10 * page.page_number / max(1, total))
+            suffix = {"ocr": " (OCR)", "tables": " (pdfplumber tables)"}.get(page.method, "")
+            self._update_progress("text_extraction", f"Extracted page {page.page_number}/{total}{suffix}", pct)
+
+        def on_error(page_number: int, error: Exception) -> None:
+            self._update_progress("text_extraction", f"Page {page_number} extraction error: {error}", 25)
+
+        def on_step(step: str, seconds: float, attributes: Dict[str, Any]) -> None:
+            self._record_span(f"text_extraction.{step}", seconds, attributes)
+
         try:
-            import PyPDF2
-            import io
-            
-            reader = PyPDF2.PdfReader(io.BytesIO(data))
-            text = ""
-            for page in reader.pages[:10]:  # Limit to first 10 pages
-                text += page.extract_text() + "\n"
-            
-            # If we got very little text, try pdfplumber
-            if len(text.strip()) < 500:
-                self._update_progress("text_extraction", "Low text extraction, trying pdfplumber...", 30)
-                text = self._extract_pdf_with_pdfplumber(data)
-            
-            # If still low text, try OCR
-            if len(text.strip()) < 500:
-                self._update_progress("text_extraction", "Still low text, trying OCR...", 40)
-                text = self._extract_pdf_with_ocr(data)
-            
-            return text
+            text = PDFTextEngine().extract(data, on_page=on_page, on_error=on_error, on_step=on_step)
         except Exception as e:
             raise Exception(f"PDF extraction error: {e}")
-    
-    def _extract_pdf_with_pdfplumber(self, data: bytes) -> str:
-        """Extract text using pdfplumber"""
-        try:
-            import pdfplumber
-            import io
-            
-            with pdfplumber.open(io.BytesIO(data)) as pdf:
-                text = ""
-                for page in pdf.pages[:10]:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                    
-                    # Also try to extract tables and convert to text
-                    tables = page.extract_tables()
-                    for table in tables:
-                        if table:
-                            for row in table:
-                                if row:
-                                    row_text = " | ".join([str(cell) for cell in row if cell])
-                                    if row_text.strip():
-                                        text += row_text + "\n"
-                return text
-        except Exception as e:
-            raise Exception(f"PDFplumber extraction error: {e}")
-    
-    def _extract_pdf_with_ocr(self, data: bytes) -> str:
-        """Extract text using OCR"""
-        try:
-            from pdf2image import convert_from_bytes
-            import pytesseract
-            import io
-            
-            # Convert PDF pages to images
-            images = convert_from_bytes(data, first_page=1, last_page=10)
-            
-            text = ""
-            for i, image in enumerate(images):
-                try:
-                    # Use OCR to extract text from image
-                    page_text = pytesseract.image_to_string(image)
-                    if page_text.strip():
-                        text += f"--- PAGE {i+1} ---\n{page_text}\n"
-                except Exception as e:
-                    self._update_progress("text_extraction", f"OCR error on page {i+1}: {e}", 50)
-                    continue
-            
-            return text
-        except Exception as e:
-            raise Exception(f"OCR extraction error: {e}")
+        if counts["ocr"]:
+            self._update_progress("text_extraction", f"OCR used on {counts['ocr']} image-only page(s)", 30)
+        return text
     
     def _extract_docx_text(self, data: bytes) -> str:
         """Extract text from DOCX using zipfile"""
@@ -787,17 +1309,25 @@ class SOWExtractionService:
             raise Exception(f"DOCX extraction error: {e}")
     
     async def extract_sow_data(self, file_name: str, text: str) -> Dict[str, Any]:
-        """Extract structured data from SOW text using GPT-5-mini"""
-        
-        self._update_progress("llm_extraction", "Extracting staffing plan with targeted approach...", 60)
-        
-        # First, try targeted staffing extraction (best-effort; don't fail pipeline on connection issues)
+        """Extract structured data from SOW text using GPT-5-mini.
+
+        Runs the metadata call and the targeted staffing call concurrently.
+        """
+        staffing_task = asyncio.create_task(self._get_targeted_staffing(text, None))
         try:
-            staffing_plan = await self.extract_staffing_plan_targeted(text)
-        except Exception as e:
-            self._update_progress("llm_extraction", f"Targeted staffing skipped: {e}", 65)
-            staffing_plan = []
-        
+            result = await self.extract_sow_metadata(file_name, text)
+        except Exception:
+            staffing_task.cancel()
+            raise
+        result["staffing_plan"] = await staffing_task
+        return result
+
+    async def extract_sow_metadata(self, file_name: str, text: str) -> Dict[str, Any]:
+        """Extract everything except the staffing plan from SOW text using GPT-5-mini.
+
+        The returned dict has an empty ``staffing_plan``; staffing comes from
+        Document Intelligence or ``extract_staffing_plan_targeted``.
+        """
         self._update_progress("llm_extraction", "Extracting structured data with GPT-5-mini...", 70)
         
         # JSON schema for structured output
@@ -819,22 +1349,9 @@ class SOWExtractionService:
                     "type": "array",
                     "items": {"type": "string"},
                     "description": "List of explicitly mentioned exclusions or items not included"
-                },
-                "staffing_plan": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "name": {"type": "string", "description": "Employee or role name"},
-                            "role": {"type": "string", "description": "Job title or role"},
-                            "allocation": {"type": "string", "description": "FTE percentage, hours, or time allocation"}
-                        },
-                        "required": ["name", "role", "allocation"]
-                    },
-                    "description": "Project staffing plan with employee details"
                 }
             },
-            "required": ["client_name", "project_title", "scope_summary", "deliverables", "exclusions", "staffing_plan"]
+            "required": ["client_name", "project_title", "scope_summary", "deliverables", "exclusions"]
         }
         
         system_prompt = """You are an expert SOW analyst. Extract the requested information from the SOW document.
@@ -844,36 +1361,9 @@ class SOWExtractionService:
         - If dates are not provided, leave start_date and end_date as null
         - For project_length, look for explicit duration mentions first (e.g., "12 months", "6 weeks"). If not found but dates are available, calculate the duration
         - For exclusions, look for sections titled "Exclusions", "Not Included", "Out of Scope", or similar language
-        
-        CRITICAL - For staffing_plan extraction:
-        - Look for explicit "Staffing Plan", "Staff Plan", or similar sections first
-        - ALSO look for staffing data in sections titled "Fees", "Resources", "Personnel", "Team", or any table containing:
-          * Personnel/Staff names (even if redacted as [BLACKED OUT])
-          * Job levels/roles (EVP, VP, Director, Manager, etc.)
-          * Time allocations (% Time, FTE, hours, days, months)
-          * Locations (US, UK, etc.)
-        - Extract structured tables that show:
-          * Personnel names (use "N/A" if redacted/blacked out)
-          * Roles/titles/levels 
-          * Allocations (hours, percentages, FTE, days, months)
-        - Look for patterns in tables with columns like:
-          * "Name" + "Title/Role" + "Hours/%/FTE"
-          * "Personnel" + "Level" + "% Time" + "hours"
-          * "Staff" + "Position" + "Allocation"
-        - Include ANY structured data that shows who is working on the project and how much time they're allocated
-        - Be thorough - staffing information may be in fee tables, resource tables, or other sections
-        
-        EXAMPLES of what to extract:
-        - "David Hargis, SVP, 45 hours, 2.50%" -> name: "David Hargis", role: "SVP", allocation: "45 hours (2.50%)"
-        - "[BLACKED OUT], EVP, 1%, 9 hours" -> name: "N/A", role: "EVP", allocation: "9 hours (1%)"
-        - Table with columns "Personnel", "Level", "% Time", "hours" -> extract each row as staffing plan entry
-        - "Vice President Client Services 67 Sr. Project Manager Client Services 265" -> 
-          [{"name": "Vice President", "role": "Client Services", "allocation": "67 hours"}, {"name": "Sr. Project Manager", "role": "Client Services", "allocation": "265 hours"}]
-        - "Title Discipline Hours Vice President Client Services 67 Sr. Vice President Strategy 194" -> extract each role as separate entry
-        
+        - Staffing plans are extracted separately; do not include them
         - Be precise and accurate - do not infer or assume information
-        - Return null for fields that cannot be determined from the text
-        - If absolutely no staffing information is found, return an empty array"""
+        - Return null for fields that cannot be determined from the text"""
         
         user_prompt = f"""Extract the following information from this SOW document:
 
@@ -894,21 +1384,16 @@ class SOWExtractionService:
         ]
         
         try:
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-5-mini",
+            response = await self._chat_completion(
+                "sow_metadata",
+                model=EXTRACTION_MODEL,
                 messages=messages,
                 response_format={"type": "json_schema", "json_schema": {"name": "sow_extraction", "schema": json_schema}}
             )
             
             result = json.loads(response.choices[0].message.content)
             result["file_name"] = file_name
-            
-            # Add the pre-extracted staffing plan
-            result["staffing_plan"] = staffing_plan
-            
-            # Normalize staffing plan allocations to percentages
-            if result.get("staffing_plan"):
-                result["staffing_plan"] = self.normalize_staffing_plan(result["staffing_plan"])
+            result["staffing_plan"] = []
             
             # Calculate project length if not provided explicitly
             if not result.get("project_length") and result.get("start_date") and result.get("end_date"):
@@ -922,6 +1407,35 @@ class SOWExtractionService:
         except Exception as e:
             raise Exception(f"Error extracting data from {file_name}: {e}")
     
+    async def _get_sow_metadata(self, file_name: str, text: str, file_hash: Optional[str]) -> Dict[str, Any]:
+        """Metadata stage, served from the extraction cache when possible"""
+        data = self._cache_get(file_hash, "sow_metadata")
+        if data:
+            self._update_progress("llm_extraction", "Using cached structured data", 70)
+            # Same content may arrive under a different name
+            data["file_name"] = file_name
+            return data
+        data = await self.extract_sow_metadata(file_name, text)
+        self._cache_put(file_hash, "sow_metadata", data)
+        return data
+
+    async def _get_targeted_staffing(self, text: str, file_hash: Optional[str]) -> list:
+        """Targeted staffing stage (best-effort), served from the extraction cache when possible"""
+        cached = self._cache_get(file_hash, "staffing_targeted")
+        if cached is not None:
+            self._update_progress("llm_extraction", f"Using cached staffing plan ({len(cached)} rows)", 65)
+            return cached
+        self._update_progress("llm_extraction", "Extracting staffing plan with targeted approach...", 60)
+        self._record_staffing_path("llm_calls")
+        try:
+            staffing_plan = await self.extract_staffing_plan_targeted(text)
+        except Exception as e:
+            # Failures aren't cached so a later run can retry
+            self._update_progress("llm_extraction", f"Targeted staffing skipped: {e}", 65)
+            return []
+        self._cache_put(file_hash, "staffing_targeted", staffing_plan)
+        return staffing_plan
+
     async def extract_staffing_plan_targeted(self, text: str) -> list:
         """Extract staffing plan using targeted approach for better accuracy"""
         try:
@@ -986,8 +1500,9 @@ Examples of what to extract:
 - "Vice President Client Services 67" → {{"name": "N/A", "role": "Vice President, Client Services", "allocation": "67 hours"}}
 - Table rows with Name/Role/Hours columns → extract each row as a separate entry"""
                 
-                response = await self.openai_client.chat.completions.create(
-                    model="gpt-5-mini",
+                response = await self._chat_completion(
+                    "staffing_targeted",
+                    model=EXTRACTION_MODEL,
                     messages=[
                         {'role': 'system', 'content': 'You are a data extraction expert. Extract staffing information and return only valid JSON.'},
                         {'role': 'user', 'content': prompt}
@@ -1014,8 +1529,7 @@ Examples of what to extract:
                 return False
             
             # Read file data
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
+            file_data = await asyncio.to_thread(file_path.read_bytes)
             
             # Upload to sows container with timeout
             blob_client = self.blob_service_client.get_blob_client(
@@ -1025,14 +1539,15 @@ Examples of what to extract:
             
             # Use asyncio.wait_for to add timeout
             self._update_progress("upload", f"Uploading {file_name} ({len(file_data)} bytes) to sows container...", 75)
-            await asyncio.wait_for(
-                blob_client.upload_blob(
-                    file_data,
-                    overwrite=True,
-                    content_type="application/pdf" if file_name.lower().endswith('.pdf') else "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                ),
-                timeout=120.0  # 2 minute timeout
-            )
+            async with self._backend("blob"):
+                await asyncio.wait_for(
+                    blob_client.upload_blob(
+                        file_data,
+                        overwrite=True,
+                        content_type="application/pdf" if file_name.lower().endswith('.pdf') else "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                    ),
+                    timeout=120.0  # 2 minute timeout
+                )
             
             self._update_progress("upload", f"Uploaded raw file to sows container: {file_name}", 76)
             return True
@@ -1059,14 +1574,15 @@ Examples of what to extract:
             )
             
             self._update_progress("upload", f"Uploading extracted text ({len(text)} chars) to extracted container...", 77)
-            await asyncio.wait_for(
-                blob_client.upload_blob(
-                    text.encode('utf-8'),
-                    overwrite=True,
-                    content_type="text/plain"
-                ),
-                timeout=60.0  # 1 minute timeout
-            )
+            async with self._backend("blob"):
+                await asyncio.wait_for(
+                    blob_client.upload_blob(
+                        text.encode('utf-8'),
+                        overwrite=True,
+                        content_type="text/plain"
+                    ),
+                    timeout=60.0  # 1 minute timeout
+                )
             
             self._update_progress("upload", f"Uploaded extracted text to extracted container: {text_blob_name}", 78)
             return True
@@ -1096,14 +1612,15 @@ Examples of what to extract:
             )
             
             self._update_progress("upload", f"Uploading structured JSON ({len(json_data)} chars) to parsed container...", 79)
-            await asyncio.wait_for(
-                blob_client.upload_blob(
-                    json_data.encode('utf-8'),
-                    overwrite=True,
-                    content_type="application/json"
-                ),
-                timeout=60.0  # 1 minute timeout
-            )
+            async with self._backend("blob"):
+                await asyncio.wait_for(
+                    blob_client.upload_blob(
+                        json_data.encode('utf-8'),
+                        overwrite=True,
+                        content_type="application/json"
+                    ),
+                    timeout=60.0  # 1 minute timeout
+                )
             
             self._update_progress("upload", f"Uploaded JSON to Azure Storage: {json_blob_name}", 90)
             return True
@@ -1127,43 +1644,145 @@ Examples of what to extract:
         except Exception as e:
             raise Exception(f"Error listing files: {e}")
     
-    async def process_single_sow(self, file_path: Path, skip_uploads: bool = False) -> ExtractionResult:
+    async def process_single_sow(self, file_path: Path, skip_uploads: bool = False, use_cache: bool = True) -> ExtractionResult:
         """Process a single SOW document and extract data"""
         start_time = datetime.now()
-        
         try:
             # Always (re)initialize in the CURRENT event loop to avoid closed-loop issues with async clients
             await self.initialize()
-            
+        except Exception as e:
+            processing_time = (datetime.now() - start_time).total_seconds()
+            return ExtractionResult(
+                success=False,
+                error=str(e),
+                file_name=file_path.name,
+                processing_time=processing_time
+            )
+        self.batch_progress.reset(1)
+        try:
+            return await self._process_single_sow(file_path, skip_uploads=skip_uploads, use_cache=use_cache)
+        finally:
+            await self.events.flush()
+            self._export_trace()
+            await self._close_loop_clients()
+
+    async def _close_loop_clients(self):
+        """Close clients bound to this run's event loop (Streamlit runs each upload on a new loop)"""
+        aclose = getattr(self._docint, "aclose", None)
+        if aclose is not None:
+            try:
+                await aclose()
+            except Exception as e:
+                print(f"⚠️ Could not close Document Intelligence client: {e}")
+
+    async def _process_single_sow(self, file_path: Path, skip_uploads: bool = False, use_cache: bool = True) -> ExtractionResult:
+        """Process one document using already-initialized clients (safe to run concurrently).
+
+        With ``use_cache``, each stage (text, DI, structured data, staffing) is
+        looked up in the extraction cache by file content hash first.
+        """
+        start_time = datetime.now()
+        started = time.perf_counter()
+        token = _current_file.set(file_path.name)
+        # One trace per document; stages nest under the document span
+        trace_id, root_span_id = uuid.uuid4().hex, _new_span_id()
+        trace_token = _current_trace.set(trace_id)
+        span_token = _current_span.set(root_span_id)
+        tasks: List[asyncio.Task] = []
+        di_task = None
+
+        def spawn(coro) -> asyncio.Task:
+            task = asyncio.create_task(coro)
+            tasks.append(task)
+            return task
+
+        try:
+            file_size = file_path.stat().st_size
+        except OSError:
+            file_size = None
+        use_di = self._di_enabled(file_path)
+        started_at = time.time()
+        self._emit(ExtractionEvent(
+            kind=DOCUMENT_START,
+            file_name=file_path.name,
+            trace_id=trace_id,
+            span_id=root_span_id,
+            started_at=started_at,
+            bytes=file_size,
+            details={"stages": list(planned_stages(use_di, skip_uploads))},
+        ))
+        error = None
+        
+        try:
             self._update_progress("file_processing", f"Processing {file_path.name}...", 10)
             
-            # Extract text
-            self._update_progress("text_extraction", "Extracting text from document...", 20)
-            text = self.extract_text_from_file(file_path)
-            if not text:
-                raise Exception(f"Failed to extract text from {file_path.name}")
-            
-            self._update_progress("text_extraction", f"Extracted {len(text)} characters", 30)
-            
-            # Extract structured data
-            self._update_progress("llm_extraction", "Extracting structured data with GPT-5-mini...", 50)
-            data = await self.extract_sow_data(file_path.name, text)
+            file_hash = None
+            if use_cache and self.cache:
+                file_hash = await asyncio.to_thread(ExtractionCache.hash_file, file_path)
 
-            # If PDF, replace staffing_plan with Document Intelligence minimal
-            if file_path.suffix.lower() == '.pdf':
-                di_result = self._extract_staffing_via_document_intelligence(file_path)
-                if di_result.get('minimal'):
-                    data['staffing_plan'] = di_result['minimal']
-            
-            # Uploads (optional)
+            # Stage graph: DI only needs the file, so it starts immediately; the
+            # metadata LLM call starts once text is ready. Targeted staffing (LLM)
+            # runs only when DI can't supply it. Nothing is uploaded unless the
+            # whole extraction succeeded.
+            if use_di:
+                di_task = spawn(self._in_stage(
+                    "di_extraction",
+                    self._extract_staffing_via_document_intelligence_async(file_path, file_hash=file_hash),
+                    bytes=file_size,
+                ))
+            # Extract text (blocking parsers/OCR run off the event loop)
+            async with self._stage("text_extraction", bytes=file_size) as span:
+                text = self._cache_get(file_hash, "text")
+                if text:
+                    span["details"] = {"cached": True}
+                    self._update_progress("text_extraction", f"Using cached text ({len(text)} characters)", 30)
+                else:
+                    self._update_progress("text_extraction", "Extracting text from document...", 20)
+                    text = await asyncio.to_thread(self.extract_text_from_file, file_path)
+                    if not text:
+                        raise Exception(f"Failed to extract text from {file_path.name}")
+                    self._cache_put(file_hash, "text", text)
+                    self._update_progress("text_extraction", f"Extracted {len(text)} characters", 30)
+
+            text_bytes = len(text.encode('utf-8'))
+            metadata_task = spawn(self._in_stage(
+                "metadata", self._get_sow_metadata(file_path.name, text, file_hash), bytes=text_bytes))
+            staffing_task = None if use_di else spawn(self._in_stage(
+                "staffing", self._get_targeted_staffing(text, file_hash), bytes=text_bytes))
+
+            data = await metadata_task
+            if di_task is not None:
+                di_result = await di_task
+                staffing_plan = di_result.get('minimal') or []
+                low_confidence = di_result.get('low_confidence_entries') or []
+                if staffing_plan:
+                    self._record_staffing_path("di_deterministic")
+                else:
+                    reason = "DI staffing tables are low-confidence" if low_confidence else "DI found no staffing rows"
+                    self._update_progress("llm_extraction", f"{reason} - falling back to targeted extraction", 60)
+                    self._record_staffing_path("llm_low_confidence" if low_confidence else "llm_no_table")
+                    staffing_plan = await self._in_stage(
+                        "staffing", self._get_targeted_staffing(text, file_hash), bytes=text_bytes)
+                    if not staffing_plan and low_confidence:
+                        # The LLM found nothing either: low-confidence rows beat an empty plan
+                        self._record_staffing_path("di_low_confidence_fallback")
+                        staffing_plan = await self._normalize_staffing_titles_async(
+                            self._to_minimal_staffing(low_confidence, normalize=False))
+            else:
+                self._record_staffing_path("llm_no_di")
+                staffing_plan = await staffing_task
+            data['staffing_plan'] = staffing_plan
+
+            # Uploads (optional), all three at once
             if not skip_uploads:
                 self._update_progress("upload", "Uploading files to Azure Storage...", 70)
-                # 1. Upload raw file to sows container
-                await self.upload_raw_file_to_storage(file_path, file_path.name)
-                # 2. Upload extracted text to extracted container
-                await self.upload_extracted_text_to_storage(file_path.name, text)
-                # 3. Upload structured JSON to parsed container
-                await self.upload_json_to_storage(file_path.name, data)
+                await asyncio.gather(
+                    spawn(self._in_stage("upload_raw", self.upload_raw_file_to_storage(file_path, file_path.name),
+                                         bytes=file_size)),
+                    spawn(self._in_stage("upload_text", self.upload_extracted_text_to_storage(file_path.name, text),
+                                         bytes=text_bytes)),
+                    spawn(self._in_stage("upload_json", self.upload_json_to_storage(file_path.name, data))),
+                )
             
             processing_time = (datetime.now() - start_time).total_seconds()
             
@@ -1177,6 +1796,12 @@ Examples of what to extract:
             )
             
         except Exception as e:
+            error = str(e)
+            # Don't leave sibling stages running (or their errors unretrieved)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             processing_time = (datetime.now() - start_time).total_seconds()
             return ExtractionResult(
                 success=False,
@@ -1184,22 +1809,81 @@ Examples of what to extract:
                 file_name=file_path.name,
                 processing_time=processing_time
             )
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            _current_file.reset(token)
+            self._emit(ExtractionEvent(
+                kind=DOCUMENT_END,
+                file_name=file_path.name,
+                trace_id=trace_id,
+                span_id=root_span_id,
+                started_at=started_at,
+                ended_at=time.time(),
+                duration=time.perf_counter() - started,
+                bytes=file_size,
+                error=error,
+            ))
     
-    async def process_all_sows(self) -> List[ExtractionResult]:
-        """Process all SOW documents and extract data"""
+    async def process_all_sows(self, max_concurrency: Optional[int] = None, skip_uploads: bool = False, use_cache: bool = True) -> List[ExtractionResult]:
+        """Process all SOW documents concurrently and extract data.
+
+        Args:
+            max_concurrency: Documents in flight at once (defaults to
+                ``self.max_concurrency`` / SOW_MAX_CONCURRENCY). Use 1 for serial.
+            skip_uploads: Skip Azure Storage uploads
+            use_cache: Reuse cached stage outputs for unchanged files
+
+        Returns:
+            Results in the same order as ``get_sow_files()``
+        """
         self._update_progress("file_discovery", "Getting list of SOW documents...", 0)
         
         file_paths = self.get_sow_files()
-        self._update_progress("file_discovery", f"Found {len(file_paths)} SOW documents", 5)
-        
-        results = []
-        
-        for i, file_path in enumerate(file_paths, 1):
-            self._update_progress("batch_processing", f"Processing {i}/{len(file_paths)}: {file_path.name}", int((i-1) / len(file_paths) * 100))
-            
-            result = await self.process_single_sow(file_path)
-            results.append(result)
-        
+        total = len(file_paths)
+        self._update_progress("file_discovery", f"Found {total} SOW documents", 5)
+        if not file_paths:
+            return []
+
+        await self.initialize()
+        try:
+            return await self._process_batch(file_paths, max_concurrency, skip_uploads, use_cache)
+        finally:
+            await self._close_loop_clients()
+
+    async def _process_batch(self, file_paths: List[Path], max_concurrency: Optional[int],
+                             skip_uploads: bool, use_cache: bool) -> List[ExtractionResult]:
+        total = len(file_paths)
+        limit = max(1, max_concurrency or self.max_concurrency)
+        worker_slots = asyncio.Semaphore(limit)
+        counts = {"completed": 0, "succeeded": 0, "failed": 0}
+        batch_started = time.perf_counter()
+        self._emit(ExtractionEvent(kind=BATCH_START, started_at=time.time(),
+                                   details={"total": total, "in_flight_limit": limit}))
+
+        async def run_one(file_path: Path) -> ExtractionResult:
+            async with worker_slots:
+                result = await self._process_single_sow(file_path, skip_uploads=skip_uploads, use_cache=use_cache)
+            # Single-threaded event loop: counter updates need no lock
+            counts["completed"] += 1
+            counts["succeeded" if result.success else "failed"] += 1
+            self._update_progress(
+                "batch_processing",
+                f"Processed {counts['completed']}/{total}: {file_path.name}",
+                self.batch_progress.percentage,
+                details={**counts, "total": total, "in_flight_limit": limit,
+                         "staffing_paths": self.get_staffing_path_stats()},
+            )
+            return result
+
+        self._update_progress("batch_processing", f"Processing {total} documents ({limit} at a time)", 0,
+                              details={**counts, "total": total, "in_flight_limit": limit})
+        # Each task gets its own context copy, so per-file progress tagging doesn't leak
+        results = list(await asyncio.gather(*(run_one(fp) for fp in file_paths)))
+        self._emit(ExtractionEvent(kind=BATCH_END, ended_at=time.time(), duration=time.perf_counter() - batch_started,
+                                   details={**counts, "total": total, "staffing_paths": self.get_staffing_path_stats()}))
+        await self.events.flush()
+        self._export_trace()
         return results
     
     def save_to_spreadsheet(self, results: List[ExtractionResult], filename: str = None) -> str:
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Title Matcher
+=============
+
+Fuzzy index over canonical org chart titles, used to normalize staffing titles
+without an LLM call. Titles are tokenized with common abbreviations expanded
+("Sr. Acct Exec" -> senior account executive); candidates sharing a token are
+scored by token Jaccard similarity blended with a character-level ratio
+(difflib), and the best candidate is accepted above a threshold.
+"""
+
+import re
+import difflib
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# Token-level expansions applied to both chart titles and candidates
+TOKEN_EXPANSIONS = {
+    'sr': 'senior',
+    'snr': 'senior',
+    'jr': 'junior',
+    'exec': 'executive',
+    'vp': 'vice president',
+    'svp': 'senior vice president',
+    'evp': 'executive vice president',
+    'acct': 'account',
+    'mgr': 'manager',
+    'dir': 'director',
+    'coord': 'coordinator',
+    'asst': 'assistant',
+    'assoc': 'associate',
+    'grp': 'group',
+    'pm': 'project manager',
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def title_tokens(title: str) -> List[str]:
+    """Lowercase word tokens with abbreviations expanded"""
+    tokens: List[str] = []
+    for tok in _TOKEN_RE.findall((title or '').lower()):
+        tokens.extend(TOKEN_EXPANSIONS.get(tok, tok).split())
+    return tokens
+
+
+class TitleIndex:
+    """Inverted token index over canonical titles"""
+
+    def __init__(self, titles: Dict[str, Dict[str, object]], threshold: float = 0.8):
+        """
+        Args:
+            titles: chart map of title_lower -> {"title": ..., "level": ...}
+            threshold: minimum blended similarity (0-1) to accept a match
+        """
+        self.threshold = threshold
+        self._entries: List[Tuple[str, Set[str], str]] = []  # (chart key, token set, normalized string)
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        for key in titles:
+            tokens = title_tokens(key)
+            if not tokens:
+                continue
+            idx = len(self._entries)
+            self._entries.append((key, set(tokens), " ".join(tokens)))
+            for tok in tokens:
+                self._postings[tok].add(idx)
+
+    def match(self, candidate: str) -> Optional[Tuple[str, float]]:
+        """Return (chart key, score) of the best match above threshold, or None"""
+        tokens = title_tokens(candidate)
+        if not tokens:
+            return None
+        token_set = set(tokens)
+        normalized = " ".join(tokens)
+        candidates: Set[int] = set()
+        for tok in token_set:
+            candidates |= self._postings.get(tok, set())
+        best: Optional[Tuple[str, float]] = None
+        for idx in candidates:
+            key, entry_tokens, entry_norm = self._entries[idx]
+            jaccard = len(token_set & entry_tokens) / len(token_set | entry_tokens)
+            ratio = difflib.SequenceMatcher(None, normalized, entry_norm).ratio()
+            score = 0.6 * jaccard + 0.4 * ratio
+            if best is None or score > best[1]:
+                best = (key, score)
+        if best is not None and best[1] >= self.threshold:
+            return best
+        return None
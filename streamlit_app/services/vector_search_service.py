@@ -8,16 +8,29 @@ This service provides:
 - Vector search using embeddings
 - Hybrid search (lexical + vector + semantic ranking)
 - Semantic ranking for better relevance
+
+Results carry the "card" projection by default (see search_projections);
+raw_content is fetched per document with get_document_fields.
 """
 
 import os
 import json
-import requests
-import aiohttp
 import asyncio
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 from dotenv import load_dotenv
+try:
+    from .embedding_cache import get_query_embedding_cache, get_query_embedding_sync  # type: ignore
+except Exception:
+    from embedding_cache import get_query_embedding_cache, get_query_embedding_sync  # type: ignore
+try:
+    from .http_transport import get_http_transport, get_async_http_transport  # type: ignore
+except Exception:
+    from http_transport import get_http_transport, get_async_http_transport  # type: ignore
+try:
+    from .search_projections import HEAVY_FIELDS, fetch_document_fields, select_for  # type: ignore
+except Exception:
+    from search_projections import HEAVY_FIELDS, fetch_document_fields, select_for  # type: ignore
 
 
 class VectorSearchService:
@@ -53,7 +66,11 @@ class VectorSearchService:
         self.search_endpoint = self.search_endpoint.rstrip('/')
     
     async def get_query_embedding(self, query: str) -> List[float]:
-        """Get vector embedding for search query"""
+        """Get vector embedding for search query (served from the shared cache when possible)"""
+        cache = get_query_embedding_cache()
+        cached = cache.get(self.openai_deployment, query)
+        if cached is not None:
+            return cached
         try:
             url = f"{self.openai_endpoint}openai/deployments/{self.openai_deployment}/embeddings?api-version=2024-08-01-preview"
             headers = {
@@ -64,26 +81,30 @@ class VectorSearchService:
                 'input': query
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result['data'][0]['embedding']
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ Error getting query embedding: {response.status} - {error_text}")
-                        return None
+            response = await get_async_http_transport().post(url, headers=headers, json=data)
+            if response.status_code == 200:
+                embedding = response.json()['data'][0]['embedding']
+                cache.put(self.openai_deployment, query, embedding)
+                return embedding
+            else:
+                print(f"❌ Error getting query embedding: {response.status_code} - {response.text}")
+                return None
         except Exception as e:
             print(f"❌ Error getting query embedding: {e}")
             return None
     
+    def _get_query_embedding_sync(self, query: str) -> Optional[List[float]]:
+        """Resolve a query embedding from sync code on the pooled sync transport (no event loop)"""
+        return get_query_embedding_sync(self.openai_endpoint, self.openai_api_key, self.openai_deployment, query)
+    
     def vector_search(
         self, 
         query: str, 
         vector_field: str = "parsed_content_vector",
         top: int = 10,
         skip: int = 0,
-        filter_expression: Optional[str] = None
+        filter_expression: Optional[str] = None,
+        projection: Optional[str] = None
     ) -> Dict[str, Any]:
         """Perform pure vector search using embeddings"""
         url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
@@ -94,20 +115,7 @@ class VectorSearchService:
         }
         
         # Get query embedding
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # If we're in an async context, create a new task
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, self.get_query_embedding(query))
-                    query_embedding = future.result()
-            else:
-                query_embedding = asyncio.run(self.get_query_embedding(query))
-        except:
-            # Fallback: run in new event loop
-            query_embedding = asyncio.run(self.get_query_embedding(query))
-            
+        query_embedding = self._get_query_embedding_sync(query)
         if not query_embedding:
             return {"error": "Failed to get query embedding"}
         
@@ -120,7 +128,7 @@ class VectorSearchService:
                     "fields": vector_field
                 }
             ],
-            "select": "*",
+            "select": select_for(projection),
             "top": top,
             "skip": skip
         }
@@ -129,7 +137,7 @@ class VectorSearchService:
             payload["filter"] = filter_expression
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = get_http_transport().post(url, headers=headers, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -159,7 +167,8 @@ class VectorSearchService:
         skip: int = 0,
         filter_expression: Optional[str] = None,
         vector_weight: float = 0.7,
-        lexical_weight: float = 0.3
+        lexical_weight: float = 0.3,
+        projection: Optional[str] = None
     ) -> Dict[str, Any]:
         """Perform hybrid search combining lexical and vector search"""
         url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
@@ -170,20 +179,7 @@ class VectorSearchService:
         }
         
         # Get query embedding
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # If we're in an async context, create a new task
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, self.get_query_embedding(query))
-                    query_embedding = future.result()
-            else:
-                query_embedding = asyncio.run(self.get_query_embedding(query))
-        except:
-            # Fallback: run in new event loop
-            query_embedding = asyncio.run(self.get_query_embedding(query))
-            
+        query_embedding = self._get_query_embedding_sync(query)
         if not query_embedding:
             return {"error": "Failed to get query embedding"}
         
@@ -197,7 +193,7 @@ class VectorSearchService:
                     "fields": "content_vector"
                 }
             ],
-            "select": "*",
+            "select": select_for(projection),
             "top": top,
             "skip": skip,
             "queryType": "semantic",
@@ -217,7 +213,7 @@ class VectorSearchService:
             payload["filter"] = filter_expression
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = get_http_transport().post(url, headers=headers, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -245,7 +241,8 @@ class VectorSearchService:
         query: str, 
         top: int = 10,
         skip: int = 0,
-        filter_expression: Optional[str] = None
+        filter_expression: Optional[str] = None,
+        projection: Optional[str] = None
     ) -> Dict[str, Any]:
         """Perform semantic search with ranking"""
         url = f"{self.search_endpoint}/indexes/{self.index_name}/docs/search?api-version=2023-11-01"
@@ -257,7 +254,7 @@ class VectorSearchService:
         
         payload = {
             "search": query,
-            "select": "*",
+            "select": select_for(projection),
             "top": top,
             "skip": skip,
             "queryType": "semantic",
@@ -277,7 +274,7 @@ class VectorSearchService:
             payload["filter"] = filter_expression
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = get_http_transport().post(url, headers=headers, json=payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -298,17 +295,23 @@ class VectorSearchService:
         search_type: str = "hybrid",
         top: int = 10,
         skip: int = 0,
-        filter_expression: Optional[str] = None
+        filter_expression: Optional[str] = None,
+        projection: Optional[str] = None
     ) -> Dict[str, Any]:
         """Main search method with different search types"""
+        kwargs = dict(top=top, skip=skip, filter_expression=filter_expression, projection=projection)
         if search_type == "vector":
-            return self.vector_search(query, top=top, skip=skip, filter_expression=filter_expression)
+            return self.vector_search(query, **kwargs)
         elif search_type == "hybrid":
-            return self.hybrid_search(query, top=top, skip=skip, filter_expression=filter_expression)
+            return self.hybrid_search(query, **kwargs)
         elif search_type == "semantic":
-            return self.semantic_search(query, top=top, skip=skip, filter_expression=filter_expression)
+            return self.semantic_search(query, **kwargs)
         else:
             return {"error": f"Unknown search type: {search_type}"}
+    
+    def get_document_fields(self, doc_id: str, fields=HEAVY_FIELDS) -> Optional[Dict[str, Any]]:
+        """Fetch fields left out of search projections (e.g. raw_content) for one document"""
+        return fetch_document_fields(self.search_endpoint, self.search_key, self.index_name, doc_id, fields)
 
 
 def get_vector_search_service() -> VectorSearchService: